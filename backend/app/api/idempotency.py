@@ -0,0 +1,182 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Coroutine
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import get_session
+from app.services.idempotency import (
+    ClaimLost,
+    KeyInProgress,
+    KeyReused,
+    ResponseLost,
+    claim_key,
+    complete_key,
+    release_key,
+    request_fingerprint,
+    save_response,
+)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+_SESSION_CLAIM = "idempotency_claim"
+
+
+@dataclass
+class _Claim:
+    key: str
+    claimed_at: datetime
+    status_code: int
+    committed: bool = False
+
+
+# claim of the request whose handler runs in this context
+_current_claim: ContextVar[_Claim | None] = ContextVar("idempotency_claim", default=None)
+
+
+@event.listens_for(Session, "before_commit")
+def _complete_claim(session: Session) -> None:
+    claim = _current_claim.get()
+    if claim is None or claim.committed:
+        return
+    complete_key(session, claim.key, claim.claimed_at, claim.status_code)
+    session.info[_SESSION_CLAIM] = claim
+
+
+@event.listens_for(Session, "after_commit")
+def _claim_committed(session: Session) -> None:
+    claim = session.info.pop(_SESSION_CLAIM, None)
+    if claim is not None:
+        claim.committed = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _claim_rolled_back(session: Session) -> None:
+    session.info.pop(_SESSION_CLAIM, None)
+
+
+@asynccontextmanager
+async def _key_session(request: Request) -> AsyncIterator[AsyncSession]:
+    # resolved like the route's own dependency, so overrides apply here too
+    dependency = request.app.dependency_overrides.get(get_session, get_session)
+    sessions = dependency()
+    try:
+        yield await anext(sessions)
+    finally:
+        await sessions.aclose()
+
+
+async def _run_with_claim(
+    handler: Callable[[Request], Coroutine[None, None, Response]],
+    request: Request,
+    claim: _Claim,
+) -> Response:
+    token = _current_claim.set(claim)
+    try:
+        return await handler(request)
+    finally:
+        _current_claim.reset(token)
+
+
+class IdempotentRoute(APIRoute):
+    """
+    Route that honours an Idempotency-Key header on mutating methods.
+
+    A repeated request with the same key gets the stored response of the
+    first one (with an Idempotent-Replayed header) instead of running again.
+    The key is marked completed in the transaction of the handler's first
+    commit, whichever session the handler uses. Requests without the header
+    are not affected.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+        if not self.methods & MUTATING_METHODS:
+            return handler
+
+        async def idempotent_handler(request: Request) -> Response:
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None:
+                return await handler(request)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters",
+                )
+            fingerprint = request_fingerprint(
+                request.method, request.url.path, request.url.query, await request.body()
+            )
+
+            async with _key_session(request) as session:
+                claimed_at = datetime.now(timezone.utc)
+                try:
+                    stored = await claim_key(
+                        session,
+                        key,
+                        fingerprint,
+                        settings.idempotency_ttl_seconds,
+                        settings.idempotency_lease_seconds,
+                        now=claimed_at,
+                    )
+                except KeyReused:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"{IDEMPOTENCY_HEADER} was already used for a different request",
+                    )
+                except KeyInProgress:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress",
+                    )
+                except ResponseLost:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=(
+                            f"A request with this {IDEMPOTENCY_HEADER} was applied,"
+                            " but its response was not saved"
+                        ),
+                    )
+                if stored is not None:
+                    headers = {REPLAYED_HEADER: "true"}
+                    if stored.content_type:
+                        headers["content-type"] = stored.content_type
+                    return Response(stored.body, status_code=stored.status_code, headers=headers)
+
+                claim = _Claim(key, claimed_at, self.status_code or status.HTTP_200_OK)
+                try:
+                    response = await _run_with_claim(handler, request, claim)
+                except ClaimLost:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"A retry with this {IDEMPOTENCY_HEADER} took the request over",
+                    )
+                except Exception:
+                    if not claim.committed:
+                        await release_key(session, key, claimed_at)
+                    raise
+
+                body = getattr(response, "body", None)
+                if body is not None and (claim.committed or 200 <= response.status_code < 300):
+                    await save_response(
+                        session,
+                        key,
+                        claimed_at,
+                        response.status_code,
+                        response.headers.get("content-type"),
+                        bytes(body),
+                    )
+                elif not claim.committed:
+                    # streamed or failed before any commit: nothing to replay
+                    await release_key(session, key, claimed_at)
+                return response
+
+        return idempotent_handler
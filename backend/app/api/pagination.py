@@ -0,0 +1,27 @@
+import base64
+import binascii
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: int) -> str:
+    """Opaque keyset cursor for the last row of a page."""
+    raw = ":".join(str(v) for v in values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[int, ...]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = tuple(int(v) for v in base64.urlsafe_b64decode(padded).decode().split(":"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = ()
+    if len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def set_next_cursor(response: Response, *values: int) -> None:
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*values)
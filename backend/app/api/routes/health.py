@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 
+from app.services.ref_cache import reference_cache
+
 router = APIRouter(tags=["health"])
 
 
@@ -8,6 +10,11 @@ async def health_check():
     return {"status": "ok"}
 
 
+@router.get("/health/cache")
+async def cache_stats():
+    return reference_cache.stats()
+
+
 @router.get("/")
 async def root():
     return {"status": "ok", "service": "eWMS API"}
@@ -1,8 +1,13 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+﻿import time
+from typing import Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.api.idempotency import IdempotentRoute
+from app.api.pagination import decode_cursor, set_next_cursor
 from app.db.session import get_session
 from app.models import (
     InboundOrder,
@@ -11,7 +16,6 @@ from app.models import (
     InboundReceipt,
     Inventory,
     Movement,
-    Warehouse,
     Partner,
     Item,
     Location,
@@ -24,12 +28,44 @@ from app.schemas import (
     InboundOrderCreate,
     InboundOrderRead,
     InboundOrderStatusUpdate,
+    InboundOrderSummaryRead,
+    InboundImportError,
+    InboundImportResult,
     InboundReceiveRequest,
+    InboundReceiveBatchResult,
+    InboundReceiveLineResult,
     InboundCloseTareRequest,
 )
+from app.services.asn_import import AsnFormat, import_asn
+from app.services.inbound_counters import (
+    CounterDelta,
+    apply_counter_delta,
+    derive_status,
+    line_flags,
+)
 from app.services.inventory import increment_inventory
+from app.services.ref_cache import reference_cache
+from app.services.retry import retry_on_conflict
+
+router = APIRouter(prefix="/inbound_orders", tags=["inbound_orders"], route_class=IdempotentRoute)
+
+INBOUND_PAGE_MAX = 1000
+
+# Content-Type -> import format when ?format= is not given
+ASN_CONTENT_TYPES: dict[str, AsnFormat] = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "json",
+}
 
-router = APIRouter(prefix="/inbound_orders", tags=["inbound_orders"])
+RECEIVING_STATUSES = {
+    InboundStatus.receiving,
+    InboundStatus.problem,
+    InboundStatus.mis_sort,
+    InboundStatus.in_progress,
+}
 
 
 async def _get_inbound_with_lines(
@@ -42,82 +78,82 @@ async def _get_inbound_with_lines(
     )
 
 
-def _recalculate_order_status(order: InboundOrder) -> None:
+async def _recalculate_order_status(
+    session: AsyncSession, order: InboundOrder, delta: CounterDelta | None = None
+) -> None:
     """
-    Update order status based on line facts.
+    Add delta to the line counters in SQL and set the status from the result,
+    without walking the lines.
     """
-    has_mis_sort = any(
-        ln.line_status == "mis_sort" or ln.expected_qty == 0 for ln in order.lines
-    )
-    has_over = any(
-        ln.received_qty > ln.expected_qty for ln in order.lines if ln.expected_qty is not None
-    )
-    all_match = (
-        len(order.lines) > 0
-        and not has_mis_sort
-        and not has_over
-        and all(
-            (ln.received_qty or 0) == (ln.expected_qty or 0)
-            for ln in order.lines
-            if ln.expected_qty is not None
-        )
-    )
-
-    if has_mis_sort:
-        order.status = InboundStatus.mis_sort
-    elif has_over:
-        order.status = InboundStatus.problem
-    elif all_match:
-        order.status = InboundStatus.received
-    else:
-        order.status = InboundStatus.receiving
+    await apply_counter_delta(session, order, delta or CounterDelta())
+    order.status = derive_status(order)
 
 
 async def _populate_line_locations_from_receipts(
-    session: AsyncSession, order: InboundOrder
+    session: AsyncSession, orders: Sequence[InboundOrder]
 ) -> None:
     """
     If line.location_id is empty, try to fill it from last receipt/tare placement.
+
+    One query per page of orders: only the last placed receipt per (order,
+    line) and per (order, item) comes back, ranked by a window in SQL.
     """
-    receipts = (
-        await session.execute(
+    order_ids = [o.id for o in orders if any(not ln.location_id for ln in o.lines)]
+    last_by_line: dict[int, int] = {}
+    last_by_item: dict[tuple[int, int], int] = {}
+    for start in range(0, len(order_ids), INBOUND_PAGE_MAX):
+        ranked = (
             select(
+                InboundReceipt.inbound_order_id,
                 InboundReceipt.line_id,
                 InboundReceipt.item_id,
                 Tare.location_id,
-                InboundReceipt.id,
+                func.row_number()
+                .over(
+                    partition_by=(InboundReceipt.inbound_order_id, InboundReceipt.line_id),
+                    order_by=InboundReceipt.id.desc(),
+                )
+                .label("line_rank"),
+                func.row_number()
+                .over(
+                    partition_by=(InboundReceipt.inbound_order_id, InboundReceipt.item_id),
+                    order_by=InboundReceipt.id.desc(),
+                )
+                .label("item_rank"),
             )
             .join(Tare, InboundReceipt.tare_id == Tare.id)
             .where(
-                InboundReceipt.inbound_order_id == order.id,
+                InboundReceipt.inbound_order_id.in_(order_ids[start : start + INBOUND_PAGE_MAX]),
                 Tare.location_id.isnot(None),
             )
-            .order_by(InboundReceipt.id)
+            .subquery()
         )
-    ).all()
-
-    last_by_line: dict[int, int] = {}
-    last_by_item: dict[int, int] = {}
-    for rec_line_id, rec_item_id, rec_loc_id, _ in receipts:
-        if rec_line_id:
-            last_by_line[rec_line_id] = rec_loc_id
-        if rec_item_id:
-            last_by_item[rec_item_id] = rec_loc_id
-
-    for ln in order.lines:
-        if ln.location_id:
-            continue
-        if ln.id in last_by_line:
-            ln.location_id = last_by_line[ln.id]
-        elif ln.item_id in last_by_item:
-            ln.location_id = last_by_item[ln.item_id]
+        receipts = await session.execute(
+            select(ranked).where(or_(ranked.c.line_rank == 1, ranked.c.item_rank == 1))
+        )
+        for rec_order_id, rec_line_id, rec_item_id, rec_loc_id, line_rank, item_rank in receipts:
+            if rec_line_id and line_rank == 1:
+                last_by_line[rec_line_id] = rec_loc_id
+            if item_rank == 1:
+                last_by_item[(rec_order_id, rec_item_id)] = rec_loc_id
+    if not last_by_line and not last_by_item:
+        return
+
+    for order in orders:
+        for ln in order.lines:
+            if ln.location_id:
+                continue
+            if ln.id in last_by_line:
+                ln.location_id = last_by_line[ln.id]
+            elif (order.id, ln.item_id) in last_by_item:
+                ln.location_id = last_by_item[(order.id, ln.item_id)]
 
 
 @router.post("", response_model=InboundOrderRead, status_code=status.HTTP_201_CREATED)
 async def create_inbound_order(
     payload: InboundOrderCreate, session: AsyncSession = Depends(get_session)
 ):
-    warehouse = await session.get(Warehouse, payload.warehouse_id)
+    warehouse = await reference_cache.warehouse(session, payload.warehouse_id)
     if warehouse is None:
         raise HTTPException(status_code=404, detail="Warehouse not found")
 
@@ -166,16 +202,18 @@ async def create_inbound_order(
         status=status_value,
     )
     order.lines = []
+    counters = CounterDelta()
     for line in payload.lines:
-        order.lines.append(
-            InboundOrderLine(
-                item_id=line.item_id,
-                expected_qty=line.expected_qty,
-                received_qty=line.received_qty,
-                location_id=line.location_id,
-                line_status=line.line_status or "open",
-            )
+        order_line = InboundOrderLine(
+            item_id=line.item_id,
+            expected_qty=line.expected_qty,
+            received_qty=line.received_qty,
+            location_id=line.location_id,
+            line_status=line.line_status or "open",
         )
+        order.lines.append(order_line)
+        counters.track(order_line)
+    counters.assign(order)
 
     session.add(order)
     await session.commit()
@@ -184,28 +222,122 @@ async def create_inbound_order(
     return order
 
 
-@router.get("", response_model=list[InboundOrderRead])
+@router.post("/import", response_model=InboundImportResult, status_code=status.HTTP_201_CREATED)
+async def import_inbound_order(
+    request: Request,
+    external_number: str,
+    warehouse_id: int,
+    partner_id: int | None = None,
+    file_format: AsnFormat | None = Query(None, alias="format"),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Create an inbound order from an ASN file sent as the request body.
+
+    CSV with a header row, NDJSON or a JSON array of objects; the format
+    comes from `format` or the Content-Type (`format=json` also takes NDJSON
+    when the body is not an array). The body is parsed as it streams in. Invalid lines are
+    reported with their line number and skipped; the order is created with
+    the valid ones in one transaction.
+    """
+    if file_format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        file_format = ASN_CONTENT_TYPES.get(content_type)
+        if file_format is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Unknown file format, pass format=csv, format=ndjson or format=json",
+            )
+
+    warehouse = await reference_cache.warehouse(session, warehouse_id)
+    if warehouse is None:
+        raise HTTPException(status_code=404, detail="Warehouse not found")
+    if partner_id is not None:
+        partner = await session.get(Partner, partner_id)
+        if partner is None:
+            raise HTTPException(status_code=404, detail="Partner not found")
+
+    started = time.perf_counter()
+    order, outcome = await import_asn(
+        session, external_number, warehouse_id, partner_id, request.stream(), file_format
+    )
+    await session.commit()
+
+    return InboundImportResult(
+        order_id=order.id,
+        records=outcome.records,
+        lines_imported=outcome.imported,
+        errors_total=outcome.errors_total,
+        errors=[InboundImportError(line=e.line, detail=e.detail) for e in outcome.errors],
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
+
+@router.get("", response_model=list[InboundOrderRead] | list[InboundOrderSummaryRead])
 async def list_inbound_orders(
+    response: Response,
     warehouse_id: int | None = None,
     status_filter: InboundStatus | None = None,
     partner_id: int | None = None,
     external_number: str | None = None,
+    limit: int | None = Query(None, ge=1, le=INBOUND_PAGE_MAX),
+    cursor: str | None = None,
+    include_lines: bool = True,
     session: AsyncSession = Depends(get_session),
 ):
-    stmt = select(InboundOrder).options(selectinload(InboundOrder.lines))
+    """
+    Inbound orders ordered by id.
+
+    With `limit` the page is cut and the cursor of the next page is returned
+    in the X-Next-Cursor header. `include_lines=false` returns orders without
+    lines, with line count and quantity totals aggregated in SQL.
+    """
+    filters = []
     if warehouse_id:
-        stmt = stmt.where(InboundOrder.warehouse_id == warehouse_id)
+        filters.append(InboundOrder.warehouse_id == warehouse_id)
     if status_filter:
-        stmt = stmt.where(InboundOrder.status == status_filter)
+        filters.append(InboundOrder.status == status_filter)
     if partner_id:
-        stmt = stmt.where(InboundOrder.partner_id == partner_id)
+        filters.append(InboundOrder.partner_id == partner_id)
     if external_number:
-        stmt = stmt.where(InboundOrder.external_number.ilike(f"%{external_number}%"))
+        filters.append(InboundOrder.external_number.ilike(f"%{external_number}%"))
+    if cursor:
+        (after_id,) = decode_cursor(cursor, 1)
+        filters.append(InboundOrder.id > after_id)
+
+    if include_lines:
+        stmt = select(InboundOrder).options(selectinload(InboundOrder.lines))
+    else:
+        stmt = (
+            select(
+                InboundOrder.id,
+                InboundOrder.external_number,
+                InboundOrder.warehouse_id,
+                InboundOrder.partner_id,
+                InboundOrder.status,
+                InboundOrder.created_at,
+                InboundOrder.updated_at,
+                func.count(InboundOrderLine.id).label("lines_count"),
+                func.coalesce(func.sum(InboundOrderLine.expected_qty), 0).label("expected_qty"),
+                func.coalesce(func.sum(InboundOrderLine.received_qty), 0).label("received_qty"),
+            )
+            .outerjoin(InboundOrderLine, InboundOrderLine.inbound_order_id == InboundOrder.id)
+            .group_by(InboundOrder.id)
+        )
+    stmt = stmt.where(*filters).order_by(InboundOrder.id)
+    if limit:
+        stmt = stmt.limit(limit + 1)
 
     result = await session.execute(stmt)
-    orders = result.scalars().all()
-    for o in orders:
-        await _populate_line_locations_from_receipts(session, o)
+    if include_lines:
+        orders = result.scalars().all()
+    else:
+        orders = [InboundOrderSummaryRead.model_validate(row._mapping) for row in result]
+    if limit and len(orders) > limit:
+        orders = orders[:limit]
+        set_next_cursor(response, orders[-1].id)
+    if include_lines:
+        await _populate_line_locations_from_receipts(session, orders)
     return orders
 
 
@@ -214,7 +346,7 @@ async def get_inbound_order(order_id: int, session: AsyncSession = Depends(get_s
     order = await _get_inbound_with_lines(session, order_id)
     if order is None:
         raise HTTPException(status_code=404, detail="Inbound order not found")
-    await _populate_line_locations_from_receipts(session, order)
+    await _populate_line_locations_from_receipts(session, [order])
     return order
 
 
@@ -291,24 +423,7 @@ async def update_inbound_status(
     return order
 
 
-@router.post("/{order_id}/receive", response_model=InboundOrderRead)
-async def receive_inbound_line(
-    order_id: int,
-    payload: InboundReceiveRequest,
-    session: AsyncSession = Depends(get_session),
-):
-    order = await _get_inbound_with_lines(session, order_id)
-    if order is None:
-        raise HTTPException(status_code=404, detail="Inbound order not found")
-    if order.status not in {
-        InboundStatus.receiving,
-        InboundStatus.problem,
-        InboundStatus.mis_sort,
-        InboundStatus.in_progress,
-    }:
-        raise HTTPException(status_code=400, detail="Order must be in receiving to accept items")
-
-    tare = await session.get(Tare, payload.tare_id)
+def _check_receiving_tare(order: InboundOrder, tare: Tare | None) -> None:
     if tare is None:
         raise HTTPException(status_code=404, detail="Tare not found")
     if tare.warehouse_id != order.warehouse_id:
@@ -316,6 +431,38 @@ async def receive_inbound_line(
     if tare.status == TareStatus.closed:
         raise HTTPException(status_code=400, detail="Tare is already closed for receiving")
 
+
+def _receive_into_line(
+    counters: CounterDelta, line: InboundOrderLine, payload: InboundReceiveRequest
+) -> None:
+    """Add one scan to an existing line and update its line_status and the counter delta."""
+    before = line_flags(line)
+    line.received_qty += payload.qty
+    if line.received_qty > line.expected_qty:
+        line.line_status = "over_received"
+    elif payload.condition:
+        line.line_status = payload.condition.value if hasattr(payload.condition, "value") else str(payload.condition)
+    if line.line_status not in {"mis_sort", "over_received"}:
+        if line.received_qty == line.expected_qty:
+            line.line_status = "fully_received"
+        elif line.received_qty > 0:
+            line.line_status = "partially_received"
+    counters.track(line, before)
+
+
+@retry_on_conflict()
+async def _apply_receipt(
+    session: AsyncSession, order_id: int, payload: InboundReceiveRequest
+) -> InboundOrder:
+    order = await _get_inbound_with_lines(session, order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Inbound order not found")
+    if order.status not in RECEIVING_STATUSES:
+        raise HTTPException(status_code=400, detail="Order must be in receiving to accept items")
+
+    tare = await session.get(Tare, payload.tare_id)
+    _check_receiving_tare(order, tare)
+
     line = None
     if payload.line_id:
         line = next((ln for ln in order.lines if ln.id == payload.line_id), None)
@@ -332,6 +479,7 @@ async def receive_inbound_line(
     if item is None:
         raise HTTPException(status_code=404, detail="Item not found")
 
+    counters = CounterDelta()
     if line is None:
         line = InboundOrderLine(
             item_id=actual_item_id,
@@ -341,17 +489,9 @@ async def receive_inbound_line(
             line_status="mis_sort",
         )
         order.lines.append(line)
+        counters.track(line)
     else:
-        line.received_qty += payload.qty
-        if line.received_qty > line.expected_qty:
-            line.line_status = "over_received"
-        elif payload.condition:
-            line.line_status = payload.condition.value if hasattr(payload.condition, "value") else str(payload.condition)
-        if line.line_status not in {"mis_sort", "over_received"}:
-            if line.received_qty == line.expected_qty:
-                line.line_status = "fully_received"
-            elif line.received_qty > 0:
-                line.line_status = "partially_received"
+        _receive_into_line(counters, line, payload)
 
     tare_item = (
         await session.execute(
@@ -381,8 +521,18 @@ async def receive_inbound_line(
     )
     session.add(receipt)
 
-    _recalculate_order_status(order)
+    await _recalculate_order_status(session, order, counters)
     await session.commit()
+    return order
+
+
+@router.post("/{order_id}/receive", response_model=InboundOrderRead)
+async def receive_inbound_line(
+    order_id: int,
+    payload: InboundReceiveRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    order = await _apply_receipt(session, order_id, payload)
     await session.refresh(order)
     await session.refresh(order, attribute_names=["lines"])
     return order
@@ -408,16 +558,12 @@ async def close_tare_after_receiving(
     if tare.location_id:
         raise HTTPException(status_code=400, detail="Tare already placed to a location")
 
-    location = (
-        await session.execute(
-            select(Location).options(selectinload(Location.zone)).where(Location.id == payload.location_id)
-        )
-    ).scalar_one_or_none()
+    location = await reference_cache.location(session, payload.location_id)
     if location is None:
         raise HTTPException(status_code=404, detail="Location not found")
     if location.warehouse_id != order.warehouse_id:
         raise HTTPException(status_code=400, detail="Location not in order warehouse")
-    if location.zone is None or location.zone.zone_type != ZoneType.inbound:
+    if location.zone_type != ZoneType.inbound.value:
         raise HTTPException(
             status_code=400,
             detail="Нельзя размещать тару в ячейку вне зоны приёмки",
@@ -431,10 +577,12 @@ async def close_tare_after_receiving(
         raise HTTPException(status_code=400, detail="Нельзя разместить пустую тару: нет принятых товаров")
 
     tare.location_id = payload.location_id
+    lines_by_item: dict[int, list[InboundOrderLine]] = {}
+    for ln in order.lines:
+        lines_by_item.setdefault(ln.item_id, []).append(ln)
     for ti in tare.items:
-        for ln in order.lines:
-            if ln.item_id == ti.item_id:
-                ln.location_id = payload.location_id
+        for ln in lines_by_item.get(ti.item_id, []):
+            ln.location_id = payload.location_id
         await increment_inventory(
             session,
             warehouse_id=order.warehouse_id,
@@ -443,10 +591,165 @@ async def close_tare_after_receiving(
             qty=ti.quantity,
             tare_id=tare.id,
         )
+        session.add(
+            Movement(
+                warehouse_id=order.warehouse_id,
+                item_id=ti.item_id,
+                from_location_id=None,
+                to_location_id=payload.location_id,
+                quantity=ti.quantity,
+            )
+        )
 
     tare.status = TareStatus.closed
-    _recalculate_order_status(order)
+    await _recalculate_order_status(session, order)
     await session.commit()
     updated = await _get_inbound_with_lines(session, order_id)
-    await _populate_line_locations_from_receipts(session, updated)
+    await _populate_line_locations_from_receipts(session, [updated])
     return updated
+
+
+@retry_on_conflict()
+async def _apply_receipts(
+    session: AsyncSession, order_id: int, payload: list[InboundReceiveRequest]
+) -> tuple[InboundOrder, dict[InboundOrderLine, int]]:
+    order = await _get_inbound_with_lines(session, order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Inbound order not found")
+    if order.status not in RECEIVING_STATUSES:
+        raise HTTPException(status_code=400, detail="Order must be in receiving to accept items")
+
+    # one query per table for the whole batch
+    tares = {
+        tare.id: tare
+        for tare in (
+            await session.execute(select(Tare).where(Tare.id.in_({e.tare_id for e in payload})))
+        ).scalars()
+    }
+    lines_by_id = {ln.id: ln for ln in order.lines}
+    item_ids: list[int] = []
+    for entry in payload:
+        _check_receiving_tare(order, tares.get(entry.tare_id))
+        if entry.line_id and entry.line_id not in lines_by_id:
+            raise HTTPException(
+                status_code=404, detail=f"Line {entry.line_id} not found in this order"
+            )
+        item_id = entry.item_id or (lines_by_id[entry.line_id].item_id if entry.line_id else None)
+        if item_id is None:
+            raise HTTPException(status_code=400, detail="Item is required to receive")
+        item_ids.append(item_id)
+
+    existing_items = set(
+        (await session.execute(select(Item.id).where(Item.id.in_(set(item_ids))))).scalars()
+    )
+    missing = set(item_ids) - existing_items
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Items not found: {', '.join(map(str, sorted(missing)))}"
+        )
+
+    # fold the scans in order, exactly as if they had been posted one by one
+    first_by_item: dict[int, InboundOrderLine] = {}
+    for ln in order.lines:
+        first_by_item.setdefault(ln.item_id, ln)
+    received: dict[InboundOrderLine, int] = {}
+    tare_qty: dict[tuple[int, int], int] = {}
+    receipts: list[tuple[InboundOrderLine, InboundReceiveRequest, int]] = []
+    counters = CounterDelta()
+    for entry, item_id in zip(payload, item_ids):
+        if entry.line_id:
+            line = lines_by_id[entry.line_id]
+        else:
+            line = first_by_item.get(item_id)
+        if line is None:
+            line = InboundOrderLine(
+                item_id=item_id,
+                expected_qty=0,
+                received_qty=entry.qty,
+                location_id=None,
+                line_status="mis_sort",
+            )
+            order.lines.append(line)
+            counters.track(line)
+            first_by_item[item_id] = line
+        else:
+            _receive_into_line(counters, line, entry)
+        received[line] = received.get(line, 0) + entry.qty
+        tare_qty[(entry.tare_id, item_id)] = tare_qty.get((entry.tare_id, item_id), 0) + entry.qty
+        receipts.append((line, entry, item_id))
+    # ids for mis-sort lines created above
+    await session.flush()
+
+    tare_items = {
+        (ti.tare_id, ti.item_id): ti
+        for ti in (
+            await session.execute(
+                select(TareItem).where(
+                    TareItem.tare_id.in_({tare_id for tare_id, _ in tare_qty}),
+                    TareItem.item_id.in_({item_id for _, item_id in tare_qty}),
+                )
+            )
+        ).scalars()
+    }
+    new_tare_items = []
+    for (tare_id, item_id), qty in tare_qty.items():
+        tare_item = tare_items.get((tare_id, item_id))
+        if tare_item is None:
+            new_tare_items.append({"tare_id": tare_id, "item_id": item_id, "quantity": qty})
+        else:
+            tare_item.quantity += qty
+    if new_tare_items:
+        await session.execute(insert(TareItem), new_tare_items)
+    await session.execute(
+        insert(InboundReceipt),
+        [
+            {
+                "inbound_order_id": order.id,
+                "line_id": line.id,
+                "tare_id": entry.tare_id,
+                "item_id": item_id,
+                "quantity": entry.qty,
+                "condition": entry.condition,
+            }
+            for line, entry, item_id in receipts
+        ],
+    )
+
+    await _recalculate_order_status(session, order, counters)
+    await session.commit()
+    return order, received
+
+
+@router.post("/{order_id}/receive_batch", response_model=InboundReceiveBatchResult)
+async def receive_inbound_batch(
+    order_id: int,
+    payload: list[InboundReceiveRequest],
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Apply buffered dock scans in one transaction.
+
+    Scans are applied in order with the same rules as /receive; the batch
+    is applied as a whole or not at all.
+    """
+    if not payload:
+        raise HTTPException(status_code=400, detail="No scans to receive")
+
+    started = time.perf_counter()
+    order, received = await _apply_receipts(session, order_id, payload)
+    return InboundReceiveBatchResult(
+        order_id=order.id,
+        status=order.status,
+        lines=[
+            InboundReceiveLineResult(
+                line_id=line.id,
+                item_id=line.item_id,
+                qty_received=qty,
+                received_qty=line.received_qty,
+                expected_qty=line.expected_qty,
+                line_status=line.line_status,
+            )
+            for line, qty in received.items()
+        ],
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
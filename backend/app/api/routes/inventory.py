@@ -1,16 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.idempotency import IdempotentRoute
+from app.api.pagination import decode_cursor, set_next_cursor
 from app.db.session import get_session
-from app.models.inventory import Inventory
+from app.models.inventory import Inventory, InventoryAvailability
 from app.models.item import Item
 from app.models.movement import Movement
-from app.models.warehouse import Location, Warehouse
-from app.schemas import InboundCreate, InventoryRead, MoveCreate
-from app.services.inventory import increment_inventory
+from app.models.warehouse import Warehouse, ZoneType
+from app.schemas import (
+    InboundBatchResult,
+    InboundBatchRowResult,
+    InboundCreate,
+    InventoryAvailabilityRead,
+    InventoryRead,
+    InventoryStockRead,
+    MoveBatchResult,
+    MoveCreate,
+)
+from app.services.inventory import (
+    apply_inventory_moves,
+    bulk_increment_inventory,
+    decrement_inventory,
+    increment_inventory,
+)
+from app.services.ref_cache import reference_cache
+from app.services.retry import retry_on_conflict
+from app.services.snapshots import stock_as_of
 
-router = APIRouter(prefix="/inventory", tags=["inventory"])
+router = APIRouter(prefix="/inventory", tags=["inventory"], route_class=IdempotentRoute)
+
+INVENTORY_PAGE_MAX = 5000
+INVENTORY_STREAM_CHUNK = 1000
 
 
 @router.post(
@@ -44,19 +70,71 @@ async def inventory_inbound(
     return inv
 
 
-@router.post("/move")
-async def inventory_move(
-    payload: MoveCreate,
+@router.post(
+    "/inbound/batch",
+    response_model=InboundBatchResult,
+    status_code=status.HTTP_201_CREATED,
+)
+async def inventory_inbound_batch(
+    payload: list[InboundCreate],
     session: AsyncSession = Depends(get_session),
 ):
+    """
+    Post many inbound rows in one transaction (ERP cutover, stock-take results).
+    """
+    if not payload:
+        raise HTTPException(status_code=400, detail="No rows to post")
+
+    started = time.perf_counter()
+    rows = [(p.warehouse_id, p.location_id, p.item_id, p.qty) for p in payload]
+    inventory = await bulk_increment_inventory(session, rows)
+
+    await session.execute(
+        insert(Movement),
+        [
+            {
+                "warehouse_id": p.warehouse_id,
+                "item_id": p.item_id,
+                "from_location_id": None,
+                "to_location_id": p.location_id,
+                "quantity": p.qty,
+            }
+            for p in payload
+        ],
+    )
+    await session.commit()
+
+    results = []
+    for index, p in enumerate(payload):
+        inv = inventory[(p.warehouse_id, p.location_id, p.item_id)]
+        results.append(
+            InboundBatchRowResult(
+                index=index,
+                inventory_id=inv.id,
+                warehouse_id=p.warehouse_id,
+                location_id=p.location_id,
+                item_id=p.item_id,
+                qty=p.qty,
+                quantity=inv.quantity,
+            )
+        )
+    return InboundBatchResult(
+        rows=results,
+        total_qty=sum(p.qty for p in payload),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
+
+@retry_on_conflict()
+async def _apply_move(session: AsyncSession, payload: MoveCreate) -> None:
     if payload.from_location_id == payload.to_location_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot move to same location",
         )
 
-    from_loc = await session.get(Location, payload.from_location_id)
-    to_loc = await session.get(Location, payload.to_location_id)
+    from_loc = await reference_cache.location(session, payload.from_location_id)
+    to_loc = await reference_cache.location(session, payload.to_location_id)
 
     if not from_loc or not to_loc:
         raise HTTPException(
@@ -73,34 +151,22 @@ async def inventory_move(
         )
     ).scalar_one_or_none()
 
-    if not from_inv or from_inv.quantity < payload.qty:
+    if not from_inv or from_inv.quantity - from_inv.reserved_qty < payload.qty:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Not enough quantity on source location",
         )
 
-    to_inv = (
-        await session.execute(
-            select(Inventory).where(
-                Inventory.location_id == payload.to_location_id,
-                Inventory.item_id == payload.item_id,
-                Inventory.warehouse_id == payload.warehouse_id,
-            )
-        )
-    ).scalar_one_or_none()
-
-    from_inv.quantity -= payload.qty
+    # version-checked on flush; a concurrent writer makes the whole move retry
+    await decrement_inventory(session, from_inv, payload.qty)
 
-    if to_inv is None:
-        to_inv = Inventory(
-            warehouse_id=payload.warehouse_id,
-            location_id=payload.to_location_id,
-            item_id=payload.item_id,
-            quantity=payload.qty,
-        )
-        session.add(to_inv)
-    else:
-        to_inv.quantity += payload.qty
+    await increment_inventory(
+        session,
+        warehouse_id=payload.warehouse_id,
+        location_id=payload.to_location_id,
+        item_id=payload.item_id,
+        qty=payload.qty,
+    )
 
     move_record = Movement(
         warehouse_id=payload.warehouse_id,
@@ -112,17 +178,151 @@ async def inventory_move(
     session.add(move_record)
 
     await session.commit()
+
+
+@router.post("/move")
+async def inventory_move(
+    payload: MoveCreate,
+    session: AsyncSession = Depends(get_session),
+):
+    await _apply_move(session, payload)
     return {"status": "ok"}
 
 
-@router.get("", response_model=list[InventoryRead])
+@router.post("/move/batch", response_model=MoveBatchResult)
+async def inventory_move_batch(
+    payload: list[MoveCreate],
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Apply many moves in one transaction (replenishment waves).
+    """
+    if not payload:
+        raise HTTPException(status_code=400, detail="No moves to apply")
+
+    started = time.perf_counter()
+    await apply_inventory_moves(
+        session,
+        [
+            (p.warehouse_id, p.from_location_id, p.to_location_id, p.item_id, p.qty)
+            for p in payload
+        ],
+    )
+    await session.execute(
+        insert(Movement),
+        [
+            {
+                "warehouse_id": p.warehouse_id,
+                "item_id": p.item_id,
+                "from_location_id": p.from_location_id,
+                "to_location_id": p.to_location_id,
+                "quantity": p.qty,
+            }
+            for p in payload
+        ],
+    )
+    await session.commit()
+    return MoveBatchResult(
+        moves=len(payload),
+        total_qty=sum(p.qty for p in payload),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
+
+async def _stream_inventory_ndjson(session: AsyncSession, stmt):
+    columns = list(InventoryRead.model_fields)
+    result = await session.stream(
+        stmt.with_only_columns(*(getattr(Inventory, c) for c in columns)).execution_options(
+            yield_per=INVENTORY_STREAM_CHUNK
+        )
+    )
+    async for rows in result.partitions():
+        yield "".join(
+            InventoryRead.model_validate(row._mapping).model_dump_json() + "\n" for row in rows
+        )
+
+
+@router.get("/availability", response_model=list[InventoryAvailabilityRead])
+async def inventory_availability(
+    warehouse_id: int | None = None,
+    item_id: int | None = None,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Stock per (warehouse, item) split by zone type, read from the availability counters.
+    """
+    stmt = (
+        select(InventoryAvailability)
+        .where(InventoryAvailability.quantity != 0)
+        .order_by(InventoryAvailability.warehouse_id, InventoryAvailability.item_id)
+    )
+    if warehouse_id:
+        stmt = stmt.where(InventoryAvailability.warehouse_id == warehouse_id)
+    if item_id:
+        stmt = stmt.where(InventoryAvailability.item_id == item_id)
+
+    grouped: dict[tuple[int, int], dict[str, int]] = {}
+    for counter in (await session.execute(stmt)).scalars():
+        zones = grouped.setdefault((counter.warehouse_id, counter.item_id), {})
+        zones[counter.zone_type] = counter.quantity
+
+    return [
+        InventoryAvailabilityRead(
+            warehouse_id=wh_id,
+            item_id=it_id,
+            zones=zones,
+            pickable_qty=zones.get(ZoneType.storage.value, 0),
+            not_put_away_qty=zones.get(ZoneType.inbound.value, 0),
+            total_qty=sum(zones.values()),
+        )
+        for (wh_id, it_id), zones in grouped.items()
+    ]
+
+
+@router.get("", response_model=list[InventoryRead] | list[InventoryStockRead])
 async def list_inventory(
+    response: Response,
     warehouse_id: int | None = None,
     location_id: int | None = None,
     item_id: int | None = None,
+    limit: int | None = Query(None, ge=1, le=INVENTORY_PAGE_MAX),
+    cursor: str | None = None,
+    stream: bool = False,
+    as_of: datetime | None = None,
     session: AsyncSession = Depends(get_session),
 ):
-    stmt = select(Inventory)
+    """
+    Inventory rows ordered by (warehouse_id, id).
+
+    With `limit` the page is cut and the cursor of the next page is returned
+    in the X-Next-Cursor header. `stream=true` switches to NDJSON, fetched from
+    the database in chunks so memory stays flat for any result size.
+    `as_of` returns stock reconstructed for that moment from the nearest
+    snapshot plus later movements, ordered by (warehouse_id, location_id,
+    item_id); its pages are keyed on that triple.
+    """
+    if as_of is not None:
+        if stream:
+            raise HTTPException(status_code=400, detail="as_of cannot be combined with stream")
+        after = decode_cursor(cursor, 3) if cursor else None
+        stock = await stock_as_of(
+            session, as_of, warehouse_id=warehouse_id, location_id=location_id, item_id=item_id
+        )
+        keys = sorted(key for key in stock if after is None or key > after)
+        if limit and len(keys) > limit:
+            keys = keys[:limit]
+            set_next_cursor(response, *keys[-1])
+        return [
+            InventoryStockRead(
+                warehouse_id=wh_id,
+                location_id=loc_id,
+                item_id=it_id,
+                quantity=stock[wh_id, loc_id, it_id],
+            )
+            for wh_id, loc_id, it_id in keys
+        ]
+
+    stmt = select(Inventory).order_by(Inventory.warehouse_id, Inventory.id)
 
     if warehouse_id:
         stmt = stmt.where(Inventory.warehouse_id == warehouse_id)
@@ -130,7 +330,28 @@ async def list_inventory(
         stmt = stmt.where(Inventory.location_id == location_id)
     if item_id:
         stmt = stmt.where(Inventory.item_id == item_id)
+    if cursor:
+        after_warehouse_id, after_id = decode_cursor(cursor, 2)
+        # spelled out instead of a row-value comparison: SQLite cannot combine
+        # (a, b) > (?, ?) with warehouse_id = ? and falls back to a full scan
+        stmt = stmt.where(
+            or_(
+                Inventory.warehouse_id > after_warehouse_id,
+                and_(Inventory.warehouse_id == after_warehouse_id, Inventory.id > after_id),
+            )
+        )
 
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    if stream:
+        if limit:
+            stmt = stmt.limit(limit)
+        return StreamingResponse(
+            _stream_inventory_ndjson(session, stmt), media_type="application/x-ndjson"
+        )
 
+    if limit:
+        stmt = stmt.limit(limit + 1)
+    rows = (await session.execute(stmt)).scalars().all()
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, rows[-1].warehouse_id, rows[-1].id)
+    return rows
@@ -3,8 +3,10 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_session
-from app.models.warehouse import Location, Warehouse, Zone
+from app.models.warehouse import Location, Zone
 from app.schemas import LocationCreate, LocationRead, LocationUpdate
+from app.services.inventory import restate_location_availability
+from app.services.ref_cache import reference_cache
 
 router = APIRouter(prefix="/locations", tags=["locations"])
 
@@ -14,7 +16,7 @@ async def create_location(
     payload: LocationCreate,
     session: AsyncSession = Depends(get_session),
 ):
-    warehouse = await session.get(Warehouse, payload.warehouse_id)
+    warehouse = await reference_cache.warehouse(session, payload.warehouse_id)
     if warehouse is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found"
@@ -25,6 +27,9 @@ async def create_location(
         zone_id=payload.zone_id,
         code=payload.code,
         description=payload.description,
+        aisle=payload.aisle,
+        bay=payload.bay,
+        level=payload.level,
     )
 
     session.add(location)
@@ -60,8 +65,10 @@ async def update_location(
     if location is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Location not found")
 
+    previous_zone_id = location.zone_id
+
     if payload.warehouse_id is not None:
-        warehouse = await session.get(Warehouse, payload.warehouse_id)
+        warehouse = await reference_cache.warehouse(session, payload.warehouse_id)
         if warehouse is None:
             raise HTTPException(status_code=404, detail="Warehouse not found")
         location.warehouse_id = payload.warehouse_id
@@ -81,8 +88,23 @@ async def update_location(
         location.description = payload.description
     if payload.is_active is not None:
         location.is_active = payload.is_active
+    if payload.aisle is not None:
+        location.aisle = payload.aisle
+    if payload.bay is not None:
+        location.bay = payload.bay
+    if payload.level is not None:
+        location.level = payload.level
+
+    if location.zone_id != previous_zone_id:
+        # stock on the location now counts under another zone type
+        previous_zone_type = None
+        if previous_zone_id is not None:
+            previous_zone_type = (await session.get(Zone, previous_zone_id)).zone_type.value
+        await session.flush()
+        await restate_location_availability(session, [location_id], previous_zone_type)
 
     await session.commit()
+    reference_cache.invalidate_location(location_id)
     await session.refresh(location)
     return location
 
@@ -95,5 +117,6 @@ async def delete_location(location_id: int, session: AsyncSession = Depends(get_
 
     location.is_active = False
     await session.commit()
+    reference_cache.invalidate_location(location_id)
     return {"status": "deleted"}
 
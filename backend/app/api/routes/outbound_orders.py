@@ -8,10 +8,11 @@ from app.models import (
     OutboundOrder,
     OutboundOrderLine,
     OutboundStatus,
-    Warehouse,
     Partner,
     Item,
 )
+from app.services.allocation import cancel_order_tasks
+from app.services.ref_cache import reference_cache
 from app.schemas import (
     OutboundOrderCreate,
     OutboundOrderRead,
@@ -37,7 +38,7 @@ async def _get_outbound_with_lines(
 async def create_outbound_order(
     payload: OutboundOrderCreate, session: AsyncSession = Depends(get_session)
 ):
-    warehouse = await session.get(Warehouse, payload.warehouse_id)
+    warehouse = await reference_cache.warehouse(session, payload.warehouse_id)
     if warehouse is None:
         raise HTTPException(status_code=404, detail="Warehouse not found")
 
@@ -138,6 +139,8 @@ async def update_outbound_status(
     if payload.status not in allowed:
         raise HTTPException(status_code=400, detail="Invalid status transition")
 
+    if payload.status == OutboundStatus.cancelled:
+        await cancel_order_tasks(session, order)
     order.status = payload.status
     await session.commit()
     await session.refresh(order)
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+import asyncio
+import contextlib
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import case, delete, func, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.api.idempotency import IdempotentRoute
+from app.api.pagination import decode_cursor, set_next_cursor
+from app.core.config import settings
 from app.db.session import get_session
 from app.models import (
     Inventory,
@@ -15,11 +22,43 @@ from app.models import (
     PickingTaskLine,
 )
 from app.schemas import (
+    PATH_STRATEGY_DESCRIPTION,
+    AllocationStrategy,
+    PathStrategy,
+    PickingBatchResult,
+    PickingLineCompleted,
+    PickingLineResult,
+    PickingSimulationCreate,
+    PickingSimulationResult,
+    PickingSimulationSku,
+    PickingTaskClaim,
     PickingTaskRead,
     PickingTaskCompleteLine,
+    PickingTaskLineRead,
+    PickingTaskSummaryRead,
+    PickingWaveCreate,
+    PickingWaveLocation,
+    PickingWavePick,
+    PickingWaveResult,
+    PickingWaveSkipped,
+)
+from app.services.allocation import Allocation, allocate_wave, reserve_order_lines
+from app.services.inventory import (
+    decrement_inventory_rows,
+    lock_inventory_rows,
+    record_stock_changes,
 )
+from app.services.pick_path import location_ranks
+from app.services.ref_cache import reference_cache
+from app.services.retry import retry_on_conflict
+from app.services.simulation import load_backlog, load_stock, simulate, sku_codes
+
+router = APIRouter(prefix="/picking_tasks", tags=["picking_tasks"], route_class=IdempotentRoute)
 
-router = APIRouter(prefix="/picking_tasks", tags=["picking_tasks"])
+PICKING_PAGE_MAX = 1000
+
+# serialises claims on dialects without SKIP LOCKED (SQLite); per process only
+_claim_lock = asyncio.Lock()
 
 
 async def _get_task_with_lines(
@@ -30,13 +69,56 @@ async def _get_task_with_lines(
     )
 
 
+async def _allocation_strategy(
+    session: AsyncSession, warehouse_id: int, requested: str | None
+) -> str:
+    """The request's strategy, else the warehouse's, else ALLOCATION_STRATEGY."""
+    if requested:
+        return requested
+    warehouse = await reference_cache.warehouse(session, warehouse_id)
+    if warehouse is not None and warehouse.allocation_strategy:
+        return warehouse.allocation_strategy
+    return settings.allocation_strategy
+
+
+async def _pick_path_ranks(
+    session: AsyncSession, allocations: list[Allocation], strategy: str | None
+) -> dict[int, int] | None:
+    """Walk position per location, or None when sequencing is off."""
+    strategy = strategy or settings.pick_path_strategy
+    if strategy == "none":
+        return None
+    return await location_ranks(session, {a.location_id for a in allocations}, strategy)
+
+
+async def _insert_task_lines(
+    session: AsyncSession, task: PickingTask, allocations: list[Allocation]
+) -> None:
+    await session.execute(
+        insert(PickingTaskLine),
+        [
+            {
+                "picking_task_id": task.id,
+                "item_id": allocation.item_id,
+                "from_location_id": allocation.location_id,
+                "qty_to_pick": allocation.qty,
+                "qty_picked": 0,
+            }
+            for allocation in allocations
+        ],
+    )
+
+
 @router.post(
     "/generate",
     response_model=PickingTaskRead,
     status_code=status.HTTP_201_CREATED,
 )
 async def generate_picking_task(
-    outbound_order_id: int, session: AsyncSession = Depends(get_session)
+    outbound_order_id: int,
+    path_strategy: PathStrategy | None = Query(None, description=PATH_STRATEGY_DESCRIPTION),
+    allocation_strategy: AllocationStrategy | None = None,
+    session: AsyncSession = Depends(get_session),
 ):
     order = await session.get(
         OutboundOrder,
@@ -49,69 +131,357 @@ async def generate_picking_task(
     if not order.lines:
         raise HTTPException(status_code=400, detail="Outbound order has no lines")
 
-    task_lines: list[PickingTaskLine] = []
+    strategy = await _allocation_strategy(session, order.warehouse_id, allocation_strategy)
+    allocations = await reserve_order_lines(session, order.warehouse_id, order.lines, strategy)
+    if not allocations:
+        raise HTTPException(status_code=400, detail="No items to pick")
+    ranks = await _pick_path_ranks(session, allocations, path_strategy)
+    if ranks is not None:
+        allocations.sort(key=lambda a: ranks[a.location_id])
+
+    task = PickingTask(
+        warehouse_id=order.warehouse_id,
+        outbound_order_id=order.id,
+        status=PickingStatus.new,
+    )
+    session.add(task)
+    await session.flush()
+    await _insert_task_lines(session, task, allocations)
+
+    if order.status == OutboundStatus.draft:
+        order.status = OutboundStatus.picking
+
+    await session.commit()
+    await session.refresh(task)
+    await session.refresh(task, attribute_names=["lines"])
+    return task
+
+
+@router.post(
+    "/generate_wave",
+    response_model=PickingWaveResult,
+    status_code=status.HTTP_201_CREATED,
+)
+async def generate_picking_wave(
+    payload: PickingWaveCreate, session: AsyncSession = Depends(get_session)
+):
+    """
+    Generate picking tasks for a wave of outbound orders in one transaction.
+
+    Orders are allocated in (created_at, id) order against a single read of
+    the wave's unreserved stock and their picks are reserved; an order is
+    either fully allocated or skipped. The
+    response also lists every bin of the wave once, with all picks from it.
+    """
+    stmt = (
+        select(OutboundOrder)
+        .options(selectinload(OutboundOrder.lines))
+        .order_by(OutboundOrder.created_at, OutboundOrder.id)
+    )
+    if payload.outbound_order_ids is not None:
+        stmt = stmt.where(OutboundOrder.id.in_(payload.outbound_order_ids))
+    else:
+        stmt = stmt.where(
+            OutboundOrder.warehouse_id == payload.warehouse_id,
+            OutboundOrder.status == payload.status,
+        )
+        if payload.partner_id is not None:
+            stmt = stmt.where(OutboundOrder.partner_id == payload.partner_id)
+        stmt = stmt.limit(payload.limit)
+    orders = (await session.execute(stmt)).scalars().all()
+
+    if payload.outbound_order_ids is not None:
+        missing = set(payload.outbound_order_ids) - {order.id for order in orders}
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Outbound orders not found: {', '.join(map(str, sorted(missing)))}",
+            )
+    if not orders:
+        raise HTTPException(status_code=400, detail="No outbound orders in wave")
+
+    skipped = [
+        PickingWaveSkipped(
+            outbound_order_id=order.id, reason=f"Order status is {order.status.value}"
+        )
+        for order in orders
+        if order.status != OutboundStatus.draft
+    ]
+    orders = [order for order in orders if order.status == OutboundStatus.draft]
+
+    strategies = {
+        warehouse_id: await _allocation_strategy(
+            session, warehouse_id, payload.allocation_strategy
+        )
+        for warehouse_id in {order.warehouse_id for order in orders}
+    }
+    allocated, not_allocated = await allocate_wave(session, orders, strategies)
+    skipped.extend(
+        PickingWaveSkipped(outbound_order_id=order_id, reason=reason)
+        for order_id, reason in not_allocated.items()
+    )
 
-    for line in order.lines:
-        qty_needed = line.ordered_qty - line.picked_qty
-        if qty_needed <= 0:
+    ranks = await _pick_path_ranks(
+        session,
+        [a for allocations in allocated.values() for a in allocations],
+        payload.path_strategy,
+    )
+
+    def walk_position(location_id: int) -> int:
+        return ranks[location_id] if ranks is not None else location_id
+
+    task_ids: list[int] = []
+    for order in orders:
+        allocations = allocated.get(order.id)
+        if allocations is None:
             continue
+        task = PickingTask(
+            warehouse_id=order.warehouse_id,
+            outbound_order_id=order.id,
+            status=PickingStatus.new,
+        )
+        session.add(task)
+        await session.flush()
+        # walk order inside each task, matching the wave's pick list
+        await _insert_task_lines(
+            session,
+            task,
+            sorted(allocations, key=lambda a: (walk_position(a.location_id), a.item_id)),
+        )
+        order.status = OutboundStatus.picking
+        task_ids.append(task.id)
 
-        inventory_rows = (
+    await session.commit()
+
+    tasks: list[PickingTask] = []
+    if task_ids:
+        tasks = (
             await session.execute(
-                select(Inventory).where(
-                    Inventory.warehouse_id == order.warehouse_id,
-                    Inventory.item_id == line.item_id,
-                    Inventory.quantity > 0,
-                )
+                select(PickingTask)
+                .where(PickingTask.id.in_(task_ids))
+                .options(selectinload(PickingTask.lines))
+                .order_by(PickingTask.id)
+                .execution_options(populate_existing=True)
             )
         ).scalars().all()
 
-        for inv in inventory_rows:
-            take = min(qty_needed, inv.quantity)
-            task_lines.append(
-                PickingTaskLine(
+    by_location: dict[int, list[PickingWavePick]] = {}
+    for task in tasks:
+        for line in task.lines:
+            by_location.setdefault(line.from_location_id, []).append(
+                PickingWavePick(
+                    task_id=task.id,
+                    line_id=line.id,
+                    outbound_order_id=task.outbound_order_id,
                     item_id=line.item_id,
-                    from_location_id=inv.location_id,
-                    qty_to_pick=take,
-                    qty_picked=0,
+                    qty_to_pick=line.qty_to_pick,
                 )
             )
-            qty_needed -= take
-            if qty_needed <= 0:
-                break
 
-        if qty_needed > 0:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Not enough inventory to pick item {line.item_id}",
+    return PickingWaveResult(
+        tasks=tasks,
+        locations=[
+            PickingWaveLocation(
+                location_id=location_id,
+                total_qty=sum(pick.qty_to_pick for pick in picks),
+                picks=picks,
+            )
+            for location_id, picks in sorted(
+                by_location.items(), key=lambda entry: walk_position(entry[0])
             )
+        ],
+        skipped=sorted(skipped, key=lambda s: s.outbound_order_id),
+    )
 
-    if not task_lines:
-        raise HTTPException(status_code=400, detail="No items to pick")
 
-    task = PickingTask(
-        warehouse_id=order.warehouse_id,
-        outbound_order_id=order.id,
-        status=PickingStatus.new,
-        lines=task_lines,
+def _rate(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 1.0
+
+
+@router.post("/simulate", response_model=PickingSimulationResult)
+async def simulate_picking(
+    payload: PickingSimulationCreate, session: AsyncSession = Depends(get_session)
+):
+    """
+    Dry run of allocation over a backlog of outbound orders; nothing is written.
+
+    Candidate orders are taken in (created_at, id) order and filled like
+    generate_wave does: from unreserved stock, with the warehouse's or the
+    requested allocation strategy, each order fully or not at all. Returns
+    order and unit fill rates and, per SKU, what could not be covered.
+    """
+    started = time.perf_counter()
+    if session.get_bind().dialect.name == "postgresql":
+        # orders and stock are read from one snapshot
+        await session.connection(
+            execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+        )
+    try:
+        backlog = await load_backlog(
+            session, payload.warehouse_id, payload.status, payload.partner_id, payload.limit
+        )
+        stock = await load_stock(
+            session, {(wh, item_id) for _, wh, lines in backlog for item_id, _ in lines}
+        )
+        strategies = {
+            warehouse_id: await _allocation_strategy(
+                session, warehouse_id, payload.allocation_strategy
+            )
+            for warehouse_id in {wh for _, wh, _ in backlog}
+        }
+        outcome = simulate(stock, backlog, strategies)
+        codes = await sku_codes(session, set(outcome.skus))
+    finally:
+        await session.rollback()
+
+    skus = sorted(outcome.skus.values(), key=lambda s: (-s.short_qty, s.item_id))
+    return PickingSimulationResult(
+        orders_total=outcome.orders_total,
+        orders_allocatable=outcome.orders_allocatable,
+        order_fill_rate=_rate(outcome.orders_allocatable, outcome.orders_total),
+        units_requested=outcome.units_requested,
+        units_allocatable=outcome.units_allocatable,
+        unit_fill_rate=_rate(outcome.units_allocatable, outcome.units_requested),
+        skus=[
+            PickingSimulationSku(
+                item_id=s.item_id,
+                sku=codes.get(s.item_id),
+                requested_qty=s.requested_qty,
+                allocatable_qty=s.allocatable_qty,
+                short_qty=s.short_qty,
+                orders_short=s.orders_short,
+                fill_rate=_rate(s.allocatable_qty, s.requested_qty),
+            )
+            for s in skus
+        ],
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
     )
 
-    if order.status == OutboundStatus.draft:
-        order.status = OutboundStatus.picking
 
-    session.add(task)
-    await session.commit()
-    await session.refresh(task)
-    await session.refresh(task, attribute_names=["lines"])
-    return task
+@router.get("", response_model=list[PickingTaskRead] | list[PickingTaskSummaryRead])
+async def list_picking_tasks(
+    response: Response,
+    warehouse_id: int | None = None,
+    status: list[PickingStatus] | None = Query(None),
+    outbound_order_id: int | None = None,
+    assignee: str | None = None,
+    limit: int | None = Query(None, ge=1, le=PICKING_PAGE_MAX),
+    cursor: str | None = None,
+    include_lines: bool = True,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Picking tasks ordered by id.
+
+    `status` may be repeated (`?status=new&status=in_progress`). With `limit`
+    the page is cut and the cursor of the next page is returned in the
+    X-Next-Cursor header. `include_lines=false` returns tasks without lines,
+    with line count and quantity totals aggregated in SQL.
+    """
+    filters = []
+    if warehouse_id:
+        filters.append(PickingTask.warehouse_id == warehouse_id)
+    if status:
+        filters.append(PickingTask.status.in_(status))
+    if outbound_order_id:
+        filters.append(PickingTask.outbound_order_id == outbound_order_id)
+    if assignee:
+        filters.append(PickingTask.assignee == assignee)
+    if cursor:
+        (after_id,) = decode_cursor(cursor, 1)
+        filters.append(PickingTask.id > after_id)
+
+    if include_lines:
+        stmt = select(PickingTask).options(selectinload(PickingTask.lines))
+    else:
+        qty_to_pick = func.coalesce(func.sum(PickingTaskLine.qty_to_pick), 0)
+        qty_picked = func.coalesce(func.sum(PickingTaskLine.qty_picked), 0)
+        stmt = (
+            select(
+                PickingTask.id,
+                PickingTask.warehouse_id,
+                PickingTask.outbound_order_id,
+                PickingTask.status,
+                PickingTask.priority,
+                PickingTask.assignee,
+                PickingTask.claimed_at,
+                PickingTask.created_at,
+                PickingTask.updated_at,
+                func.count(PickingTaskLine.id).label("lines_count"),
+                qty_to_pick.label("qty_to_pick"),
+                qty_picked.label("qty_picked"),
+                (qty_to_pick - qty_picked).label("qty_remaining"),
+            )
+            .outerjoin(PickingTaskLine, PickingTaskLine.picking_task_id == PickingTask.id)
+            .group_by(PickingTask.id)
+        )
+    stmt = stmt.where(*filters).order_by(PickingTask.id)
+    if limit:
+        stmt = stmt.limit(limit + 1)
+
+    result = await session.execute(stmt)
+    if include_lines:
+        rows = result.scalars().all()
+    else:
+        rows = [PickingTaskSummaryRead.model_validate(row._mapping) for row in result]
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, rows[-1].id)
+    return rows
+
 
+@router.post(
+    "/claim",
+    response_model=PickingTaskRead,
+    responses={204: {"description": "No new tasks in the warehouse"}},
+)
+async def claim_picking_task(
+    payload: PickingTaskClaim, session: AsyncSession = Depends(get_session)
+):
+    """
+    Assign the next new task of a warehouse to the caller and start it.
+
+    Tasks are taken by priority (highest first), then created_at. One UPDATE
+    claims the task; on PostgreSQL its sub-select skips rows locked by
+    concurrent claims (FOR UPDATE SKIP LOCKED), so pickers never wait on each
+    other or get the same task.
+    """
+    next_task = (
+        select(PickingTask.id)
+        .where(
+            PickingTask.warehouse_id == payload.warehouse_id,
+            PickingTask.status == PickingStatus.new,
+        )
+        .order_by(PickingTask.priority.desc(), PickingTask.created_at, PickingTask.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(PickingTask)
+        .where(PickingTask.id == next_task, PickingTask.status == PickingStatus.new)
+        .values(
+            status=PickingStatus.in_progress,
+            assignee=payload.assignee,
+            claimed_at=func.now(),
+        )
+        .returning(PickingTask.id)
+        .execution_options(synchronize_session=False)
+    )
+    skip_locked = session.get_bind().dialect.name == "postgresql"
+    async with contextlib.nullcontext() if skip_locked else _claim_lock:
+        task_id = (await session.execute(stmt)).scalar_one_or_none()
+        await session.commit()
 
-@router.get("", response_model=list[PickingTaskRead])
-async def list_picking_tasks(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(
-        select(PickingTask).options(selectinload(PickingTask.lines))
+    if task_id is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    task = await session.get(
+        PickingTask,
+        task_id,
+        options=[selectinload(PickingTask.lines)],
+        populate_existing=True,
     )
-    return result.scalars().all()
+    return task
 
 
 @router.get("/{task_id}", response_model=PickingTaskRead)
@@ -122,79 +492,316 @@ async def get_picking_task(task_id: int, session: AsyncSession = Depends(get_ses
     return task
 
 
+async def _line_update_error(
+    session: AsyncSession, task_id: int, line_id: int
+) -> HTTPException:
+    """Why the guarded UPDATE of a picking line matched nothing."""
+    task_status = await session.scalar(
+        select(PickingTask.status).where(PickingTask.id == task_id)
+    )
+    if task_status is None:
+        return HTTPException(status_code=404, detail="Picking task not found")
+    if task_status == PickingStatus.cancelled:
+        return HTTPException(status_code=400, detail="Picking task is cancelled")
+    line_exists = await session.scalar(
+        select(PickingTaskLine.id).where(
+            PickingTaskLine.id == line_id, PickingTaskLine.picking_task_id == task_id
+        )
+    )
+    if line_exists is None:
+        return HTTPException(status_code=404, detail="Picking line not found")
+    return HTTPException(status_code=400, detail="Picked quantity exceeds required amount")
+
+
+async def _apply_picked_line(
+    session: AsyncSession, task_id: int, payload: PickingTaskCompleteLine
+) -> tuple[PickingTaskLineRead, PickingStatus]:
+    """
+    Record one pick with targeted UPDATE ... RETURNING statements.
+
+    Every over-pick guard sits in a WHERE clause, so concurrent picks of the
+    same line or bin cannot overshoot; on a miss the transaction is rolled
+    back and the reason looked up.
+    """
+    qty = payload.qty_picked
+    line_row = (
+        await session.execute(
+            update(PickingTaskLine)
+            .where(
+                PickingTaskLine.id == payload.line_id,
+                PickingTaskLine.picking_task_id == task_id,
+                PickingTaskLine.qty_picked + qty <= PickingTaskLine.qty_to_pick,
+                select(PickingTask.id)
+                .where(
+                    PickingTask.id == task_id,
+                    PickingTask.status != PickingStatus.cancelled,
+                )
+                .exists(),
+            )
+            .values(qty_picked=PickingTaskLine.qty_picked + qty)
+            .returning(
+                PickingTaskLine.id,
+                PickingTaskLine.picking_task_id,
+                PickingTaskLine.item_id,
+                PickingTaskLine.from_location_id,
+                PickingTaskLine.qty_to_pick,
+                PickingTaskLine.qty_picked,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    ).one_or_none()
+    if line_row is None:
+        await session.rollback()
+        raise await _line_update_error(session, task_id, payload.line_id)
+    line = PickingTaskLineRead.model_validate(line_row._mapping)
+
+    status_type = PickingTask.status.type
+    open_lines = (
+        select(PickingTaskLine.id)
+        .where(
+            PickingTaskLine.picking_task_id == task_id,
+            PickingTaskLine.qty_picked < PickingTaskLine.qty_to_pick,
+        )
+        .exists()
+    )
+    task_row = (
+        await session.execute(
+            update(PickingTask)
+            .where(PickingTask.id == task_id)
+            .values(
+                status=case(
+                    (open_lines, literal(PickingStatus.in_progress, status_type)),
+                    else_=literal(PickingStatus.done, status_type),
+                )
+            )
+            .returning(PickingTask.warehouse_id, PickingTask.outbound_order_id, PickingTask.status)
+            .execution_options(synchronize_session=False)
+        )
+    ).one()
+
+    # the task reserved these units when it was generated
+    inv_row = (
+        await session.execute(
+            update(Inventory)
+            .where(
+                Inventory.warehouse_id == task_row.warehouse_id,
+                Inventory.location_id == line.from_location_id,
+                Inventory.item_id == line.item_id,
+                Inventory.quantity >= qty,
+            )
+            .values(
+                quantity=Inventory.quantity - qty,
+                reserved_qty=case(
+                    (Inventory.reserved_qty > qty, Inventory.reserved_qty - qty), else_=0
+                ),
+                version=Inventory.version + 1,
+            )
+            .returning(Inventory.id, Inventory.quantity)
+            .execution_options(synchronize_session=False)
+        )
+    ).one_or_none()
+    if inv_row is None:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Not enough inventory at source location")
+    if inv_row.quantity == 0:
+        await session.execute(
+            delete(Inventory).where(Inventory.id == inv_row.id, Inventory.quantity == 0)
+        )
+    await record_stock_changes(
+        session, [(task_row.warehouse_id, line.from_location_id, line.item_id, -qty)]
+    )
+
+    target_line = (
+        select(OutboundOrderLine.id)
+        .where(
+            OutboundOrderLine.outbound_order_id == task_row.outbound_order_id,
+            OutboundOrderLine.item_id == line.item_id,
+        )
+        .order_by(OutboundOrderLine.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    updated = (
+        await session.execute(
+            update(OutboundOrderLine)
+            .where(
+                OutboundOrderLine.id == target_line,
+                OutboundOrderLine.picked_qty + qty <= OutboundOrderLine.ordered_qty,
+            )
+            .values(
+                picked_qty=OutboundOrderLine.picked_qty + qty,
+                version=OutboundOrderLine.version + 1,
+            )
+            .returning(OutboundOrderLine.id)
+            .execution_options(synchronize_session=False)
+        )
+    ).one_or_none()
+    if updated is None and await session.scalar(select(target_line)) is not None:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Picked quantity exceeds ordered")
+
+    session.add(
+        Movement(
+            warehouse_id=task_row.warehouse_id,
+            item_id=line.item_id,
+            from_location_id=line.from_location_id,
+            to_location_id=None,
+            quantity=qty,
+        )
+    )
+    await session.commit()
+    return line, task_row.status
+
+
 @router.post(
     "/{task_id}/complete_line",
-    response_model=PickingTaskRead,
+    response_model=PickingLineCompleted | PickingTaskRead,
     status_code=status.HTTP_200_OK,
 )
 async def complete_picking_line(
     task_id: int,
     payload: PickingTaskCompleteLine,
+    full: bool = False,
     session: AsyncSession = Depends(get_session),
 ):
+    """
+    Confirm a pick. Returns the changed line and the task status, or the
+    whole task with `full=true`.
+    """
+    line, task_status = await _apply_picked_line(session, task_id, payload)
+    if full:
+        return await session.get(
+            PickingTask,
+            task_id,
+            options=[selectinload(PickingTask.lines)],
+            populate_existing=True,
+        )
+    return PickingLineCompleted(task_id=task_id, status=task_status, line=line)
+
+
+@retry_on_conflict()
+async def _apply_picked_lines(
+    session: AsyncSession, task_id: int, payload: list[PickingTaskCompleteLine]
+) -> tuple[PickingTask, dict[int, int]]:
     task = await _get_task_with_lines(session, task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Picking task not found")
+    if task.status == PickingStatus.cancelled:
+        raise HTTPException(status_code=400, detail="Picking task is cancelled")
 
-    line = next((ln for ln in task.lines if ln.id == payload.line_id), None)
-    if line is None:
-        raise HTTPException(status_code=404, detail="Picking line not found")
-
-    remaining = line.qty_to_pick - line.qty_picked
-    if payload.qty_picked > remaining:
-        raise HTTPException(
-            status_code=400, detail="Picked quantity exceeds required amount"
-        )
-
-    inv = (
-        await session.execute(
-            select(Inventory).where(
-                Inventory.warehouse_id == task.warehouse_id,
-                Inventory.location_id == line.from_location_id,
-                Inventory.item_id == line.item_id,
+    lines = {ln.id: ln for ln in task.lines}
+    picked: dict[int, int] = {}
+    for entry in payload:
+        if entry.line_id not in lines:
+            raise HTTPException(
+                status_code=404, detail=f"Picking line {entry.line_id} not found"
             )
-        )
-    ).scalar_one_or_none()
-    if inv is None or inv.quantity < payload.qty_picked:
-        raise HTTPException(
-            status_code=400, detail="Not enough inventory at source location"
-        )
+        picked[entry.line_id] = picked.get(entry.line_id, 0) + entry.qty_picked
 
-    inv.quantity -= payload.qty_picked
-    line.qty_picked += payload.qty_picked
+    takes: dict[tuple[int, int, int], int] = {}
+    for line_id, qty in picked.items():
+        line = lines[line_id]
+        if qty > line.qty_to_pick - line.qty_picked:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Picked quantity exceeds required amount for line {line_id}",
+            )
+        key = (task.warehouse_id, line.from_location_id, line.item_id)
+        takes[key] = takes.get(key, 0) + qty
 
-    order = await session.get(
-        OutboundOrder,
-        task.outbound_order_id,
-        options=[selectinload(OutboundOrder.lines)],
+    # one locked read for every (location, item) of the batch
+    locked = await lock_inventory_rows(session, set(takes))
+    for key, qty in takes.items():
+        inv = locked.get(key)
+        if inv is None or inv.quantity < qty:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Not enough inventory at source location {key[1]} for item {key[2]}",
+            )
+    # the task reserved these units when it was generated
+    await decrement_inventory_rows(
+        session, [(locked[key], qty, qty) for key, qty in takes.items()]
     )
-    if order:
-        target_line = next(
-            (ln for ln in order.lines if ln.item_id == line.item_id), None
+    for line_id, qty in picked.items():
+        lines[line_id].qty_picked += qty
+
+    by_item: dict[int, int] = {}
+    for line_id, qty in picked.items():
+        by_item[lines[line_id].item_id] = by_item.get(lines[line_id].item_id, 0) + qty
+    order_lines = (
+        await session.execute(
+            select(OutboundOrderLine).where(
+                OutboundOrderLine.outbound_order_id == task.outbound_order_id,
+                OutboundOrderLine.item_id.in_(by_item),
+            )
         )
+    ).scalars().all()
+    for item_id, qty in by_item.items():
+        target_line = next((ln for ln in order_lines if ln.item_id == item_id), None)
         if target_line:
-            if target_line.picked_qty + payload.qty_picked > target_line.ordered_qty:
+            if target_line.picked_qty + qty > target_line.ordered_qty:
                 raise HTTPException(
                     status_code=400, detail="Picked quantity exceeds ordered"
                 )
-            target_line.picked_qty += payload.qty_picked
+            target_line.picked_qty += qty
 
-    movement = Movement(
-        warehouse_id=task.warehouse_id,
-        item_id=line.item_id,
-        from_location_id=line.from_location_id,
-        to_location_id=None,
-        quantity=payload.qty_picked,
+    # one movement per confirmation, as if they had been sent one by one
+    await session.execute(
+        insert(Movement),
+        [
+            {
+                "warehouse_id": task.warehouse_id,
+                "item_id": lines[entry.line_id].item_id,
+                "from_location_id": lines[entry.line_id].from_location_id,
+                "to_location_id": None,
+                "quantity": entry.qty_picked,
+            }
+            for entry in payload
+        ],
     )
-    session.add(movement)
 
-    # обновление статуса задачи
     if all(ln.qty_picked >= ln.qty_to_pick for ln in task.lines):
         task.status = PickingStatus.done
     else:
         task.status = PickingStatus.in_progress
 
     await session.commit()
-    await session.refresh(task)
-    await session.refresh(task, attribute_names=["lines"])
-    return task
+    return task, picked
+
+
+@router.post(
+    "/{task_id}/complete_lines",
+    response_model=PickingBatchResult,
+    status_code=status.HTTP_200_OK,
+)
+async def complete_picking_lines(
+    task_id: int,
+    payload: list[PickingTaskCompleteLine],
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Apply buffered scanner confirmations in one transaction.
+
+    Confirmations of the same line are summed; the batch is applied as a
+    whole or not at all.
+    """
+    if not payload:
+        raise HTTPException(status_code=400, detail="No lines to complete")
+
+    started = time.perf_counter()
+    task, picked = await _apply_picked_lines(session, task_id, payload)
+    lines = {ln.id: ln for ln in task.lines}
+    return PickingBatchResult(
+        task_id=task.id,
+        status=task.status,
+        lines=[
+            PickingLineResult(
+                line_id=line_id,
+                item_id=lines[line_id].item_id,
+                qty_picked=qty,
+                qty_remaining=lines[line_id].qty_to_pick - lines[line_id].qty_picked,
+            )
+            for line_id, qty in picked.items()
+        ],
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
@@ -5,12 +5,25 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_session
 from app.models import Inventory, Movement
+from app.services.snapshots import stock_as_of
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 
 @router.get("/inventory_summary")
-async def inventory_summary(session: AsyncSession = Depends(get_session)):
+async def inventory_summary(
+    as_of: datetime | None = None,
+    session: AsyncSession = Depends(get_session),
+):
+    if as_of is not None:
+        totals: dict[tuple[int, int], int] = {}
+        for (wh_id, _, it_id), qty in (await stock_as_of(session, as_of)).items():
+            totals[(wh_id, it_id)] = totals.get((wh_id, it_id), 0) + qty
+        return [
+            {"warehouse_id": wh_id, "item_id": it_id, "quantity": qty}
+            for (wh_id, it_id), qty in sorted(totals.items())
+        ]
+
     stmt = (
         select(
             Inventory.warehouse_id,
@@ -2,13 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.idempotency import IdempotentRoute
 from app.db.session import get_session
 from app.models import (
     Tare,
     TareItem,
     TareStatus,
     TareType,
-    Warehouse,
     Location,
     Item,
     Zone,
@@ -25,9 +25,11 @@ from app.schemas import (
     TareMoveRequest,
 )
 from app.services.tare_code import generate_tare_code
+from app.services.ref_cache import reference_cache
+from app.services.retry import retry_on_conflict
 from app.services.tare_move import move_tare
 
-router = APIRouter(prefix="/tares", tags=["tares"])
+router = APIRouter(prefix="/tares", tags=["tares"], route_class=IdempotentRoute)
 
 
 @router.get("/types", response_model=list[TareTypeRead])
@@ -187,21 +189,43 @@ async def list_tare_items(tare_id: int, session: AsyncSession = Depends(get_sess
     ]
 
 
+@retry_on_conflict()
+async def _move_tare_and_commit(
+    session: AsyncSession,
+    tare_id: int,
+    target_location_id: int,
+    *,
+    allowed_from_zone_types: list[str],
+    allowed_to_zone_types: list[str],
+    new_status: TareStatus | None = None,
+) -> Tare:
+    tare = await move_tare(
+        session,
+        tare_id,
+        target_location_id,
+        allowed_from_zone_types=allowed_from_zone_types,
+        allowed_to_zone_types=allowed_to_zone_types,
+    )
+    if new_status is not None:
+        tare.status = new_status
+    await session.commit()
+    return tare
+
+
 @router.post("/{tare_id}/putaway", response_model=TareRead)
 async def putaway_tare(
     tare_id: int,
     payload: TareMoveRequest,
     session: AsyncSession = Depends(get_session),
 ):
-    tare = await move_tare(
+    tare = await _move_tare_and_commit(
         session,
         tare_id,
         payload.target_location_id,
         allowed_from_zone_types=["inbound"],
         allowed_to_zone_types=["storage"],
+        new_status=TareStatus.storage,
     )
-    tare.status = TareStatus.storage
-    await session.commit()
     await session.refresh(tare)
     return tare
 
@@ -212,21 +236,20 @@ async def move_tare_between_locations(
     payload: TareMoveRequest,
     session: AsyncSession = Depends(get_session),
 ):
-    tare = await move_tare(
+    tare = await _move_tare_and_commit(
         session,
         tare_id,
         payload.target_location_id,
         allowed_from_zone_types=["storage"],
         allowed_to_zone_types=["storage"],
     )
-    await session.commit()
     await session.refresh(tare)
     return tare
 
 
 @router.post("", response_model=TareRead, status_code=status.HTTP_201_CREATED)
 async def create_tare(payload: TareCreate, session: AsyncSession = Depends(get_session)):
-    warehouse = await session.get(Warehouse, payload.warehouse_id)
+    warehouse = await reference_cache.warehouse(session, payload.warehouse_id)
     if warehouse is None:
         raise HTTPException(status_code=404, detail="Warehouse not found")
 
@@ -235,7 +258,7 @@ async def create_tare(payload: TareCreate, session: AsyncSession = Depends(get_s
         raise HTTPException(status_code=404, detail="Tare type not found")
 
     if payload.location_id:
-        location = await session.get(Location, payload.location_id)
+        location = await reference_cache.location(session, payload.location_id)
         if location is None or location.warehouse_id != payload.warehouse_id:
             raise HTTPException(status_code=400, detail="Location not in warehouse")
 
@@ -264,14 +287,14 @@ async def create_tare(payload: TareCreate, session: AsyncSession = Depends(get_s
 async def create_tares_bulk(
     payload: TareBulkCreate, session: AsyncSession = Depends(get_session)
 ):
-    warehouse = await session.get(Warehouse, payload.warehouse_id)
+    warehouse = await reference_cache.warehouse(session, payload.warehouse_id)
     if warehouse is None:
         raise HTTPException(status_code=404, detail="Warehouse not found")
     tare_type = await session.get(TareType, payload.type_id)
     if tare_type is None:
         raise HTTPException(status_code=404, detail="Tare type not found")
     if payload.location_id:
-        location = await session.get(Location, payload.location_id)
+        location = await reference_cache.location(session, payload.location_id)
         if location is None or location.warehouse_id != payload.warehouse_id:
             raise HTTPException(status_code=400, detail="Location not in warehouse")
     count = payload.count if payload.count and payload.count > 0 else 1
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_session
 from app.models.warehouse import Warehouse
 from app.schemas import WarehouseCreate, WarehouseRead, WarehouseUpdate
+from app.services.ref_cache import reference_cache
 
 router = APIRouter(prefix="/warehouses", tags=["warehouses"])
 
@@ -23,7 +24,11 @@ async def create_warehouse(
             detail=f"Warehouse with code '{payload.code}' already exists",
         )
 
-    warehouse = Warehouse(name=payload.name, code=payload.code)
+    warehouse = Warehouse(
+        name=payload.name,
+        code=payload.code,
+        allocation_strategy=payload.allocation_strategy,
+    )
     session.add(warehouse)
     await session.commit()
     await session.refresh(warehouse)
@@ -62,8 +67,11 @@ async def update_warehouse(
         warehouse.code = payload.code
     if payload.is_active is not None:
         warehouse.is_active = payload.is_active
+    if "allocation_strategy" in payload.model_fields_set:
+        warehouse.allocation_strategy = payload.allocation_strategy
 
     await session.commit()
+    reference_cache.invalidate_warehouse(warehouse_id)
     await session.refresh(warehouse)
     return warehouse
 
@@ -78,5 +86,6 @@ async def delete_warehouse(
 
     await session.delete(warehouse)
     await session.commit()
+    reference_cache.invalidate_warehouse(warehouse_id)
     return {"status": "deleted"}
 
@@ -3,18 +3,25 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_session
-from app.models.warehouse import Warehouse, Zone, ZoneType
+from app.models.warehouse import Location, Zone, ZoneType
 from app.schemas import ZoneCreate, ZoneRead, ZoneUpdate
+from app.services.inventory import restate_location_availability
+from app.services.ref_cache import reference_cache
 
 router = APIRouter(prefix="/zones", tags=["zones"])
 
 
+async def _zone_location_ids(session: AsyncSession, zone_id: int) -> list[int]:
+    result = await session.execute(select(Location.id).where(Location.zone_id == zone_id))
+    return list(result.scalars())
+
+
 @router.post("", response_model=ZoneRead, status_code=status.HTTP_201_CREATED)
 async def create_zone(
     payload: ZoneCreate,
     session: AsyncSession = Depends(get_session),
 ):
-    warehouse = await session.get(Warehouse, payload.warehouse_id)
+    warehouse = await reference_cache.warehouse(session, payload.warehouse_id)
     if warehouse is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found"
@@ -54,7 +61,7 @@ async def update_zone(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Zone not found")
 
     if payload.warehouse_id is not None:
-        warehouse = await session.get(Warehouse, payload.warehouse_id)
+        warehouse = await reference_cache.warehouse(session, payload.warehouse_id)
         if warehouse is None:
             raise HTTPException(status_code=404, detail="Warehouse not found")
         zone.warehouse_id = payload.warehouse_id
@@ -62,10 +69,17 @@ async def update_zone(
         zone.name = payload.name
     if payload.code is not None:
         zone.code = payload.code
-    if payload.zone_type is not None:
+    if payload.zone_type is not None and ZoneType(payload.zone_type) != zone.zone_type:
+        previous_zone_type = zone.zone_type.value
         zone.zone_type = ZoneType(payload.zone_type)
+        # stock on the zone's locations now counts under another zone type
+        await session.flush()
+        await restate_location_availability(
+            session, await _zone_location_ids(session, zone_id), previous_zone_type
+        )
 
     await session.commit()
+    reference_cache.invalidate_zone(zone_id)
     await session.refresh(zone)
     return zone
 
@@ -76,7 +90,13 @@ async def delete_zone(zone_id: int, session: AsyncSession = Depends(get_session)
     if zone is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Zone not found")
 
+    location_ids = await _zone_location_ids(session, zone_id)
+    previous_zone_type = zone.zone_type.value
     await session.delete(zone)
+    await session.flush()
+    # the zone's locations are left without a zone
+    await restate_location_availability(session, location_ids, previous_zone_type)
     await session.commit()
+    reference_cache.invalidate_zone(zone_id)
     return {"status": "deleted"}
 
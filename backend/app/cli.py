@@ -0,0 +1,148 @@
+"""
+Maintenance commands: python -m app.cli <command> [options]
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import Partner, Warehouse
+from app.services.asn_import import import_asn
+from app.services.idempotency import purge_idempotency_keys
+from app.services.inbound_counters import rebuild_inbound_counters
+from app.services.inventory import compact_zero_inventory, rebuild_availability
+from app.services.snapshots import run_snapshot_job
+
+
+async def _snapshot(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal() as session:
+        snapshot = await run_snapshot_job(session, retention_days=args.retention_days)
+    print(f"snapshot {snapshot.id}: {snapshot.rows_count} rows at {snapshot.taken_at}")
+
+
+async def _compact_inventory(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal() as session:
+        deleted = await compact_zero_inventory(session, batch_size=args.batch_size)
+    print(f"deleted {deleted} zero inventory rows")
+
+
+async def _rebuild_availability(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal() as session:
+        counters = await rebuild_availability(session, args.warehouse_id or None)
+        await session.commit()
+    print(f"rebuilt {counters} availability counters")
+
+
+async def _rebuild_inbound_counters(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal() as session:
+        orders = await rebuild_inbound_counters(session, args.order_id or None)
+        await session.commit()
+    print(f"rebuilt line counters of {orders} inbound orders")
+
+
+async def _purge_idempotency_keys(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal() as session:
+        deleted = await purge_idempotency_keys(session, ttl_seconds=args.ttl_seconds)
+    print(f"deleted {deleted} expired idempotency keys")
+
+
+async def _file_chunks(path: Path, size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with path.open("rb") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+async def _import_asn(args: argparse.Namespace) -> None:
+    path = Path(args.file)
+    suffix = path.suffix.lower()
+    fmt = args.format or {".csv": "csv", ".json": "json"}.get(suffix, "ndjson")
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        if await session.get(Warehouse, args.warehouse_id) is None:
+            raise SystemExit(f"warehouse {args.warehouse_id} not found")
+        if args.partner_id is not None and await session.get(Partner, args.partner_id) is None:
+            raise SystemExit(f"partner {args.partner_id} not found")
+        order, outcome = await import_asn(
+            session,
+            args.external_number,
+            args.warehouse_id,
+            args.partner_id,
+            _file_chunks(path),
+            fmt,
+        )
+        await session.commit()
+    for error in outcome.errors:
+        print(f"line {error.line}: {error.detail}")
+    print(
+        f"inbound order {order.id}: {outcome.imported} of {outcome.records} lines imported, "
+        f"{outcome.errors_total} errors in {time.perf_counter() - started:.1f} s"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snapshot = commands.add_parser("snapshot", help="take an inventory snapshot and prune old ones")
+    snapshot.add_argument(
+        "--retention-days", type=int, default=settings.snapshot_retention_days
+    )
+    snapshot.set_defaults(handler=_snapshot)
+
+    compact = commands.add_parser(
+        "compact-inventory", help="delete inventory rows with zero quantity"
+    )
+    compact.add_argument(
+        "--batch-size", type=int, default=settings.inventory_compaction_batch_size
+    )
+    compact.set_defaults(handler=_compact_inventory)
+
+    availability = commands.add_parser(
+        "rebuild-availability", help="recompute availability counters from inventory"
+    )
+    availability.add_argument(
+        "--warehouse-id", type=int, action="append", help="limit to warehouse; repeatable"
+    )
+    availability.set_defaults(handler=_rebuild_availability)
+
+    inbound = commands.add_parser(
+        "rebuild-inbound-counters", help="recount inbound order line counters from the lines"
+    )
+    inbound.add_argument(
+        "--order-id", type=int, action="append", help="limit to inbound order; repeatable"
+    )
+    inbound.set_defaults(handler=_rebuild_inbound_counters)
+
+    idempotency = commands.add_parser(
+        "purge-idempotency-keys", help="delete stored responses older than the TTL"
+    )
+    idempotency.add_argument(
+        "--ttl-seconds", type=int, default=settings.idempotency_ttl_seconds
+    )
+    idempotency.set_defaults(handler=_purge_idempotency_keys)
+
+    asn = commands.add_parser("import-asn", help="create an inbound order from an ASN file")
+    asn.add_argument("file", help="CSV with a header row, NDJSON or a JSON array")
+    asn.add_argument("--warehouse-id", type=int, required=True)
+    asn.add_argument("--external-number", required=True)
+    asn.add_argument("--partner-id", type=int)
+    asn.add_argument(
+        "--format",
+        choices=["csv", "ndjson", "json"],
+        help="default: csv for *.csv, json for *.json, otherwise ndjson",
+    )
+    asn.set_defaults(handler=_import_asn)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
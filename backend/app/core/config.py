@@ -8,6 +8,32 @@ class Settings(BaseModel):
         "DATABASE_URL",
         "postgresql+asyncpg://wms:wms_password@db:5432/wms",
     )
+    # periodic inventory snapshots for point-in-time stock queries; 0 disables
+    snapshot_interval_seconds: int = int(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "86400"))
+    snapshot_retention_days: int = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "90"))
+    # background deletion of inventory rows left at zero quantity; 0 disables
+    inventory_compaction_interval_seconds: int = int(
+        os.getenv("INVENTORY_COMPACTION_INTERVAL_SECONDS", "3600")
+    )
+    inventory_compaction_batch_size: int = int(
+        os.getenv("INVENTORY_COMPACTION_BATCH_SIZE", "1000")
+    )
+    # pick-path order of picking task lines: s_shape, largest_gap, nearest_neighbor or none
+    pick_path_strategy: str = os.getenv("PICK_PATH_STRATEGY", "s_shape")
+    # bin choice when allocating picks, unless the warehouse or the request sets one:
+    # first_found, fewest_locations, fifo or drain_smallest
+    allocation_strategy: str = os.getenv("ALLOCATION_STRATEGY", "first_found")
+    # in-process cache of warehouses, locations and items
+    ref_cache_ttl_seconds: float = float(os.getenv("REF_CACHE_TTL_SECONDS", "60"))
+    ref_cache_max_entries: int = int(os.getenv("REF_CACHE_MAX_ENTRIES", "10000"))
+    # stored responses of requests sent with an Idempotency-Key header
+    idempotency_ttl_seconds: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    # a claimed key whose request has not committed after this long may be taken over
+    idempotency_lease_seconds: int = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+    # background deletion of expired idempotency keys; 0 disables
+    idempotency_purge_interval_seconds: int = int(
+        os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "3600")
+    )
 
 
 settings = Settings()
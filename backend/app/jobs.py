@@ -0,0 +1,30 @@
+from functools import partial
+
+from app.core.config import settings
+from app.services.idempotency import purge_idempotency_keys
+from app.services.inventory import compact_zero_inventory
+from app.services.scheduler import PeriodicJob
+from app.services.snapshots import run_snapshot_job
+
+
+def periodic_jobs() -> list[PeriodicJob]:
+    """Background jobs started with the application."""
+    return [
+        PeriodicJob(
+            name="inventory_snapshot",
+            interval_seconds=settings.snapshot_interval_seconds,
+            run=partial(run_snapshot_job, retention_days=settings.snapshot_retention_days),
+        ),
+        PeriodicJob(
+            name="inventory_compaction",
+            interval_seconds=settings.inventory_compaction_interval_seconds,
+            run=partial(
+                compact_zero_inventory, batch_size=settings.inventory_compaction_batch_size
+            ),
+        ),
+        PeriodicJob(
+            name="idempotency_purge",
+            interval_seconds=settings.idempotency_purge_interval_seconds,
+            run=partial(purge_idempotency_keys, ttl_seconds=settings.idempotency_ttl_seconds),
+        ),
+    ]
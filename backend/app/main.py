@@ -1,12 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import api_router
+from app.jobs import periodic_jobs
+from app.services.scheduler import start_jobs, stop_jobs
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    tasks = start_jobs(periodic_jobs())
+    yield
+    await stop_jobs(tasks)
 
 
 def get_application() -> FastAPI:
     """Configure FastAPI application."""
-    application = FastAPI(title="WMS API", version="0.1.0")
+    application = FastAPI(title="WMS API", version="0.1.0", lifespan=lifespan)
 
     application.add_middleware(
         CORSMiddleware,
@@ -4,7 +4,7 @@ from app.db.base import Base  # чтобы Alembic видел Base
 from .user import User
 from .warehouse import Warehouse, Zone, Location, ZoneType
 from .item import Item
-from .inventory import Inventory
+from .inventory import Inventory, InventoryAvailability
 from .movement import Movement
 from .partner import Partner, PartnerType
 from .inbound_order import (
@@ -17,6 +17,8 @@ from .inbound_order import (
 from .outbound_order import OutboundOrder, OutboundOrderLine, OutboundStatus
 from .picking import PickingTask, PickingTaskLine, PickingStatus
 from .tare import Tare, TareItem, TareType, TareStatus
+from .snapshot import InventorySnapshot, InventorySnapshotRow
+from .idempotency import IdempotencyKey
 
 __all__ = [
     "Base",
@@ -27,6 +29,7 @@ __all__ = [
     "Location",
     "Item",
     "Inventory",
+    "InventoryAvailability",
     "Movement",
     "Partner",
     "PartnerType",
@@ -45,4 +48,7 @@ __all__ = [
     "PickingTask",
     "PickingTaskLine",
     "PickingStatus",
+    "InventorySnapshot",
+    "InventorySnapshotRow",
+    "IdempotencyKey",
 ]
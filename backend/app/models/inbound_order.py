@@ -4,6 +4,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     func,
@@ -35,6 +36,7 @@ class InboundCondition(str, enum.Enum):
 
 class InboundOrder(Base):
     __tablename__ = "inbound_orders"
+    __table_args__ = (Index("ix_inbound_orders_wh_id", "warehouse_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     external_number = Column(String(100), nullable=False)
@@ -50,6 +52,11 @@ class InboundOrder(Base):
         default=InboundStatus.created,
         server_default=InboundStatus.created.value,
     )
+    # maintained by app.services.inbound_counters on every line change
+    lines_total = Column(Integer, nullable=False, default=0, server_default="0")
+    lines_matched = Column(Integer, nullable=False, default=0, server_default="0")
+    lines_over = Column(Integer, nullable=False, default=0, server_default="0")
+    lines_mis_sort = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -68,7 +75,7 @@ class InboundOrderLine(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     inbound_order_id = Column(
-        Integer, ForeignKey("inbound_orders.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("inbound_orders.id", ondelete="CASCADE"), nullable=False, index=True
     )
     item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
     expected_qty = Column(Integer, nullable=False)
@@ -86,7 +93,7 @@ class InboundReceipt(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     inbound_order_id = Column(
-        Integer, ForeignKey("inbound_orders.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("inbound_orders.id", ondelete="CASCADE"), nullable=False, index=True
     )
     line_id = Column(Integer, ForeignKey("inbound_order_lines.id", ondelete="SET NULL"), nullable=True)
     tare_id = Column(Integer, ForeignKey("tares.id", ondelete="CASCADE"), nullable=False)
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, ForeignKey, Integer, DateTime
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -7,6 +17,25 @@ from sqlalchemy.orm import relationship
 
 class Inventory(Base):
     __tablename__ = "inventory"
+    __table_args__ = (
+        UniqueConstraint(
+            "warehouse_id", "location_id", "item_id", name="uq_inventory_wh_loc_item"
+        ),
+        CheckConstraint(
+            "reserved_qty >= 0 AND reserved_qty <= quantity", name="ck_inventory_reserved_qty"
+        ),
+        # allocation: unreserved stock of an item across a warehouse
+        Index(
+            "ix_inventory_wh_item_unreserved",
+            "warehouse_id",
+            "item_id",
+            "location_id",
+            postgresql_where=text("quantity > reserved_qty"),
+            sqlite_where=text("quantity > reserved_qty"),
+        ),
+        # keyset pagination of GET /inventory
+        Index("ix_inventory_wh_id", "warehouse_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
@@ -18,4 +47,28 @@ class Inventory(Base):
     )
     tare_id = Column(Integer, ForeignKey("tares.id", ondelete="SET NULL"), nullable=True)
     quantity = Column(Integer, nullable=False, default=0)
+    # held by open picking tasks; quantity - reserved_qty is what allocation may take
+    reserved_qty = Column(Integer, nullable=False, default=0, server_default="0")
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class InventoryAvailability(Base):
+    """
+    Stock per (warehouse, item, zone type), kept in step with every inventory write.
+
+    zone_type is the ZoneType value of the location's zone, or "unassigned"
+    for locations without a zone.
+    """
+
+    __tablename__ = "inventory_availability"
+
+    warehouse_id = Column(
+        Integer, ForeignKey("warehouses.id", ondelete="CASCADE"), primary_key=True
+    )
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    zone_type = Column(String(20), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
     updated_at = Column(DateTime(timezone=True), server_default=func.now())
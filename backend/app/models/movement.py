@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -6,6 +6,7 @@ from app.db.base import Base
 
 class Movement(Base):
     __tablename__ = "movements"
+    __table_args__ = (Index("ix_movements_wh_created_at", "warehouse_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     warehouse_id = Column(
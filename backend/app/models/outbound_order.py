@@ -53,11 +53,14 @@ class OutboundOrderLine(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     outbound_order_id = Column(
-        Integer, ForeignKey("outbound_orders.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("outbound_orders.id", ondelete="CASCADE"), nullable=False, index=True
     )
     item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
     ordered_qty = Column(Integer, nullable=False)
     picked_qty = Column(Integer, nullable=False, default=0)
     shipped_qty = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     order = relationship("OutboundOrder", back_populates="lines")
+
+    __mapper_args__ = {"version_id_col": version}
@@ -4,8 +4,11 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
+    String,
     func,
+    text,
 )
 from sqlalchemy.orm import relationship
 
@@ -16,19 +19,39 @@ class PickingStatus(str, enum.Enum):
     new = "new"
     in_progress = "in_progress"
     done = "done"
+    cancelled = "cancelled"
 
 
 class PickingTask(Base):
     __tablename__ = "picking_tasks"
+    __table_args__ = (
+        # GET /picking_tasks?warehouse_id=&status= paged by id
+        Index("ix_picking_tasks_wh_status_id", "warehouse_id", "status", "id"),
+        # POST /picking_tasks/claim: next new task of a warehouse
+        Index(
+            "ix_picking_tasks_claim_queue",
+            "warehouse_id",
+            text("priority DESC"),
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'new'"),
+            sqlite_where=text("status = 'new'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     warehouse_id = Column(
         Integer, ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False
     )
     outbound_order_id = Column(
-        Integer, ForeignKey("outbound_orders.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("outbound_orders.id", ondelete="CASCADE"), nullable=False, index=True
     )
     status = Column(Enum(PickingStatus), nullable=False, default=PickingStatus.new)
+    # higher is claimed first
+    priority = Column(Integer, nullable=False, default=0, server_default="0")
+    # picker or device that claimed the task
+    assignee = Column(String(100), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -39,6 +62,9 @@ class PickingTask(Base):
         back_populates="task",
         cascade="all, delete-orphan",
         lazy="selectin",
+        # lines are inserted in pick-path order; the task id leads so that
+        # loading lines for many tasks can follow the picking_task_id index
+        order_by="[PickingTaskLine.picking_task_id, PickingTaskLine.id]",
     )
 
 
@@ -47,7 +73,7 @@ class PickingTaskLine(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     picking_task_id = Column(
-        Integer, ForeignKey("picking_tasks.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("picking_tasks.id", ondelete="CASCADE"), nullable=False, index=True
     )
     item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
     from_location_id = Column(
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, func
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+
+class InventorySnapshot(Base):
+    __tablename__ = "inventory_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    taken_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    # movements with a greater id are not included in the snapshot rows
+    last_movement_id = Column(Integer, nullable=False, default=0)
+    rows_count = Column(Integer, nullable=False, default=0)
+
+    rows = relationship(
+        "InventorySnapshotRow",
+        back_populates="snapshot",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class InventorySnapshotRow(Base):
+    __tablename__ = "inventory_snapshot_rows"
+
+    snapshot_id = Column(
+        Integer,
+        ForeignKey("inventory_snapshots.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    warehouse_id = Column(Integer, primary_key=True)
+    location_id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False)
+
+    snapshot = relationship("InventorySnapshot", back_populates="rows")
@@ -4,6 +4,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
@@ -42,7 +43,9 @@ class Tare(Base):
     warehouse_id = Column(
         Integer, ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False
     )
-    location_id = Column(Integer, ForeignKey("locations.id", ondelete="SET NULL"), nullable=True)
+    location_id = Column(
+        Integer, ForeignKey("locations.id", ondelete="SET NULL"), nullable=True, index=True
+    )
     type_id = Column(Integer, ForeignKey("tare_types.id", ondelete="RESTRICT"), nullable=False)
     tare_code = Column(String(100), nullable=False, unique=True, index=True)
     parent_tare_id = Column(Integer, ForeignKey("tares.id", ondelete="SET NULL"), nullable=True)
@@ -62,11 +65,15 @@ class Tare(Base):
 
 class TareItem(Base):
     __tablename__ = "tare_items"
+    __table_args__ = (Index("ix_tare_items_tare_item", "tare_id", "item_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     tare_id = Column(Integer, ForeignKey("tares.id", ondelete="CASCADE"), nullable=False)
     item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
     quantity = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     tare = relationship("Tare", back_populates="items")
 
+    __mapper_args__ = {"version_id_col": version}
+
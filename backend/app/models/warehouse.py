@@ -18,6 +18,8 @@ class Warehouse(Base):
     name = Column(String(255), nullable=False)
     code = Column(String(50), unique=True, index=True, nullable=False)
     is_active = Column(Boolean, nullable=False, default=True)
+    # overrides settings.allocation_strategy for this warehouse
+    allocation_strategy = Column(String(30), nullable=True)
 
     zones = relationship("Zone", back_populates="warehouse")
 
@@ -47,7 +49,7 @@ class Location(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     warehouse_id = Column(
-        Integer, ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("warehouses.id", ondelete="CASCADE"), nullable=False, index=True
     )
     zone_id = Column(
         Integer, ForeignKey("zones.id", ondelete="SET NULL"), nullable=True
@@ -55,5 +57,9 @@ class Location(Base):
     code = Column(String(50), nullable=False, index=True)
     description = Column(String(255), nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
+    # optional pick-path coordinates; when unset they are parsed from code
+    aisle = Column(Integer, nullable=True)
+    bay = Column(Integer, nullable=True)
+    level = Column(Integer, nullable=True)
 
     zone = relationship("Zone", back_populates="locations")
@@ -1,15 +1,34 @@
-from app.schemas.inventory import InboundCreate, InventoryRead, MoveCreate
+from app.schemas.inventory import (
+    InboundBatchResult,
+    InboundBatchRowResult,
+    InboundCreate,
+    InventoryAvailabilityRead,
+    InventoryRead,
+    InventoryStockRead,
+    MoveBatchResult,
+    MoveCreate,
+)
 from app.schemas.item import ItemCreate, ItemRead
 from app.schemas.location import LocationCreate, LocationRead, LocationUpdate
-from app.schemas.warehouse import WarehouseCreate, WarehouseRead, WarehouseUpdate
+from app.schemas.warehouse import (
+    AllocationStrategy,
+    WarehouseCreate,
+    WarehouseRead,
+    WarehouseUpdate,
+)
 from app.schemas.zone import ZoneCreate, ZoneRead, ZoneUpdate
 from app.schemas.partner import PartnerCreate, PartnerRead
 from app.schemas.inbound_order import (
     InboundOrderCreate,
     InboundOrderRead,
     InboundOrderStatusUpdate,
+    InboundOrderSummaryRead,
     InboundOrderLineRead,
+    InboundImportError,
+    InboundImportResult,
     InboundReceiveRequest,
+    InboundReceiveBatchResult,
+    InboundReceiveLineResult,
     InboundCloseTareRequest,
 )
 from app.schemas.tare import (
@@ -30,14 +49,35 @@ from app.schemas.outbound_order import (
     OutboundOrderLineRead,
 )
 from app.schemas.picking import (
+    PATH_STRATEGY_DESCRIPTION,
+    PathStrategy,
+    PickingBatchResult,
+    PickingLineCompleted,
+    PickingLineResult,
+    PickingSimulationCreate,
+    PickingSimulationResult,
+    PickingSimulationSku,
     PickingTaskRead,
     PickingTaskLineRead,
+    PickingTaskClaim,
     PickingTaskCompleteLine,
+    PickingTaskSummaryRead,
+    PickingWaveCreate,
+    PickingWaveLocation,
+    PickingWavePick,
+    PickingWaveResult,
+    PickingWaveSkipped,
 )
 
 __all__ = [
+    "AllocationStrategy",
+    "InboundBatchResult",
+    "InboundBatchRowResult",
     "InboundCreate",
+    "InventoryAvailabilityRead",
     "InventoryRead",
+    "InventoryStockRead",
+    "MoveBatchResult",
     "MoveCreate",
     "ItemCreate",
     "ItemRead",
@@ -55,8 +95,13 @@ __all__ = [
     "InboundOrderCreate",
     "InboundOrderRead",
     "InboundOrderStatusUpdate",
+    "InboundOrderSummaryRead",
     "InboundOrderLineRead",
+    "InboundImportError",
+    "InboundImportResult",
     "InboundReceiveRequest",
+    "InboundReceiveBatchResult",
+    "InboundReceiveLineResult",
     "InboundCloseTareRequest",
     "TareCreate",
     "TareRead",
@@ -71,8 +116,23 @@ __all__ = [
     "OutboundOrderRead",
     "OutboundOrderStatusUpdate",
     "OutboundOrderLineRead",
+    "PATH_STRATEGY_DESCRIPTION",
+    "PathStrategy",
+    "PickingBatchResult",
+    "PickingLineCompleted",
+    "PickingLineResult",
+    "PickingSimulationCreate",
+    "PickingSimulationResult",
+    "PickingSimulationSku",
     "PickingTaskRead",
     "PickingTaskLineRead",
+    "PickingTaskClaim",
     "PickingTaskCompleteLine",
+    "PickingTaskSummaryRead",
+    "PickingWaveCreate",
+    "PickingWaveLocation",
+    "PickingWavePick",
+    "PickingWaveResult",
+    "PickingWaveSkipped",
 ]
 
@@ -42,11 +42,30 @@ class InboundOrderRead(BaseModel):
     warehouse_id: int
     partner_id: Optional[int] = None
     status: InboundStatus
+    lines_total: int = 0
+    lines_matched: int = 0
+    lines_over: int = 0
+    lines_mis_sort: int = 0
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     lines: List[InboundOrderLineRead]
 
 
+class InboundOrderSummaryRead(BaseModel):
+    """An inbound order without its lines; totals are aggregated in SQL."""
+
+    id: int
+    external_number: str
+    warehouse_id: int
+    partner_id: Optional[int] = None
+    status: InboundStatus
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    lines_count: int
+    expected_qty: int
+    received_qty: int
+
+
 class InboundOrderStatusUpdate(BaseModel):
     status: InboundStatus
 
@@ -62,3 +81,36 @@ class InboundReceiveRequest(BaseModel):
 class InboundCloseTareRequest(BaseModel):
     tare_id: int
     location_id: int
+
+
+class InboundReceiveLineResult(BaseModel):
+    line_id: int
+    item_id: int
+    # received by this batch
+    qty_received: int
+    received_qty: int
+    expected_qty: int
+    line_status: Optional[str] = None
+
+
+class InboundReceiveBatchResult(BaseModel):
+    order_id: int
+    status: InboundStatus
+    lines: List[InboundReceiveLineResult]
+    elapsed_ms: float
+
+
+class InboundImportError(BaseModel):
+    # 1-based line of the file
+    line: int
+    detail: str
+
+
+class InboundImportResult(BaseModel):
+    order_id: int
+    records: int
+    lines_imported: int
+    errors_total: int
+    # the first errors only; errors_total counts all of them
+    errors: List[InboundImportError]
+    elapsed_ms: float
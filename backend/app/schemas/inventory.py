@@ -27,3 +27,47 @@ class InventoryRead(ORMModel):
     item_id: int
     quantity: int
 
+
+
+class InventoryStockRead(BaseModel):
+    """Reconstructed stock for a point in time; has no inventory row id."""
+
+    warehouse_id: int
+    location_id: int
+    item_id: int
+    quantity: int
+
+
+class InventoryAvailabilityRead(BaseModel):
+    """Stock of an item in a warehouse split by zone type."""
+
+    warehouse_id: int
+    item_id: int
+    zones: dict[str, int]
+    # stock in storage zones
+    pickable_qty: int
+    # stock still in inbound zones
+    not_put_away_qty: int
+    total_qty: int
+
+
+class InboundBatchRowResult(BaseModel):
+    index: int
+    inventory_id: int
+    warehouse_id: int
+    location_id: int
+    item_id: int
+    qty: int
+    quantity: int
+
+
+class InboundBatchResult(BaseModel):
+    rows: list[InboundBatchRowResult]
+    total_qty: int
+    elapsed_ms: float
+
+
+class MoveBatchResult(BaseModel):
+    moves: int
+    total_qty: int
+    elapsed_ms: float
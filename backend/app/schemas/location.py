@@ -9,6 +9,9 @@ class LocationCreate(BaseModel):
     code: str
     zone_id: Optional[int] = None
     description: Optional[str] = None
+    aisle: Optional[int] = None
+    bay: Optional[int] = None
+    level: Optional[int] = None
 
 
 class LocationUpdate(BaseModel):
@@ -17,6 +20,9 @@ class LocationUpdate(BaseModel):
     code: Optional[str] = None
     description: Optional[str] = None
     is_active: Optional[bool] = None
+    aisle: Optional[int] = None
+    bay: Optional[int] = None
+    level: Optional[int] = None
 
 
 class LocationRead(ORMModel):
@@ -26,4 +32,7 @@ class LocationRead(ORMModel):
     code: str
     description: Optional[str] = None
     is_active: bool
+    aisle: Optional[int] = None
+    bay: Optional[int] = None
+    level: Optional[int] = None
 
@@ -1,9 +1,20 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
+from app.models.outbound_order import OutboundStatus
 from app.models.picking import PickingStatus
+from app.schemas.warehouse import AllocationStrategy
+
+
+PathStrategy = Literal["none", "s_shape", "largest_gap", "nearest_neighbor"]
+
+PATH_STRATEGY_DESCRIPTION = (
+    "Pick-path order of the task lines; defaults to the PICK_PATH_STRATEGY setting. "
+    "nearest_neighbor is used for up to 60 locations per task or wave, "
+    "above that the walk is s_shape."
+)
 
 
 class PickingTaskLineRead(BaseModel):
@@ -24,11 +35,140 @@ class PickingTaskRead(BaseModel):
     warehouse_id: int
     outbound_order_id: int
     status: PickingStatus
+    priority: int = 0
+    assignee: Optional[str] = None
+    claimed_at: Optional[datetime] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     lines: List[PickingTaskLineRead]
 
 
+class PickingTaskSummaryRead(BaseModel):
+    """A picking task without its lines; totals are aggregated in SQL."""
+
+    id: int
+    warehouse_id: int
+    outbound_order_id: int
+    status: PickingStatus
+    priority: int = 0
+    assignee: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    lines_count: int
+    qty_to_pick: int
+    qty_picked: int
+    qty_remaining: int
+
+
+class PickingTaskClaim(BaseModel):
+    warehouse_id: int
+    assignee: str = Field(min_length=1, max_length=100)
+
+
 class PickingTaskCompleteLine(BaseModel):
     line_id: int
     qty_picked: int = Field(gt=0)
+
+
+class PickingLineCompleted(BaseModel):
+    """Result of complete_line: the changed line and the task status."""
+
+    task_id: int
+    status: PickingStatus
+    line: PickingTaskLineRead
+
+
+class PickingLineResult(BaseModel):
+    line_id: int
+    item_id: int
+    # picked by this batch
+    qty_picked: int
+    qty_remaining: int
+
+
+class PickingBatchResult(BaseModel):
+    task_id: int
+    status: PickingStatus
+    lines: List[PickingLineResult]
+    elapsed_ms: float
+
+
+class PickingWaveCreate(BaseModel):
+    """Orders of a wave: explicit ids, or a filter over outbound orders."""
+
+    outbound_order_ids: Optional[List[int]] = Field(default=None, min_length=1)
+    warehouse_id: Optional[int] = None
+    status: OutboundStatus = OutboundStatus.draft
+    partner_id: Optional[int] = None
+    limit: int = Field(default=500, ge=1, le=1000)
+    path_strategy: Optional[PathStrategy] = Field(
+        default=None, description=PATH_STRATEGY_DESCRIPTION
+    )
+    # defaults to each warehouse's strategy, then ALLOCATION_STRATEGY
+    allocation_strategy: Optional[AllocationStrategy] = None
+
+    @model_validator(mode="after")
+    def _ids_or_warehouse(self):
+        if self.outbound_order_ids is None and self.warehouse_id is None:
+            raise ValueError("Either outbound_order_ids or warehouse_id is required")
+        return self
+
+
+class PickingWavePick(BaseModel):
+    task_id: int
+    line_id: int
+    outbound_order_id: int
+    item_id: int
+    qty_to_pick: int
+
+
+class PickingWaveLocation(BaseModel):
+    location_id: int
+    total_qty: int
+    picks: List[PickingWavePick]
+
+
+class PickingWaveSkipped(BaseModel):
+    outbound_order_id: int
+    reason: str
+
+
+class PickingWaveResult(BaseModel):
+    tasks: List[PickingTaskRead]
+    # every bin of the wave once, in visiting order
+    locations: List[PickingWaveLocation]
+    skipped: List[PickingWaveSkipped]
+
+
+class PickingSimulationCreate(BaseModel):
+    """Candidate orders of a dry run: a filter over outbound orders."""
+
+    warehouse_id: Optional[int] = None
+    status: OutboundStatus = OutboundStatus.draft
+    partner_id: Optional[int] = None
+    limit: int = Field(default=50000, ge=1, le=200000)
+    # defaults to each warehouse's strategy, then ALLOCATION_STRATEGY
+    allocation_strategy: Optional[AllocationStrategy] = None
+
+
+class PickingSimulationSku(BaseModel):
+    item_id: int
+    sku: Optional[str] = None
+    requested_qty: int
+    allocatable_qty: int
+    short_qty: int
+    orders_short: int
+    fill_rate: float
+
+
+class PickingSimulationResult(BaseModel):
+    orders_total: int
+    orders_allocatable: int
+    order_fill_rate: float
+    units_requested: int
+    units_allocatable: int
+    unit_fill_rate: float
+    # shortest first
+    skus: List[PickingSimulationSku]
+    elapsed_ms: float
@@ -1,16 +1,23 @@
+from typing import Literal
+
 from app.schemas.base import ORMModel
 from pydantic import BaseModel
 
+AllocationStrategy = Literal["first_found", "fewest_locations", "fifo", "drain_smallest"]
+
 
 class WarehouseCreate(BaseModel):
     name: str
     code: str
+    allocation_strategy: AllocationStrategy | None = None
 
 
 class WarehouseUpdate(BaseModel):
     name: str | None = None
     code: str | None = None
     is_active: bool | None = None
+    # an explicit null resets the warehouse to the ALLOCATION_STRATEGY default
+    allocation_strategy: AllocationStrategy | None = None
 
 
 class WarehouseRead(ORMModel):
@@ -18,4 +25,5 @@ class WarehouseRead(ORMModel):
     name: str
     code: str
     is_active: bool
+    allocation_strategy: AllocationStrategy | None = None
 
@@ -0,0 +1,332 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, NamedTuple, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    Inventory,
+    OutboundOrder,
+    OutboundOrderLine,
+    PickingStatus,
+    PickingTask,
+)
+from app.services.inventory import InventoryKey, lock_inventory_rows
+
+
+class Bin(NamedTuple):
+    location_id: int
+    # unreserved quantity
+    quantity: int
+    updated_at: datetime | None
+
+
+# item_id -> bins in location order
+Candidates = dict[int, list[Bin]]
+
+# optimistic read + locked re-check; a miss means another transaction reserved
+# the same units in between
+RESERVE_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class Allocation:
+    item_id: int
+    location_id: int
+    qty: int
+
+
+class InsufficientStock(Exception):
+    def __init__(self, item_id: int):
+        super().__init__(item_id)
+        self.item_id = item_id
+
+
+async def load_candidates(
+    session: AsyncSession, warehouse_id: int, item_ids: set[int]
+) -> Candidates:
+    """
+    Unreserved stock: item_id -> bins with quantity - reserved_qty, in location order.
+
+    One query for all items, served by the partial (warehouse_id, item_id,
+    location_id) WHERE quantity > reserved_qty index.
+    """
+    candidates: Candidates = {item_id: [] for item_id in item_ids}
+    if not item_ids:
+        return candidates
+    rows = await session.execute(
+        select(
+            Inventory.item_id,
+            Inventory.location_id,
+            Inventory.quantity - Inventory.reserved_qty,
+            Inventory.updated_at,
+        )
+        .where(
+            Inventory.warehouse_id == warehouse_id,
+            Inventory.item_id.in_(item_ids),
+            Inventory.quantity > Inventory.reserved_qty,
+        )
+        .order_by(Inventory.item_id, Inventory.location_id)
+    )
+    for item_id, location_id, available, updated_at in rows:
+        candidates[item_id].append(Bin(location_id, available, updated_at))
+    return candidates
+
+
+def first_found(bins: Sequence[Bin], qty: int) -> list[Bin]:
+    """Bins in location order."""
+    return list(bins)
+
+
+def fifo(bins: Sequence[Bin], qty: int) -> list[Bin]:
+    """Oldest stock first, by Inventory.updated_at."""
+    return sorted(bins, key=lambda b: (b.updated_at is None, b.updated_at or 0, b.location_id))
+
+
+def drain_smallest(bins: Sequence[Bin], qty: int) -> list[Bin]:
+    """Smallest bins first, so picks empty bins and free them up."""
+    return sorted(bins, key=lambda b: (b.quantity, b.location_id))
+
+
+def fewest_locations(bins: Sequence[Bin], qty: int) -> list[Bin]:
+    """
+    Fewest bins that cover qty: the largest bins until the rest fits in one,
+    then the smallest bin that covers the rest.
+    """
+    remaining = sorted(bins, key=lambda b: (-b.quantity, b.location_id))
+    chosen: list[Bin] = []
+    while qty > 0 and remaining:
+        covering = [b for b in remaining if b.quantity >= qty]
+        pick = covering[-1] if covering else remaining[0]
+        remaining.remove(pick)
+        chosen.append(pick)
+        qty -= pick.quantity
+    return chosen + remaining
+
+
+# orders the bins of one item for a line needing qty; fill takes them in that order
+STRATEGIES: dict[str, Callable[[Sequence[Bin], int], list[Bin]]] = {
+    "first_found": first_found,
+    "fewest_locations": fewest_locations,
+    "fifo": fifo,
+    "drain_smallest": drain_smallest,
+}
+
+
+def fill_from_pool(
+    lines: Sequence[OutboundOrderLine], pool: Candidates, strategy: str = "first_found"
+) -> list[Allocation]:
+    """
+    Fill the open quantity of each line from its item's bins, consuming the pool.
+
+    The strategy decides the order bins are drawn from. All-or-nothing: if
+    any line cannot be covered, the pool is left untouched and
+    InsufficientStock is raised for the first such item.
+    """
+    order_bins = STRATEGIES[strategy]
+    taken: dict[tuple[int, int], int] = {}
+    allocations: list[Allocation] = []
+    for line in lines:
+        qty_needed = line.ordered_qty - line.picked_qty
+        if qty_needed <= 0:
+            continue
+        free_bins = [
+            b._replace(quantity=b.quantity - taken.get((line.item_id, b.location_id), 0))
+            for b in pool.get(line.item_id, [])
+        ]
+        free_bins = [b for b in free_bins if b.quantity > 0]
+        for b in order_bins(free_bins, qty_needed):
+            if qty_needed <= 0:
+                break
+            take = min(qty_needed, b.quantity)
+            allocations.append(Allocation(line.item_id, b.location_id, take))
+            taken[(line.item_id, b.location_id)] = taken.get((line.item_id, b.location_id), 0) + take
+            qty_needed -= take
+        if qty_needed > 0:
+            raise InsufficientStock(line.item_id)
+
+    for item_id in {item_id for item_id, _ in taken}:
+        pool[item_id] = [
+            b._replace(quantity=b.quantity - taken.get((item_id, b.location_id), 0))
+            for b in pool[item_id]
+            if b.quantity > taken.get((item_id, b.location_id), 0)
+        ]
+    return allocations
+
+
+def _open_items(lines: Iterable[OutboundOrderLine]) -> set[int]:
+    return {line.item_id for line in lines if line.ordered_qty > line.picked_qty}
+
+
+def _locked_pools(rows: Iterable[Inventory]) -> dict[int, Candidates]:
+    """warehouse_id -> Candidates built from locked rows."""
+    pools: dict[int, Candidates] = {}
+    for inv in sorted(rows, key=lambda inv: (inv.item_id, inv.location_id)):
+        available = inv.quantity - inv.reserved_qty
+        if available > 0:
+            pools.setdefault(inv.warehouse_id, {}).setdefault(inv.item_id, []).append(
+                Bin(inv.location_id, available, inv.updated_at)
+            )
+    return pools
+
+
+def _reserve(
+    locked: dict[InventoryKey, Inventory], warehouse_id: int, allocations: Iterable[Allocation]
+) -> None:
+    # version-checked UPDATEs on flush; the rows are already locked
+    for allocation in allocations:
+        locked[(warehouse_id, allocation.location_id, allocation.item_id)].reserved_qty += (
+            allocation.qty
+        )
+
+
+async def allocate_order_lines(
+    session: AsyncSession,
+    warehouse_id: int,
+    lines: Sequence[OutboundOrderLine],
+    strategy: str = "first_found",
+) -> list[Allocation]:
+    """Allocate one order against unreserved stock without reserving it."""
+    candidates = await load_candidates(session, warehouse_id, _open_items(lines))
+    try:
+        return fill_from_pool(lines, candidates, strategy)
+    except InsufficientStock as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not enough inventory to pick item {exc.item_id}",
+        )
+
+
+async def reserve_order_lines(
+    session: AsyncSession,
+    warehouse_id: int,
+    lines: Sequence[OutboundOrderLine],
+    strategy: str = "first_found",
+) -> list[Allocation]:
+    """
+    Allocate one order and reserve the stock in the caller's transaction.
+
+    The allocation is computed from an unlocked read, then only the chosen
+    rows are locked (in key order) and the order is re-fitted against their
+    locked values. If a concurrent transaction reserved those units first,
+    the read is repeated; nothing is written until the re-fit succeeds.
+    """
+    for _ in range(RESERVE_ATTEMPTS):
+        allocations = await allocate_order_lines(session, warehouse_id, lines, strategy)
+        locked = await lock_inventory_rows(
+            session, {(warehouse_id, a.location_id, a.item_id) for a in allocations}
+        )
+        pool = _locked_pools(locked.values()).get(warehouse_id, {})
+        try:
+            confirmed = fill_from_pool(lines, pool, strategy)
+        except InsufficientStock:
+            continue
+        _reserve(locked, warehouse_id, confirmed)
+        return confirmed
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Concurrent update conflict, please retry",
+    )
+
+
+def _fill_orders(
+    orders: Sequence[OutboundOrder], pools: dict[int, Candidates], strategies: dict[int, str]
+) -> tuple[dict[int, list[Allocation]], dict[int, str]]:
+    allocated: dict[int, list[Allocation]] = {}
+    skipped: dict[int, str] = {}
+    for order in orders:
+        try:
+            allocations = fill_from_pool(
+                order.lines,
+                pools.setdefault(order.warehouse_id, {}),
+                strategies.get(order.warehouse_id, "first_found"),
+            )
+        except InsufficientStock:
+            skipped[order.id] = "Not enough inventory"
+            continue
+        if allocations:
+            allocated[order.id] = allocations
+        else:
+            skipped[order.id] = "No items to pick"
+    return allocated, skipped
+
+
+async def allocate_wave(
+    session: AsyncSession, orders: Sequence[OutboundOrder], strategies: dict[int, str]
+) -> tuple[dict[int, list[Allocation]], dict[int, str]]:
+    """
+    Allocate and reserve a wave of orders against one read of their warehouses' stock.
+
+    Orders are served in the given sequence, each consuming what earlier ones
+    took, so two orders never get the same units. The rows chosen by the first
+    pass are then locked and the wave is re-fitted against their locked
+    values, so stock reserved concurrently is never handed out twice; an
+    order that no longer fits is skipped. strategies maps warehouse id to
+    allocation strategy. Returns allocations and skip reasons, both keyed by
+    outbound order id.
+    """
+    pools: dict[int, Candidates] = {}
+    for warehouse_id in {order.warehouse_id for order in orders}:
+        item_ids = {
+            item_id
+            for order in orders
+            if order.warehouse_id == warehouse_id
+            for item_id in _open_items(order.lines)
+        }
+        pools[warehouse_id] = await load_candidates(session, warehouse_id, item_ids)
+
+    tentative, _ = _fill_orders(orders, pools, strategies)
+    warehouses = {order.id: order.warehouse_id for order in orders}
+    locked = await lock_inventory_rows(
+        session,
+        {
+            (warehouses[order_id], a.location_id, a.item_id)
+            for order_id, allocations in tentative.items()
+            for a in allocations
+        },
+    )
+
+    allocated, skipped = _fill_orders(orders, _locked_pools(locked.values()), strategies)
+    for order_id, allocations in allocated.items():
+        _reserve(locked, warehouses[order_id], allocations)
+    return allocated, skipped
+
+
+async def release_reservations(
+    session: AsyncSession, warehouse_id: int, picks: Iterable[tuple[int, int, int]]
+) -> None:
+    """Give back reserved (location_id, item_id, qty) that will not be picked."""
+    totals: dict[tuple[int, int, int], int] = {}
+    for location_id, item_id, qty in picks:
+        if qty > 0:
+            key = (warehouse_id, location_id, item_id)
+            totals[key] = totals.get(key, 0) + qty
+    locked = await lock_inventory_rows(session, set(totals))
+    for key, qty in totals.items():
+        inv = locked.get(key)
+        if inv is not None:
+            inv.reserved_qty -= min(qty, inv.reserved_qty)
+
+
+async def cancel_order_tasks(session: AsyncSession, order: OutboundOrder) -> None:
+    """Cancel the open picking tasks of an order and release what they still hold."""
+    tasks = (
+        await session.execute(
+            select(PickingTask).where(
+                PickingTask.outbound_order_id == order.id,
+                PickingTask.status.in_([PickingStatus.new, PickingStatus.in_progress]),
+            )
+        )
+    ).scalars().all()
+    for task in tasks:
+        await release_reservations(
+            session,
+            task.warehouse_id,
+            [
+                (line.from_location_id, line.item_id, line.qty_to_pick - line.qty_picked)
+                for line in task.lines
+            ],
+        )
+        task.status = PickingStatus.cancelled
@@ -0,0 +1,517 @@
+"""
+Bulk import of supplier ASN lines into an inbound order.
+
+The file is read as a stream of byte chunks and parsed record by record:
+CSV with a header row (quoted fields may span lines), NDJSON (one JSON
+object per line) or a JSON array of objects, decoded element by element.
+Records are validated and written IMPORT_CHUNK_SIZE at a
+time: items and locations of a chunk are resolved with one query each (only
+references not seen in earlier chunks), and valid lines go in with COPY on
+PostgreSQL or one executemany INSERT elsewhere. A bad record is reported with its line number and skipped;
+the rest of the file is still imported.
+
+Record fields: `sku` or `item_id`, `expected_qty`, and optionally
+`location_code` or `location_id` (a location of the order's warehouse).
+"""
+import codecs
+import csv
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Literal
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import InboundOrder, InboundOrderLine, InboundStatus, Item, Location
+from app.services.inbound_counters import rebuild_inbound_counters
+
+AsnFormat = Literal["csv", "ndjson", "json"]
+
+IMPORT_CHUNK_SIZE = 5000
+# a JSON array element still unparsed past this size is treated as broken
+MAX_JSON_ELEMENT_CHARS = 1 << 20
+# errors past this many are counted but not listed
+MAX_REPORTED_ERRORS = 1000
+
+LINE_COLUMNS = [
+    "inbound_order_id",
+    "item_id",
+    "expected_qty",
+    "received_qty",
+    "location_id",
+    "line_status",
+]
+
+
+@dataclass
+class LineError:
+    line: int
+    detail: str
+
+
+@dataclass
+class ImportOutcome:
+    records: int = 0
+    imported: int = 0
+    errors_total: int = 0
+    errors: list[LineError] = field(default_factory=list)
+
+    def reject(self, line: int, detail: str) -> None:
+        self.errors_total += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(LineError(line, detail))
+
+
+@dataclass
+class _Record:
+    line: int
+    sku: str | None
+    item_id: int | None
+    expected_qty: int
+    location_code: str | None
+    location_id: int | None
+
+
+class _RecordError(Exception):
+    pass
+
+
+class _JsonArrayError(Exception):
+    """A JSON array cannot be read past this point."""
+
+    def __init__(self, line: int, detail: str):
+        super().__init__(detail)
+        self.line = line
+
+
+async def _text_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decoded lines of a byte stream; a UTF-8 BOM is dropped."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _text(raw: dict, name: str) -> str | None:
+    value = raw.get(name)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _integer(raw: dict, name: str) -> int | None:
+    value = raw.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise _RecordError(f"{name} must be an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise _RecordError(f"{name} must be an integer")
+
+
+def _record(line: int, raw: dict) -> _Record:
+    sku = _text(raw, "sku")
+    item_id = _integer(raw, "item_id")
+    if sku is None and item_id is None:
+        raise _RecordError("sku or item_id is required")
+    expected_qty = _integer(raw, "expected_qty")
+    if expected_qty is None:
+        raise _RecordError("expected_qty is required")
+    if expected_qty <= 0:
+        raise _RecordError("expected_qty must be greater than zero")
+    return _Record(
+        line=line,
+        sku=sku,
+        item_id=item_id,
+        expected_qty=expected_qty,
+        location_code=_text(raw, "location_code"),
+        location_id=_integer(raw, "location_id"),
+    )
+
+
+class _CsvFeed:
+    """
+    Source of the one csv.reader of a file. It is handed whole records only,
+    so the reader never runs dry in the middle of a quoted field.
+    """
+
+    def __init__(self):
+        self.pending: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.pending:
+            raise StopIteration
+        return self.pending.popleft()
+
+
+async def _csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, list[str]]]:
+    """
+    Physical lines grouped into CSV records, with the number of the first line.
+
+    A quoted field may hold line breaks (RFC 4180): a record goes on while
+    its quotes are unbalanced, since an escaped quote is written as two.
+    """
+    line = 0
+    first = 0
+    record: list[str] = []
+    quotes = 0
+    async for text in _text_lines(chunks):
+        line += 1
+        if not record:
+            first = line
+        record.append(text + "\n")
+        quotes += text.count('"')
+        if quotes % 2 == 0:
+            yield first, record
+            record = []
+            quotes = 0
+    if record:
+        yield first, record
+
+
+async def _prepended(head: list[bytes], chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in head:
+        yield chunk
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _starts_json_array(
+    chunks: AsyncIterator[bytes],
+) -> tuple[AsyncIterator[bytes], bool]:
+    """Whether the body opens with '[', and the stream with the peeked chunks put back."""
+    head: list[bytes] = []
+    async for chunk in chunks:
+        head.append(chunk)
+        text = b"".join(head).decode("utf-8-sig", errors="replace").lstrip()
+        if text:
+            return _prepended(head, chunks), text.startswith("[")
+    return _prepended(head, chunks), False
+
+
+async def _json_array_values(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """
+    Elements of a JSON array with the line each starts on. Elements are
+    decoded one at a time with raw_decode, so only the unread tail of the
+    stream is buffered, not the whole array.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    source = aiter(chunks)
+    buffer = ""
+    pos = 0
+    line = 1
+    final = False
+
+    async def fill() -> bool:
+        """Append the next chunk to the unread tail; False once the stream has ended."""
+        nonlocal buffer, pos, final
+        if final:
+            return False
+        try:
+            text = text_decoder.decode(await anext(source))
+        except StopAsyncIteration:
+            text = text_decoder.decode(b"", final=True)
+            final = True
+        buffer = buffer[pos:] + text
+        pos = 0
+        return True
+
+    async def next_char() -> str | None:
+        """Skip whitespace; the next character, or None at the end of the stream."""
+        nonlocal pos, line
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                if buffer[pos] == "\n":
+                    line += 1
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not await fill():
+                return None
+
+    if await next_char() != "[":
+        raise _JsonArrayError(line, "expected a JSON array")
+    pos += 1
+    if await next_char() == "]":
+        pos += 1
+    else:
+        while True:
+            if await next_char() is None:
+                raise _JsonArrayError(line, "unexpected end of JSON array")
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    end = None
+                # a value that runs to the end of the buffer may go on in the next chunk
+                if end is not None and (end < len(buffer) or final):
+                    break
+                if end is None and len(buffer) - pos > MAX_JSON_ELEMENT_CHARS:
+                    raise _JsonArrayError(line, "invalid JSON")
+                if not await fill():
+                    raise _JsonArrayError(line, "invalid JSON")
+            yield line, value
+            line += buffer.count("\n", pos, end)
+            pos = end
+            char = await next_char()
+            if char == ",":
+                pos += 1
+            elif char == "]":
+                pos += 1
+                break
+            else:
+                raise _JsonArrayError(line, "expected , or ] in JSON array")
+    if await next_char() is not None:
+        raise _JsonArrayError(line, "data after the JSON array")
+
+
+async def _units(
+    chunks: AsyncIterator[bytes], fmt: AsnFormat
+) -> AsyncIterator[tuple[int, list[str]]]:
+    if fmt == "csv":
+        async for unit in _csv_records(chunks):
+            yield unit
+        return
+    line = 0
+    async for text in _text_lines(chunks):
+        line += 1
+        yield line, [text]
+
+
+async def _json_array_records(
+    chunks: AsyncIterator[bytes], outcome: ImportOutcome
+) -> AsyncIterator[_Record]:
+    try:
+        async for line, raw in _json_array_values(chunks):
+            try:
+                if not isinstance(raw, dict):
+                    raise _RecordError("record must be a JSON object")
+                outcome.records += 1
+                yield _record(line, raw)
+            except _RecordError as exc:
+                outcome.reject(line, str(exc))
+    except _JsonArrayError as exc:
+        # the rest of the array cannot be read; what came before is kept
+        outcome.reject(exc.line, str(exc))
+
+
+async def _records(
+    chunks: AsyncIterator[bytes], fmt: AsnFormat, outcome: ImportOutcome
+) -> AsyncIterator[_Record]:
+    """Parsed records; malformed ones go to outcome and are skipped."""
+    if fmt == "json":
+        chunks, is_array = await _starts_json_array(chunks)
+        if is_array:
+            async for record in _json_array_records(chunks, outcome):
+                yield record
+            return
+        # NDJSON, or a single object, sent as application/json
+        fmt = "ndjson"
+    header: list[str] | None = None
+    feed = _CsvFeed()
+    reader = csv.reader(feed)
+    async for line, texts in _units(chunks, fmt):
+        if not any(text.strip() for text in texts):
+            continue
+        try:
+            if fmt == "csv":
+                feed.pending.extend(texts)
+                try:
+                    values = next(reader)
+                except csv.Error as exc:
+                    raise _RecordError(f"invalid CSV: {exc}")
+                finally:
+                    feed.pending.clear()
+                if header is None:
+                    header = [name.strip().lower() for name in values]
+                    continue
+                if len(values) > len(header):
+                    raise _RecordError("more values than header columns")
+                raw = dict(zip(header, values))
+            else:
+                try:
+                    raw = json.loads(texts[0])
+                except ValueError:
+                    raise _RecordError("invalid JSON")
+                if not isinstance(raw, dict):
+                    raise _RecordError("record must be a JSON object")
+            outcome.records += 1
+            yield _record(line, raw)
+        except _RecordError as exc:
+            outcome.reject(line, str(exc))
+
+
+class _References:
+    """sku -> item id, known item ids and location ids, filled chunk by chunk."""
+
+    def __init__(self, warehouse_id: int):
+        self.warehouse_id = warehouse_id
+        self.skus: dict[str, int] = {}
+        self.item_ids: set[int] = set()
+        # code -> location ids of the warehouse with that code
+        self.location_codes: dict[str, list[int]] = {}
+        self.location_ids: set[int] = set()
+        self._seen_skus: set[str] = set()
+        self._seen_item_ids: set[int] = set()
+        self._seen_codes: set[str] = set()
+        self._seen_location_ids: set[int] = set()
+
+    async def resolve(self, session: AsyncSession, records: list[_Record]) -> None:
+        skus = {r.sku for r in records if r.sku is not None} - self._seen_skus
+        if skus:
+            rows = await session.execute(select(Item.sku, Item.id).where(Item.sku.in_(skus)))
+            self.skus.update(rows.all())
+            self._seen_skus |= skus
+        item_ids = {r.item_id for r in records if r.sku is None} - self._seen_item_ids
+        if item_ids:
+            rows = await session.execute(select(Item.id).where(Item.id.in_(item_ids)))
+            self.item_ids.update(rows.scalars())
+            self._seen_item_ids |= item_ids
+        codes = {r.location_code for r in records if r.location_code} - self._seen_codes
+        if codes:
+            rows = await session.execute(
+                select(Location.code, Location.id).where(
+                    Location.warehouse_id == self.warehouse_id, Location.code.in_(codes)
+                )
+            )
+            for code, location_id in rows:
+                self.location_codes.setdefault(code, []).append(location_id)
+            self._seen_codes |= codes
+        location_ids = {
+            r.location_id for r in records if r.location_code is None and r.location_id is not None
+        } - self._seen_location_ids
+        if location_ids:
+            rows = await session.execute(
+                select(Location.id).where(
+                    Location.warehouse_id == self.warehouse_id, Location.id.in_(location_ids)
+                )
+            )
+            self.location_ids.update(rows.scalars())
+            self._seen_location_ids |= location_ids
+
+    def item(self, record: _Record) -> int:
+        if record.sku is not None:
+            if record.sku not in self.skus:
+                raise _RecordError(f"Item with sku {record.sku} not found")
+            return self.skus[record.sku]
+        if record.item_id not in self.item_ids:
+            raise _RecordError(f"Item {record.item_id} not found")
+        return record.item_id
+
+    def location(self, record: _Record) -> int | None:
+        if record.location_code is not None:
+            matches = self.location_codes.get(record.location_code, [])
+            if not matches:
+                raise _RecordError(
+                    f"Location {record.location_code} not found in warehouse {self.warehouse_id}"
+                )
+            if len(matches) > 1:
+                raise _RecordError(f"Location code {record.location_code} is ambiguous")
+            return matches[0]
+        if record.location_id is not None and record.location_id not in self.location_ids:
+            raise _RecordError(
+                f"Location {record.location_id} not found in warehouse {self.warehouse_id}"
+            )
+        return record.location_id
+
+
+async def _write_lines(session: AsyncSession, rows: list[tuple]) -> None:
+    if session.get_bind().dialect.name == "postgresql":
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            InboundOrderLine.__tablename__, records=rows, columns=LINE_COLUMNS
+        )
+        return
+    # Core insert on the table: one executemany, where the ORM bulk path
+    # splits batches on rows with and without a location
+    await session.execute(
+        insert(InboundOrderLine.__table__), [dict(zip(LINE_COLUMNS, row)) for row in rows]
+    )
+
+
+async def _import_chunk(
+    session: AsyncSession,
+    order: InboundOrder,
+    references: _References,
+    records: list[_Record],
+    outcome: ImportOutcome,
+) -> None:
+    await references.resolve(session, records)
+    rows = []
+    for record in records:
+        try:
+            item_id = references.item(record)
+            location_id = references.location(record)
+        except _RecordError as exc:
+            outcome.reject(record.line, str(exc))
+            continue
+        rows.append((order.id, item_id, record.expected_qty, 0, location_id, "open"))
+    if rows:
+        await _write_lines(session, rows)
+        outcome.imported += len(rows)
+
+
+async def import_asn_lines(
+    session: AsyncSession,
+    order: InboundOrder,
+    chunks: AsyncIterator[bytes],
+    fmt: AsnFormat,
+) -> ImportOutcome:
+    """
+    Add the lines of an ASN file to a flushed order, in the caller's transaction.
+
+    The order's line counters are recounted at the end; the caller commits.
+    """
+    outcome = ImportOutcome()
+    references = _References(order.warehouse_id)
+    batch: list[_Record] = []
+    async for record in _records(chunks, fmt, outcome):
+        batch.append(record)
+        if len(batch) >= IMPORT_CHUNK_SIZE:
+            await _import_chunk(session, order, references, batch, outcome)
+            batch = []
+    if batch:
+        await _import_chunk(session, order, references, batch, outcome)
+    # parse errors are found before reference errors of the same chunk
+    outcome.errors.sort(key=lambda error: error.line)
+    await rebuild_inbound_counters(session, [order.id])
+    return outcome
+
+
+async def import_asn(
+    session: AsyncSession,
+    external_number: str,
+    warehouse_id: int,
+    partner_id: int | None,
+    chunks: AsyncIterator[bytes],
+    fmt: AsnFormat,
+) -> tuple[InboundOrder, ImportOutcome]:
+    """
+    Create an inbound order from an ASN file. The caller checks that the
+    warehouse and partner exist and commits.
+    """
+    order = InboundOrder(
+        external_number=external_number,
+        warehouse_id=warehouse_id,
+        partner_id=partner_id,
+        status=InboundStatus.created,
+    )
+    session.add(order)
+    await session.flush()
+    return order, await import_asn_lines(session, order, chunks, fmt)
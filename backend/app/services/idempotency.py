@@ -0,0 +1,219 @@
+"""
+Stored responses of mutating requests sent with an Idempotency-Key header.
+
+The first request with a key claims it by inserting a row without a
+response, in its own short transaction. The claim is marked completed by
+complete_key inside the transaction that commits the handler's writes,
+fenced by the claim's created_at: a request whose claim was taken over
+after the lease cannot commit, and a committed write can never run again.
+The response is saved right after. A retry with the same key gets the saved
+response, or KeyInProgress while the first request is still running. Only
+successful responses are kept: after an error before the commit the key is
+released, since the failed request changed nothing and may simply run
+again. Keys live for the TTL and are then deleted by purge_idempotency_keys.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import IdempotencyKey
+
+PURGE_BATCH_SIZE = 1000
+
+
+class KeyInProgress(Exception):
+    pass
+
+
+class KeyReused(Exception):
+    pass
+
+
+class ResponseLost(Exception):
+    """The request was applied, but its response was not saved."""
+
+
+class ClaimLost(Exception):
+    """The claim was taken over by a retry after the lease ran out."""
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    content_type: str | None
+    body: bytes
+
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def request_fingerprint(method: str, path: str, query: str, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query.encode(), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+async def claim_key(
+    session: AsyncSession,
+    key: str,
+    fingerprint: str,
+    ttl_seconds: int,
+    lease_seconds: int,
+    now: datetime,
+) -> StoredResponse | None:
+    """
+    Claim key for a new request, or return the saved response of an earlier one.
+
+    now becomes the claim's created_at, which later writes of the claim are
+    fenced on. Raises KeyReused when the key was used for a different
+    request, KeyInProgress while the request holding it has not committed
+    and ResponseLost when it committed but its response was not saved.
+    A claim that has not committed after lease_seconds is treated as
+    abandoned and taken over. Commits.
+    """
+    now = _to_utc(now)
+    session.add(IdempotencyKey(key=key, fingerprint=fingerprint, created_at=now))
+    try:
+        await session.commit()
+        return None
+    except IntegrityError:
+        await session.rollback()
+
+    # plain columns: the row must not sit in the identity map if it is replaced
+    row = (
+        await session.execute(
+            select(
+                IdempotencyKey.fingerprint,
+                IdempotencyKey.status_code,
+                IdempotencyKey.content_type,
+                IdempotencyKey.body,
+                IdempotencyKey.created_at,
+            ).where(IdempotencyKey.key == key)
+        )
+    ).first()
+    created_at = _to_utc(row.created_at) if row is not None else None
+    expired = created_at is None or created_at < now - timedelta(seconds=ttl_seconds)
+    abandoned = (
+        row is not None
+        and row.status_code is None
+        and created_at < now - timedelta(seconds=lease_seconds)
+    )
+    if expired or abandoned:
+        # of several concurrent retries only one removes the row it has seen
+        # and inserts its own; the others find a fresh claim. An abandoned
+        # claim completed meanwhile by its own request is not removed.
+        if row is not None:
+            stale = delete(IdempotencyKey).where(
+                IdempotencyKey.key == key, IdempotencyKey.created_at == row.created_at
+            )
+            if not expired:
+                stale = stale.where(IdempotencyKey.status_code.is_(None))
+            result = await session.execute(stale)
+            if not result.rowcount:
+                await session.rollback()
+                raise KeyInProgress(key)
+        session.add(IdempotencyKey(key=key, fingerprint=fingerprint, created_at=now))
+        try:
+            await session.commit()
+            return None
+        except IntegrityError:
+            await session.rollback()
+            raise KeyInProgress(key)
+
+    if row.fingerprint != fingerprint:
+        raise KeyReused(key)
+    if row.status_code is None:
+        raise KeyInProgress(key)
+    if row.body is None:
+        raise ResponseLost(key)
+    return StoredResponse(row.status_code, row.content_type, row.body)
+
+
+def _claim(key: str, claimed_at: datetime):
+    return (IdempotencyKey.key == key, IdempotencyKey.created_at == claimed_at)
+
+
+def complete_key(session: Session, key: str, claimed_at: datetime, status_code: int) -> None:
+    """
+    Mark a claim completed in the transaction that commits the request's writes.
+
+    Called from the before_commit hook of the handler's session, so the mark
+    and the writes commit together. Raises ClaimLost, failing that commit,
+    when the claim has been taken over.
+    """
+    result = session.execute(
+        update(IdempotencyKey)
+        .where(*_claim(key, claimed_at), IdempotencyKey.status_code.is_(None))
+        .values(status_code=status_code)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        raise ClaimLost(key)
+
+
+async def save_response(
+    session: AsyncSession,
+    key: str,
+    claimed_at: datetime,
+    status_code: int,
+    content_type: str | None,
+    body: bytes,
+) -> None:
+    await session.execute(
+        update(IdempotencyKey)
+        .where(*_claim(key, claimed_at))
+        .values(status_code=status_code, content_type=content_type, body=body)
+    )
+    await session.commit()
+
+
+async def release_key(session: AsyncSession, key: str, claimed_at: datetime) -> None:
+    """Forget a claimed key whose request failed uncommitted, so a retry runs it again."""
+    await session.rollback()
+    await session.execute(
+        delete(IdempotencyKey).where(
+            *_claim(key, claimed_at), IdempotencyKey.status_code.is_(None)
+        )
+    )
+    await session.commit()
+
+
+async def purge_idempotency_keys(
+    session: AsyncSession,
+    ttl_seconds: int,
+    batch_size: int = PURGE_BATCH_SIZE,
+    now: datetime | None = None,
+) -> int:
+    """
+    Delete keys older than the TTL, batch_size rows per transaction.
+
+    Returns the number of deleted keys.
+    """
+    cutoff = _to_utc(now or datetime.now(timezone.utc)) - timedelta(seconds=ttl_seconds)
+    deleted = 0
+    while True:
+        batch = (
+            select(IdempotencyKey.key)
+            .where(IdempotencyKey.created_at < cutoff)
+            .order_by(IdempotencyKey.created_at)
+            .limit(batch_size)
+        )
+        result = await session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.key.in_(batch), IdempotencyKey.created_at < cutoff)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        deleted += result.rowcount or 0
+        if (result.rowcount or 0) < batch_size:
+            return deleted
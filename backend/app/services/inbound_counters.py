@@ -0,0 +1,145 @@
+"""
+Line counters of inbound orders.
+
+InboundOrder keeps how many of its lines are matched (received ==
+expected), over-received and mis-sorted, so its status is derived without
+walking the lines. Every change to a line's quantities or line_status is
+folded into a CounterDelta with track(), and the delta is added to the
+order row in SQL by apply_counter_delta, so concurrent scans of one order
+add up instead of overwriting each other. The SQL rebuild below counts
+with the same rules.
+"""
+from dataclasses import dataclass
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import InboundOrder, InboundOrderLine, InboundStatus
+
+
+class LineFlags(NamedTuple):
+    matched: int
+    over: int
+    mis_sort: int
+
+
+def line_flags(line: InboundOrderLine) -> LineFlags:
+    expected = line.expected_qty or 0
+    received = line.received_qty or 0
+    return LineFlags(
+        matched=int(received == expected),
+        over=int(received > expected),
+        mis_sort=int(line.line_status == "mis_sort" or expected == 0),
+    )
+
+
+@dataclass
+class CounterDelta:
+    """Change of an order's line counters, collected line by line."""
+
+    total: int = 0
+    matched: int = 0
+    over: int = 0
+    mis_sort: int = 0
+
+    def track(self, line: InboundOrderLine, before: LineFlags | None = None) -> None:
+        """
+        Fold the change of one line in.
+
+        before is line_flags(line) taken before the change; None for a line
+        just added to the order.
+        """
+        after = line_flags(line)
+        if before is None:
+            before = LineFlags(0, 0, 0)
+            self.total += 1
+        self.matched += after.matched - before.matched
+        self.over += after.over - before.over
+        self.mis_sort += after.mis_sort - before.mis_sort
+
+    def assign(self, order: InboundOrder) -> None:
+        """Set the counters of an order that is not in the database yet."""
+        order.lines_total = self.total
+        order.lines_matched = self.matched
+        order.lines_over = self.over
+        order.lines_mis_sort = self.mis_sort
+
+
+async def apply_counter_delta(
+    session: AsyncSession, order: InboundOrder, delta: CounterDelta
+) -> None:
+    """
+    Add delta to the order's counters with one UPDATE ... RETURNING.
+
+    The increments are computed by the database on the current row, which
+    stays locked until commit, so a concurrent scan waits and then adds to
+    the new values. The returned counters are loaded onto order, ready for
+    derive_status. An empty delta just reads the current counters.
+    """
+    row = (
+        await session.execute(
+            update(InboundOrder)
+            .where(InboundOrder.id == order.id)
+            .values(
+                lines_total=InboundOrder.lines_total + delta.total,
+                lines_matched=InboundOrder.lines_matched + delta.matched,
+                lines_over=InboundOrder.lines_over + delta.over,
+                lines_mis_sort=InboundOrder.lines_mis_sort + delta.mis_sort,
+            )
+            .returning(
+                InboundOrder.lines_total,
+                InboundOrder.lines_matched,
+                InboundOrder.lines_over,
+                InboundOrder.lines_mis_sort,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    ).one()
+    for name, value in row._mapping.items():
+        set_committed_value(order, name, value)
+
+
+def derive_status(order: InboundOrder) -> InboundStatus:
+    if order.lines_mis_sort:
+        return InboundStatus.mis_sort
+    if order.lines_over:
+        return InboundStatus.problem
+    if order.lines_total and order.lines_matched == order.lines_total:
+        return InboundStatus.received
+    return InboundStatus.receiving
+
+
+def _count_lines(*conditions):
+    return (
+        select(func.count(InboundOrderLine.id))
+        .where(InboundOrderLine.inbound_order_id == InboundOrder.id, *conditions)
+        .correlate(InboundOrder)
+        .scalar_subquery()
+    )
+
+
+async def rebuild_inbound_counters(
+    session: AsyncSession, order_ids: Iterable[int] | None = None
+) -> int:
+    """
+    Recount the line counters of inbound orders from their lines.
+
+    Statuses are left alone: they may have been set by hand. Returns the
+    number of orders updated.
+    """
+    stmt = update(InboundOrder).values(
+        lines_total=_count_lines(),
+        lines_matched=_count_lines(InboundOrderLine.received_qty == InboundOrderLine.expected_qty),
+        lines_over=_count_lines(InboundOrderLine.received_qty > InboundOrderLine.expected_qty),
+        lines_mis_sort=_count_lines(
+            or_(InboundOrderLine.line_status == "mis_sort", InboundOrderLine.expected_qty == 0)
+        ),
+        # a repair is not a change of the order
+        updated_at=InboundOrder.updated_at,
+    )
+    if order_ids is not None:
+        stmt = stmt.where(InboundOrder.id.in_(list(order_ids)))
+    result = await session.execute(stmt.execution_options(synchronize_session=False))
+    return result.rowcount or 0
@@ -1,31 +1,45 @@
-from sqlalchemy import select
+from typing import Iterable, Sequence
+
+from sqlalchemy import String, cast, delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models.inventory import Inventory
+from app.models.inventory import Inventory, InventoryAvailability
 from app.models.item import Item
-from app.models.warehouse import Location, Warehouse
+from app.models.warehouse import Location, Warehouse, Zone
+from app.services.ref_cache import reference_cache
 from fastapi import HTTPException, status
 
+# dialects with native INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# rows per multi-row upsert; keeps bind parameters under driver limits
+UPSERT_CHUNK_SIZE = 1000
+
+InventoryKey = tuple[int, int, int]
+# (warehouse_id, location_id, item_id, signed quantity delta)
+StockChange = tuple[int, int, int, int]
+AvailabilityKey = tuple[int, int, str]
+
+# zone_type of availability counters for locations without a zone
+UNASSIGNED_ZONE = "unassigned"
 
-async def increment_inventory(
-    session: AsyncSession,
-    warehouse_id: int,
-    location_id: int,
-    item_id: int,
-    qty: int,
-    tare_id: int | None = None,
-) -> Inventory:
-    if qty <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Quantity must be greater than zero",
-        )
 
-    warehouse = await session.get(Warehouse, warehouse_id)
+async def _check_references(
+    session: AsyncSession, warehouse_id: int, location_id: int, item_id: int
+) -> None:
+    """
+    Validate warehouse, location and item; served from the reference cache when warm.
+    """
+    warehouse = await reference_cache.warehouse(session, warehouse_id)
     if warehouse is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found")
 
-    location = await session.get(Location, location_id)
+    location = await reference_cache.location(session, location_id)
     if location is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Location not found")
     if location.warehouse_id != warehouse_id:
@@ -33,10 +47,40 @@ async def increment_inventory(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Location not in warehouse"
         )
 
-    item = await session.get(Item, item_id)
+    item = await reference_cache.item(session, item_id)
     if item is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
 
+
+def _supports_upsert(session: AsyncSession) -> bool:
+    return session.get_bind().dialect.name in _UPSERT_INSERTS
+
+
+def _upsert_statement(session: AsyncSession, values: dict | list[dict]):
+    """
+    Build INSERT ... ON CONFLICT DO UPDATE that adds quantities to existing rows.
+    """
+    insert_fn = _UPSERT_INSERTS[session.get_bind().dialect.name]
+    stmt = insert_fn(Inventory).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=[Inventory.warehouse_id, Inventory.location_id, Inventory.item_id],
+        set_={
+            "quantity": Inventory.quantity + stmt.excluded.quantity,
+            "tare_id": func.coalesce(stmt.excluded.tare_id, Inventory.tare_id),
+            "version": Inventory.version + 1,
+            "updated_at": func.now(),
+        },
+    ).returning(Inventory)
+
+
+async def _increment_via_select(
+    session: AsyncSession,
+    warehouse_id: int,
+    location_id: int,
+    item_id: int,
+    qty: int,
+    tare_id: int | None,
+) -> Inventory:
     inv = (
         await session.execute(
             select(Inventory).where(
@@ -62,3 +106,479 @@ async def increment_inventory(
             inv.tare_id = tare_id
 
     return inv
+
+
+async def increment_inventory(
+    session: AsyncSession,
+    warehouse_id: int,
+    location_id: int,
+    item_id: int,
+    qty: int,
+    tare_id: int | None = None,
+) -> Inventory:
+    """
+    Add qty to the (warehouse, location, item) row, creating it if needed.
+
+    On PostgreSQL and SQLite this is one atomic upsert, so concurrent writers
+    cannot lose each other's increments.
+    """
+    if qty <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quantity must be greater than zero",
+        )
+
+    await _check_references(session, warehouse_id, location_id, item_id)
+
+    await record_stock_changes(session, [(warehouse_id, location_id, item_id, qty)])
+
+    if not _supports_upsert(session):
+        return await _increment_via_select(
+            session, warehouse_id, location_id, item_id, qty, tare_id
+        )
+
+    stmt = _upsert_statement(
+        session,
+        {
+            "warehouse_id": warehouse_id,
+            "location_id": location_id,
+            "item_id": item_id,
+            "tare_id": tare_id,
+            "quantity": qty,
+        },
+    )
+    result = await session.execute(stmt, execution_options={"populate_existing": True})
+    return result.scalar_one()
+
+
+def _missing_detail(label: str, missing: set[int]) -> str:
+    return f"{label} not found: {', '.join(map(str, sorted(missing)))}"
+
+
+async def check_references_bulk(
+    session: AsyncSession, rows: Sequence[tuple[int, int, int, int]]
+) -> None:
+    """
+    Set-based variant of the reference checks for (warehouse, location, item, qty) rows.
+    """
+    warehouse_ids = {row[0] for row in rows}
+    location_ids = {row[1] for row in rows}
+    item_ids = {row[2] for row in rows}
+
+    existing_warehouses = set(
+        (
+            await session.execute(select(Warehouse.id).where(Warehouse.id.in_(warehouse_ids)))
+        ).scalars()
+    )
+    missing = warehouse_ids - existing_warehouses
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=_missing_detail("Warehouses", missing)
+        )
+
+    location_warehouses = dict(
+        (
+            await session.execute(
+                select(Location.id, Location.warehouse_id).where(Location.id.in_(location_ids))
+            )
+        ).all()
+    )
+    missing = location_ids - set(location_warehouses)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=_missing_detail("Locations", missing)
+        )
+    for warehouse_id, location_id, _, _ in rows:
+        if location_warehouses[location_id] != warehouse_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Location {location_id} does not belong to warehouse {warehouse_id}",
+            )
+
+    existing_items = set(
+        (await session.execute(select(Item.id).where(Item.id.in_(item_ids)))).scalars()
+    )
+    missing = item_ids - existing_items
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=_missing_detail("Items", missing)
+        )
+
+
+async def bulk_increment_inventory(
+    session: AsyncSession,
+    rows: Sequence[tuple[int, int, int, int]],
+) -> dict[InventoryKey, Inventory]:
+    """
+    Apply many (warehouse_id, location_id, item_id, qty) increments at once.
+
+    Rows hitting the same key are folded before writing, so each key is
+    upserted exactly once. Returns the resulting rows keyed by
+    (warehouse_id, location_id, item_id).
+    """
+    if any(qty <= 0 for *_, qty in rows):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quantity must be greater than zero",
+        )
+
+    await check_references_bulk(session, rows)
+
+    totals: dict[InventoryKey, int] = {}
+    for warehouse_id, location_id, item_id, qty in rows:
+        key = (warehouse_id, location_id, item_id)
+        totals[key] = totals.get(key, 0) + qty
+
+    await record_stock_changes(session, [(*key, qty) for key, qty in totals.items()])
+    return await _add_quantities(session, totals)
+
+
+async def _add_quantities(
+    session: AsyncSession, totals: dict[InventoryKey, int]
+) -> dict[InventoryKey, Inventory]:
+    result: dict[InventoryKey, Inventory] = {}
+    if not _supports_upsert(session):
+        for (warehouse_id, location_id, item_id), qty in totals.items():
+            result[(warehouse_id, location_id, item_id)] = await _increment_via_select(
+                session, warehouse_id, location_id, item_id, qty, None
+            )
+        return result
+
+    values = [
+        {
+            "warehouse_id": warehouse_id,
+            "location_id": location_id,
+            "item_id": item_id,
+            "tare_id": None,
+            "quantity": qty,
+        }
+        for (warehouse_id, location_id, item_id), qty in totals.items()
+    ]
+    for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+        stmt = _upsert_statement(session, values[start : start + UPSERT_CHUNK_SIZE])
+        upserted = await session.execute(stmt, execution_options={"populate_existing": True})
+        for inv in upserted.scalars():
+            result[(inv.warehouse_id, inv.location_id, inv.item_id)] = inv
+    return result
+
+
+async def lock_inventory_rows(
+    session: AsyncSession, keys: set[InventoryKey]
+) -> dict[InventoryKey, Inventory]:
+    """
+    SELECT ... FOR UPDATE the existing rows for keys.
+
+    Rows are locked in (location_id, item_id) order, so two batches touching
+    the same rows always queue instead of deadlocking.
+    """
+    locked: dict[InventoryKey, Inventory] = {}
+    ordered = sorted(keys, key=lambda k: (k[1], k[2], k[0]))
+    for start in range(0, len(ordered), UPSERT_CHUNK_SIZE):
+        chunk = ordered[start : start + UPSERT_CHUNK_SIZE]
+        stmt = (
+            select(Inventory)
+            .where(
+                # plain IN on the key prefix lets every dialect seek the unique index
+                Inventory.warehouse_id.in_({k[0] for k in chunk}),
+                Inventory.location_id.in_({k[1] for k in chunk}),
+                tuple_(Inventory.warehouse_id, Inventory.location_id, Inventory.item_id).in_(
+                    chunk
+                ),
+            )
+            .order_by(Inventory.location_id, Inventory.item_id, Inventory.warehouse_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        for inv in (await session.execute(stmt)).scalars():
+            locked[(inv.warehouse_id, inv.location_id, inv.item_id)] = inv
+    return locked
+
+
+async def apply_inventory_moves(
+    session: AsyncSession,
+    moves: Sequence[tuple[int, int, int, int, int]],
+) -> None:
+    """
+    Apply (warehouse_id, from_location_id, to_location_id, item_id, qty) moves.
+
+    Moves are netted per (warehouse, location, item) first; each source must
+    cover its net outflow. Affected rows are locked once, then written with
+    one bulk UPDATE plus one upsert for rows that do not exist yet.
+    """
+    location_ids: set[int] = set()
+    deltas: dict[InventoryKey, int] = {}
+    for warehouse_id, from_location_id, to_location_id, item_id, qty in moves:
+        if from_location_id == to_location_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot move to same location",
+            )
+        location_ids.update((from_location_id, to_location_id))
+        source = (warehouse_id, from_location_id, item_id)
+        target = (warehouse_id, to_location_id, item_id)
+        deltas[source] = deltas.get(source, 0) - qty
+        deltas[target] = deltas.get(target, 0) + qty
+
+    location_warehouses = dict(
+        (
+            await session.execute(
+                select(Location.id, Location.warehouse_id).where(Location.id.in_(location_ids))
+            )
+        ).all()
+    )
+    missing = location_ids - set(location_warehouses)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=_missing_detail("Locations", missing)
+        )
+    for warehouse_id, location_id, _ in deltas:
+        if location_warehouses[location_id] != warehouse_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Location {location_id} does not belong to warehouse {warehouse_id}",
+            )
+
+    deltas = {key: delta for key, delta in deltas.items() if delta != 0}
+    locked = await lock_inventory_rows(session, set(deltas))
+
+    updates: list[tuple[Inventory, int]] = []
+    emptied: list[Inventory] = []
+    inserts: dict[InventoryKey, int] = {}
+    for key, delta in deltas.items():
+        inv = locked.get(key)
+        current = inv.quantity if inv is not None else 0
+        reserved = inv.reserved_qty if inv is not None else 0
+        # reserved stock belongs to open picking tasks and cannot be moved
+        if current + delta < reserved:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    f"Not enough quantity on source location {key[1]} for item {key[2]}"
+                ),
+            )
+        if inv is None:
+            inserts[key] = delta
+        elif current + delta == 0:
+            emptied.append(inv)
+        else:
+            updates.append((inv, current + delta))
+
+    if updates:
+        # passing the current version makes each UPDATE a compare-and-swap
+        await session.execute(
+            update(Inventory),
+            [{"id": inv.id, "quantity": qty, "version": inv.version} for inv, qty in updates],
+        )
+        for inv, qty in updates:
+            set_committed_value(inv, "quantity", qty)
+            set_committed_value(inv, "version", inv.version + 1)
+    for inv in emptied:
+        # version-checked DELETE, same as the UPDATE path
+        await session.delete(inv)
+    if inserts:
+        await _add_quantities(session, inserts)
+    await record_stock_changes(session, [(*key, delta) for key, delta in deltas.items()])
+
+
+async def decrement_inventory(
+    session: AsyncSession, inv: Inventory, qty: int, release: int = 0
+) -> None:
+    """
+    Take qty from a loaded inventory row; the row is deleted when it reaches zero.
+
+    release is the part of qty that was reserved (a pick against its own
+    reservation). The caller checks that the row holds enough. The change is
+    version-checked on flush like any other ORM update.
+    """
+    await decrement_inventory_rows(session, [(inv, qty, release)])
+
+
+async def decrement_inventory_rows(
+    session: AsyncSession, takes: Iterable[tuple[Inventory, int, int]]
+) -> None:
+    """decrement_inventory for many (row, qty, release) at once, with one counter upsert."""
+    changes: list[StockChange] = []
+    for inv, qty, release in takes:
+        inv.reserved_qty -= min(release, inv.reserved_qty)
+        inv.quantity -= qty
+        if inv.quantity == 0:
+            await session.delete(inv)
+        changes.append((inv.warehouse_id, inv.location_id, inv.item_id, -qty))
+    await record_stock_changes(session, changes)
+
+
+async def _location_zone_types(
+    session: AsyncSession, location_ids: set[int]
+) -> dict[int, str | None]:
+    zone_types: dict[int, str | None] = {}
+    ordered = sorted(location_ids)
+    for start in range(0, len(ordered), UPSERT_CHUNK_SIZE):
+        rows = await session.execute(
+            select(Location.id, cast(Zone.zone_type, String))
+            .outerjoin(Zone, Zone.id == Location.zone_id)
+            .where(Location.id.in_(ordered[start : start + UPSERT_CHUNK_SIZE]))
+        )
+        zone_types.update(rows.all())
+    return zone_types
+
+
+async def record_stock_changes(session: AsyncSession, changes: Iterable[StockChange]) -> None:
+    """
+    Fold stock deltas into the per-(warehouse, item, zone type) availability counters.
+
+    Must run in the transaction that changes the inventory rows. Zone types
+    are read from the database in that transaction, not from the per-process
+    reference cache, which other workers only see refreshed after its TTL.
+    Counters are written with one upsert in key order, so concurrent writers
+    queue on the same rows instead of deadlocking.
+    """
+    changes = list(changes)
+    zone_types = await _location_zone_types(session, {change[1] for change in changes})
+    deltas: dict[AvailabilityKey, int] = {}
+    for warehouse_id, location_id, item_id, delta in changes:
+        key = (warehouse_id, item_id, zone_types.get(location_id) or UNASSIGNED_ZONE)
+        deltas[key] = deltas.get(key, 0) + delta
+    await _apply_availability_deltas(session, deltas)
+
+
+async def restate_location_availability(
+    session: AsyncSession, location_ids: Iterable[int], previous_zone_type: str | None
+) -> None:
+    """
+    Move the stock of locations whose zone type changed to the counters of the new type.
+
+    Call after the location or zone change is flushed; previous_zone_type is
+    the type the locations had before it (None for no zone). The stock rows
+    are locked first, so writers to them wait for this transaction and then
+    count under the new type. Counters stay keyed by the inventory row's
+    warehouse, the same as record_stock_changes and rebuild_availability.
+    """
+    location_ids = sorted(set(location_ids))
+    if not location_ids:
+        return
+    zone_types = await _location_zone_types(session, set(location_ids))
+    previous = previous_zone_type or UNASSIGNED_ZONE
+    deltas: dict[AvailabilityKey, int] = {}
+    for start in range(0, len(location_ids), UPSERT_CHUNK_SIZE):
+        rows = await session.execute(
+            select(
+                Inventory.warehouse_id, Inventory.location_id, Inventory.item_id, Inventory.quantity
+            )
+            .where(Inventory.location_id.in_(location_ids[start : start + UPSERT_CHUNK_SIZE]))
+            .order_by(Inventory.warehouse_id, Inventory.location_id, Inventory.item_id)
+            .with_for_update()
+        )
+        for warehouse_id, location_id, item_id, qty in rows:
+            current = zone_types.get(location_id) or UNASSIGNED_ZONE
+            if current == previous:
+                continue
+            for key, delta in (
+                ((warehouse_id, item_id, previous), -qty),
+                ((warehouse_id, item_id, current), qty),
+            ):
+                deltas[key] = deltas.get(key, 0) + delta
+    await _apply_availability_deltas(session, deltas)
+
+
+async def _apply_availability_deltas(
+    session: AsyncSession, deltas: dict[AvailabilityKey, int]
+) -> None:
+    keys = sorted(key for key, delta in deltas.items() if delta != 0)
+    if not keys:
+        return
+
+    if not _supports_upsert(session):
+        for key in keys:
+            counter = await session.get(InventoryAvailability, key)
+            if counter is None:
+                warehouse_id, item_id, zone_type = key
+                session.add(
+                    InventoryAvailability(
+                        warehouse_id=warehouse_id,
+                        item_id=item_id,
+                        zone_type=zone_type,
+                        quantity=deltas[key],
+                    )
+                )
+            else:
+                counter.quantity += deltas[key]
+        return
+
+    insert_fn = _UPSERT_INSERTS[session.get_bind().dialect.name]
+    values = [
+        {"warehouse_id": wh, "item_id": item, "zone_type": zone, "quantity": deltas[(wh, item, zone)]}
+        for wh, item, zone in keys
+    ]
+    for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+        stmt = insert_fn(InventoryAvailability).values(values[start : start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                InventoryAvailability.warehouse_id,
+                InventoryAvailability.item_id,
+                InventoryAvailability.zone_type,
+            ],
+            set_={
+                "quantity": InventoryAvailability.quantity + stmt.excluded.quantity,
+                "updated_at": func.now(),
+            },
+        )
+        await session.execute(stmt)
+
+
+async def rebuild_availability(
+    session: AsyncSession, warehouse_ids: Iterable[int] | None = None
+) -> int:
+    """
+    Recompute availability counters from inventory rows.
+
+    Repair tool behind the CLI, not called by request handlers: writes that
+    run concurrently with a rebuild of the same warehouse may be lost, so it
+    is meant for quiet periods. Returns the number of counters.
+    """
+    zone_type = func.coalesce(cast(Zone.zone_type, String), UNASSIGNED_ZONE)
+    source = (
+        select(Inventory.warehouse_id, Inventory.item_id, zone_type, func.sum(Inventory.quantity))
+        .join(Location, Location.id == Inventory.location_id)
+        .outerjoin(Zone, Zone.id == Location.zone_id)
+        .group_by(Inventory.warehouse_id, Inventory.item_id, zone_type)
+    )
+    clear = delete(InventoryAvailability)
+    if warehouse_ids is not None:
+        warehouse_ids = list(warehouse_ids)
+        source = source.where(Inventory.warehouse_id.in_(warehouse_ids))
+        clear = clear.where(InventoryAvailability.warehouse_id.in_(warehouse_ids))
+
+    await session.execute(clear.execution_options(synchronize_session=False))
+    result = await session.execute(
+        insert(InventoryAvailability).from_select(
+            ["warehouse_id", "item_id", "zone_type", "quantity"], source
+        )
+    )
+    return result.rowcount or 0
+
+
+async def compact_zero_inventory(session: AsyncSession, batch_size: int) -> int:
+    """
+    Delete inventory rows whose quantity dropped to zero, batch_size rows per transaction.
+
+    The outer `quantity = 0` is re-checked by the DELETE itself, so a row
+    topped up concurrently between the subselect and the delete survives.
+    Returns the number of deleted rows.
+    """
+    deleted = 0
+    while True:
+        batch = (
+            select(Inventory.id)
+            .where(Inventory.quantity == 0)
+            .order_by(Inventory.id)
+            .limit(batch_size)
+        )
+        result = await session.execute(
+            delete(Inventory)
+            .where(Inventory.id.in_(batch), Inventory.quantity == 0)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        deleted += result.rowcount or 0
+        if (result.rowcount or 0) < batch_size:
+            return deleted
@@ -0,0 +1,195 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Item, Location, Warehouse, Zone
+
+V = TypeVar("V")
+
+
+@dataclass(frozen=True)
+class WarehouseRef:
+    id: int
+    code: str
+    is_active: bool
+    allocation_strategy: str | None
+
+
+@dataclass(frozen=True)
+class LocationRef:
+    id: int
+    warehouse_id: int
+    zone_id: int | None
+    zone_type: str | None
+    code: str
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class ItemRef:
+    id: int
+    sku: str
+    is_active: bool
+
+
+class TTLCache(Generic[V]):
+    """
+    LRU cache whose entries also expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> V | None:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: V) -> None:
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[V], bool]) -> None:
+        for key in [k for k, (_, v) in self._data.items() if predicate(v)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class ReferenceCache:
+    """
+    In-process cache of reference rows (warehouses, locations with zone type, items).
+
+    Values are immutable snapshots, never ORM instances, so they can be shared
+    across sessions. Misses are not cached. Handlers that change reference data
+    must call the matching invalidate_* method; the TTL bounds staleness for
+    changes made by other processes.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.warehouses: TTLCache[WarehouseRef] = TTLCache(maxsize, ttl)
+        self.locations: TTLCache[LocationRef] = TTLCache(maxsize, ttl)
+        self.items: TTLCache[ItemRef] = TTLCache(maxsize, ttl)
+
+    async def warehouse(self, session: AsyncSession, warehouse_id: int) -> WarehouseRef | None:
+        ref = self.warehouses.get(warehouse_id)
+        if ref is None:
+            row = (
+                await session.execute(
+                    select(
+                        Warehouse.id,
+                        Warehouse.code,
+                        Warehouse.is_active,
+                        Warehouse.allocation_strategy,
+                    ).where(
+                        Warehouse.id == warehouse_id
+                    )
+                )
+            ).one_or_none()
+            if row is None:
+                return None
+            ref = WarehouseRef(*row)
+            self.warehouses.set(warehouse_id, ref)
+        return ref
+
+    async def location(self, session: AsyncSession, location_id: int) -> LocationRef | None:
+        ref = self.locations.get(location_id)
+        if ref is None:
+            row = (
+                await session.execute(
+                    select(
+                        Location.id,
+                        Location.warehouse_id,
+                        Location.zone_id,
+                        Zone.zone_type,
+                        Location.code,
+                        Location.is_active,
+                    )
+                    .outerjoin(Zone, Location.zone_id == Zone.id)
+                    .where(Location.id == location_id)
+                )
+            ).one_or_none()
+            if row is None:
+                return None
+            zone_type = getattr(row.zone_type, "value", row.zone_type)
+            ref = LocationRef(
+                id=row.id,
+                warehouse_id=row.warehouse_id,
+                zone_id=row.zone_id,
+                zone_type=zone_type,
+                code=row.code,
+                is_active=row.is_active,
+            )
+            self.locations.set(location_id, ref)
+        return ref
+
+    async def item(self, session: AsyncSession, item_id: int) -> ItemRef | None:
+        ref = self.items.get(item_id)
+        if ref is None:
+            row = (
+                await session.execute(
+                    select(Item.id, Item.sku, Item.is_active).where(Item.id == item_id)
+                )
+            ).one_or_none()
+            if row is None:
+                return None
+            ref = ItemRef(*row)
+            self.items.set(item_id, ref)
+        return ref
+
+    def invalidate_warehouse(self, warehouse_id: int) -> None:
+        self.warehouses.invalidate(warehouse_id)
+        self.locations.invalidate_where(lambda ref: ref.warehouse_id == warehouse_id)
+
+    def invalidate_zone(self, zone_id: int) -> None:
+        self.locations.invalidate_where(lambda ref: ref.zone_id == zone_id)
+
+    def invalidate_location(self, location_id: int) -> None:
+        self.locations.invalidate(location_id)
+
+    def invalidate_item(self, item_id: int) -> None:
+        self.items.invalidate(item_id)
+
+    def clear(self) -> None:
+        self.warehouses.clear()
+        self.locations.clear()
+        self.items.clear()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            "warehouses": self.warehouses.stats(),
+            "locations": self.locations.stats(),
+            "items": self.items.stats(),
+        }
+
+
+reference_cache = ReferenceCache(
+    maxsize=settings.ref_cache_max_entries, ttl=settings.ref_cache_ttl_seconds
+)
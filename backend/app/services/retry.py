@@ -0,0 +1,46 @@
+import asyncio
+import functools
+import random
+from typing import Awaitable, Callable, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+T = TypeVar("T")
+
+
+def retry_on_conflict(
+    attempts: int = 3,
+    base_delay: float = 0.01,
+    max_delay: float = 0.2,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Re-run a unit of work when an optimistic version check fails.
+
+    The decorated coroutine takes the session as its first argument and must
+    do all of its reads, writes and the commit itself: on StaleDataError the
+    session is rolled back and the whole function runs again after a jittered
+    exponential backoff. When attempts are exhausted the caller gets 409.
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(session: AsyncSession, *args, **kwargs) -> T:
+            for attempt in range(1, attempts + 1):
+                try:
+                    return await func(session, *args, **kwargs)
+                except StaleDataError:
+                    await session.rollback()
+                    if attempt == attempts:
+                        break
+                    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Concurrent update conflict, please retry",
+            )
+
+        return wrapper
+
+    return decorator
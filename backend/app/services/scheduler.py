@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PeriodicJob:
+    name: str
+    interval_seconds: int
+    run: Callable[[AsyncSession], Awaitable[object]]
+
+
+async def _run_forever(job: PeriodicJob) -> None:
+    while True:
+        await asyncio.sleep(job.interval_seconds)
+        try:
+            async with AsyncSessionLocal() as session:
+                await job.run(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # keep the loop alive, next tick retries
+            logger.exception("Periodic job %s failed", job.name)
+
+
+def start_jobs(jobs: list[PeriodicJob]) -> list[asyncio.Task]:
+    """Start enabled jobs (interval > 0) as background tasks of the running loop."""
+    return [
+        asyncio.create_task(_run_forever(job), name=f"job:{job.name}")
+        for job in jobs
+        if job.interval_seconds > 0
+    ]
+
+
+async def stop_jobs(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,219 @@
+"""
+Allocation dry run over a backlog of outbound orders.
+
+Stock is loaded once into flat NumPy arrays ordered by (warehouse, item,
+location); every (warehouse, item) owns a contiguous slice. Orders are then
+filled in sequence with the semantics of generate_wave: unreserved stock
+only, bins drawn in the order of the allocation strategy, each order all or
+nothing and consuming what earlier orders took. Nothing is written.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Inventory, Item, OutboundOrder, OutboundOrderLine, OutboundStatus
+from app.services.allocation import STRATEGIES, Bin
+
+# item ids per stock query; keeps IN lists under driver parameter limits
+STOCK_CHUNK_SIZE = 1000
+
+
+@dataclass
+class SkuOutcome:
+    item_id: int
+    requested_qty: int = 0
+    allocatable_qty: int = 0
+    # open quantity of this item in orders it could not cover
+    short_qty: int = 0
+    orders_short: int = 0
+
+
+@dataclass
+class SimulationOutcome:
+    orders_total: int = 0
+    orders_allocatable: int = 0
+    units_requested: int = 0
+    units_allocatable: int = 0
+    skus: dict[int, SkuOutcome] = field(default_factory=dict)
+
+
+class StockArrays:
+    """Unreserved stock as parallel arrays plus a slice per (warehouse, item)."""
+
+    def __init__(self, rows: Sequence[tuple[int, int, int, int, datetime | None]]):
+        # rows: (warehouse_id, item_id, location_id, available, updated_at), sorted
+        self.location_ids = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+        self.available = np.fromiter((r[3] for r in rows), dtype=np.int64, count=len(rows))
+        self.updated_at = [r[4] for r in rows]
+        self.slices: dict[tuple[int, int], tuple[int, int]] = {}
+        start = 0
+        for n in range(1, len(rows) + 1):
+            if n == len(rows) or rows[n][:2] != rows[start][:2]:
+                self.slices[rows[start][:2]] = (start, n)
+                start = n
+
+    def order(self, key: tuple[int, int], strategy: str, qty: int) -> np.ndarray:
+        """
+        Positions of the slice's non-empty bins in the order the strategy draws them.
+
+        The bins are handed to the allocation strategy itself, with the
+        position standing in for the location id: the slice is in location
+        order, so ties break the same way.
+        """
+        start, end = self.slices[key]
+        stock = zip(self.available[start:end].tolist(), self.updated_at[start:end])
+        bins = [
+            Bin(position, quantity, updated_at)
+            for position, (quantity, updated_at) in enumerate(stock)
+            if quantity > 0
+        ]
+        return np.fromiter(
+            (b.location_id for b in STRATEGIES[strategy](bins, qty)),
+            dtype=np.int64,
+            count=len(bins),
+        )
+
+
+def _take(stock: StockArrays, key: tuple[int, int], strategy: str, qty: int):
+    """(positions, quantities) covering qty, or None when the item runs short."""
+    if key not in stock.slices:
+        return None
+    start, _ = stock.slices[key]
+    order = stock.order(key, strategy, qty) + start
+    drawn = stock.available[order]
+    covered = np.cumsum(drawn)
+    k = int(np.searchsorted(covered, qty))
+    if k == len(covered):
+        return None
+    takes = drawn[: k + 1].copy()
+    takes[k] -= covered[k] - qty
+    return order[: k + 1], takes
+
+
+def simulate(
+    stock: StockArrays,
+    orders: Sequence[tuple[int, int, Sequence[tuple[int, int]]]],
+    strategies: dict[int, str],
+) -> SimulationOutcome:
+    """
+    Fill (order_id, warehouse_id, [(item_id, open_qty)]) in sequence.
+
+    Stock of allocatable orders is consumed in place. Orders without open
+    quantity are not counted. Raises ValueError for an unknown strategy name.
+    """
+    unknown = set(strategies.values()) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown allocation strategy: {', '.join(sorted(unknown))}")
+    outcome = SimulationOutcome()
+    for _, warehouse_id, lines in orders:
+        if not lines:
+            # nothing left to pick; generate would skip it
+            continue
+        strategy = strategies.get(warehouse_id, "first_found")
+        applied = []
+        short: dict[int, int] = {}
+        for item_id, qty in lines:
+            sku = outcome.skus.get(item_id)
+            if sku is None:
+                sku = outcome.skus[item_id] = SkuOutcome(item_id)
+            sku.requested_qty += qty
+            drawn = _take(stock, (warehouse_id, item_id), strategy, qty)
+            if drawn is None:
+                short[item_id] = short.get(item_id, 0) + qty
+                continue
+            positions, takes = drawn
+            stock.available[positions] -= takes
+            applied.append((positions, takes))
+
+        outcome.orders_total += 1
+        order_qty = sum(qty for _, qty in lines)
+        outcome.units_requested += order_qty
+        if short:
+            # all or nothing: give back what the covered lines took
+            for positions, takes in applied:
+                stock.available[positions] += takes
+            for item_id, qty in short.items():
+                outcome.skus[item_id].short_qty += qty
+                outcome.skus[item_id].orders_short += 1
+            continue
+        outcome.orders_allocatable += 1
+        outcome.units_allocatable += order_qty
+        for item_id, qty in lines:
+            outcome.skus[item_id].allocatable_qty += qty
+    return outcome
+
+
+async def load_backlog(
+    session: AsyncSession,
+    warehouse_id: int | None,
+    status: OutboundStatus,
+    partner_id: int | None,
+    limit: int,
+) -> list[tuple[int, int, list[tuple[int, int]]]]:
+    """Open lines of candidate orders in (created_at, id) order, as plain tuples."""
+    orders = select(OutboundOrder.id, OutboundOrder.warehouse_id, OutboundOrder.created_at).where(
+        OutboundOrder.status == status
+    )
+    if warehouse_id is not None:
+        orders = orders.where(OutboundOrder.warehouse_id == warehouse_id)
+    if partner_id is not None:
+        orders = orders.where(OutboundOrder.partner_id == partner_id)
+    orders = orders.order_by(OutboundOrder.created_at, OutboundOrder.id).limit(limit).subquery()
+
+    rows = await session.execute(
+        select(
+            orders.c.id,
+            orders.c.warehouse_id,
+            OutboundOrderLine.item_id,
+            OutboundOrderLine.ordered_qty - OutboundOrderLine.picked_qty,
+        )
+        .join(OutboundOrderLine, OutboundOrderLine.outbound_order_id == orders.c.id)
+        .order_by(orders.c.created_at, orders.c.id, OutboundOrderLine.id)
+    )
+    backlog: list[tuple[int, int, list[tuple[int, int]]]] = []
+    for order_id, order_warehouse_id, item_id, open_qty in rows:
+        if not backlog or backlog[-1][0] != order_id:
+            backlog.append((order_id, order_warehouse_id, []))
+        if open_qty > 0:
+            backlog[-1][2].append((item_id, open_qty))
+    return backlog
+
+
+async def load_stock(session: AsyncSession, keys: set[tuple[int, int]]) -> StockArrays:
+    """Unreserved stock of the given (warehouse_id, item_id) pairs."""
+    rows: list[tuple[int, int, int, int, datetime | None]] = []
+    for warehouse_id in sorted({wh for wh, _ in keys}):
+        item_ids = sorted(item for wh, item in keys if wh == warehouse_id)
+        for start in range(0, len(item_ids), STOCK_CHUNK_SIZE):
+            result = await session.execute(
+                select(
+                    Inventory.warehouse_id,
+                    Inventory.item_id,
+                    Inventory.location_id,
+                    Inventory.quantity - Inventory.reserved_qty,
+                    Inventory.updated_at,
+                )
+                .where(
+                    Inventory.warehouse_id == warehouse_id,
+                    Inventory.item_id.in_(item_ids[start : start + STOCK_CHUNK_SIZE]),
+                    Inventory.quantity > Inventory.reserved_qty,
+                )
+                .order_by(Inventory.item_id, Inventory.location_id)
+            )
+            rows.extend(tuple(row) for row in result)
+    return StockArrays(rows)
+
+
+async def sku_codes(session: AsyncSession, item_ids: set[int]) -> dict[int, str]:
+    codes: dict[int, str] = {}
+    ordered = sorted(item_ids)
+    for start in range(0, len(ordered), STOCK_CHUNK_SIZE):
+        rows = await session.execute(
+            select(Item.id, Item.sku).where(Item.id.in_(ordered[start : start + STOCK_CHUNK_SIZE]))
+        )
+        codes.update(rows.all())
+    return codes
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Inventory, InventorySnapshot, InventorySnapshotRow, Movement
+
+StockKey = tuple[int, int, int]
+
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def take_inventory_snapshot(session: AsyncSession) -> InventorySnapshot:
+    """
+    Copy current non-zero stock, folded per (warehouse, location, item), into a snapshot.
+
+    Must open the session's transaction. The watermark and the copy have to
+    see exactly the same movements, and ids are drawn in insert order, not
+    commit order. On PostgreSQL both reads run in one REPEATABLE READ
+    transaction that first takes a SHARE lock on movements: the lock waits
+    out transactions that already drew a movement id, so none at or below
+    the watermark can commit after the copy, and holds new movement writes
+    until the snapshot commits. taken_at is read after the lock is held. On
+    SQLite the snapshot INSERT takes the database write lock, which
+    serialises writers the same way.
+    """
+    snapshot = InventorySnapshot(last_movement_id=0)
+    if session.get_bind().dialect.name == "postgresql":
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        await session.execute(text(f"LOCK TABLE {Movement.__tablename__} IN SHARE MODE"))
+        # now() is the transaction start, before any wait for the lock; the
+        # snapshot must not claim a moment earlier than its watermark
+        snapshot.taken_at = func.clock_timestamp()
+    session.add(snapshot)
+    await session.flush()
+    snapshot.last_movement_id = (
+        await session.execute(select(func.max(Movement.id)))
+    ).scalar() or 0
+
+    source = (
+        select(
+            literal(snapshot.id),
+            Inventory.warehouse_id,
+            Inventory.location_id,
+            Inventory.item_id,
+            func.sum(Inventory.quantity),
+        )
+        .group_by(Inventory.warehouse_id, Inventory.location_id, Inventory.item_id)
+        .having(func.sum(Inventory.quantity) != 0)
+    )
+    result = await session.execute(
+        insert(InventorySnapshotRow).from_select(
+            ["snapshot_id", "warehouse_id", "location_id", "item_id", "quantity"], source
+        )
+    )
+    snapshot.rows_count = result.rowcount or 0
+    await session.refresh(snapshot, attribute_names=["taken_at"])
+    return snapshot
+
+
+async def prune_inventory_snapshots(
+    session: AsyncSession, retention_days: int, now: datetime | None = None
+) -> int:
+    """
+    Delete snapshots older than the retention window; the newest one is always kept.
+    """
+    cutoff = _to_utc(now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    newest_id = (await session.execute(select(func.max(InventorySnapshot.id)))).scalar()
+    if newest_id is None:
+        return 0
+    expired_ids = (
+        await session.execute(
+            select(InventorySnapshot.id).where(
+                InventorySnapshot.taken_at < cutoff, InventorySnapshot.id != newest_id
+            )
+        )
+    ).scalars().all()
+    if not expired_ids:
+        return 0
+    await session.execute(
+        delete(InventorySnapshotRow).where(InventorySnapshotRow.snapshot_id.in_(expired_ids))
+    )
+    await session.execute(delete(InventorySnapshot).where(InventorySnapshot.id.in_(expired_ids)))
+    return len(expired_ids)
+
+
+async def stock_as_of(
+    session: AsyncSession,
+    as_of: datetime,
+    warehouse_id: int | None = None,
+    location_id: int | None = None,
+    item_id: int | None = None,
+) -> dict[StockKey, int]:
+    """
+    Stock per (warehouse, location, item) at `as_of`.
+
+    Starts from the newest snapshot taken at or before `as_of` and replays only
+    the movements recorded after it; without a snapshot the whole movement log
+    is replayed.
+    """
+    as_of = _to_utc(as_of)
+    snapshot = (
+        await session.execute(
+            select(InventorySnapshot)
+            .where(InventorySnapshot.taken_at <= as_of)
+            .order_by(InventorySnapshot.taken_at.desc(), InventorySnapshot.id.desc())
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+
+    stock: dict[StockKey, int] = {}
+    if snapshot is not None:
+        rows_stmt = select(
+            InventorySnapshotRow.warehouse_id,
+            InventorySnapshotRow.location_id,
+            InventorySnapshotRow.item_id,
+            InventorySnapshotRow.quantity,
+        ).where(InventorySnapshotRow.snapshot_id == snapshot.id)
+        if warehouse_id:
+            rows_stmt = rows_stmt.where(InventorySnapshotRow.warehouse_id == warehouse_id)
+        if location_id:
+            rows_stmt = rows_stmt.where(InventorySnapshotRow.location_id == location_id)
+        if item_id:
+            rows_stmt = rows_stmt.where(InventorySnapshotRow.item_id == item_id)
+        for wh_id, loc_id, it_id, qty in (await session.execute(rows_stmt)).all():
+            stock[(wh_id, loc_id, it_id)] = qty
+
+    # incoming side (to_location) adds, outgoing side (from_location) subtracts
+    for location_col, sign in ((Movement.to_location_id, 1), (Movement.from_location_id, -1)):
+        delta_stmt = (
+            select(
+                Movement.warehouse_id,
+                location_col,
+                Movement.item_id,
+                func.sum(Movement.quantity),
+            )
+            .where(location_col.isnot(None), Movement.created_at <= as_of)
+            .group_by(Movement.warehouse_id, location_col, Movement.item_id)
+        )
+        if snapshot is not None:
+            delta_stmt = delta_stmt.where(Movement.id > snapshot.last_movement_id)
+        if warehouse_id:
+            delta_stmt = delta_stmt.where(Movement.warehouse_id == warehouse_id)
+        if location_id:
+            delta_stmt = delta_stmt.where(location_col == location_id)
+        if item_id:
+            delta_stmt = delta_stmt.where(Movement.item_id == item_id)
+        for wh_id, loc_id, it_id, qty in (await session.execute(delta_stmt)).all():
+            key = (wh_id, loc_id, it_id)
+            stock[key] = stock.get(key, 0) + sign * qty
+
+    return {key: qty for key, qty in stock.items() if qty != 0}
+
+
+async def run_snapshot_job(session: AsyncSession, retention_days: int) -> InventorySnapshot:
+    snapshot = await take_inventory_snapshot(session)
+    # commit right away: on PostgreSQL this releases the lock on movements
+    await session.commit()
+    await prune_inventory_snapshots(session, retention_days)
+    await session.commit()
+    return snapshot
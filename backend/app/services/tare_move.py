@@ -3,19 +3,10 @@ from typing import Iterable
 from fastapi import HTTPException, status
 from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.models import Inventory, Location, Tare, TareItem
-
-
-async def _load_location_with_zone(session: AsyncSession, location_id: int) -> Location | None:
-    return (
-        await session.execute(
-            select(Location)
-            .options(selectinload(Location.zone))
-            .where(Location.id == location_id)
-        )
-    ).scalar_one_or_none()
+from app.models import Inventory, Movement, Tare, TareItem
+from app.services.inventory import decrement_inventory_rows, increment_inventory
+from app.services.ref_cache import reference_cache
 
 
 async def move_tare(
@@ -33,13 +24,13 @@ async def move_tare(
     if tare is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tare not found")
 
-    target_location = await _load_location_with_zone(session, target_location_id)
+    target_location = await reference_cache.location(session, target_location_id)
     if target_location is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Target location not found",
         )
-    if target_location.zone is None:
+    if target_location.zone_type is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Target location has no zone assigned",
@@ -57,13 +48,13 @@ async def move_tare(
             detail="Tare is already at the specified location",
         )
 
-    source_location = await _load_location_with_zone(session, tare.location_id)
+    source_location = await reference_cache.location(session, tare.location_id)
     if source_location is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Source location not found",
         )
-    if source_location.zone is None:
+    if source_location.zone_type is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Source location has no zone assigned",
@@ -80,16 +71,8 @@ async def move_tare(
             detail="Source location is not in tare warehouse",
         )
 
-    from_zone_type = (
-        source_location.zone.zone_type.value
-        if hasattr(source_location.zone.zone_type, "value")
-        else str(source_location.zone.zone_type)
-    )
-    to_zone_type = (
-        target_location.zone.zone_type.value
-        if hasattr(target_location.zone.zone_type, "value")
-        else str(target_location.zone.zone_type)
-    )
+    from_zone_type = source_location.zone_type
+    to_zone_type = target_location.zone_type
 
     if allowed_from_zone_types and from_zone_type not in allowed_from_zone_types:
         raise HTTPException(
@@ -109,48 +92,49 @@ async def move_tare(
     if item_ids:
         inv_stmt: Select[Inventory] = select(Inventory).where(
             Inventory.warehouse_id == tare.warehouse_id,
+            Inventory.location_id == tare.location_id,
             Inventory.item_id.in_(item_ids),
-            Inventory.location_id.in_([tare.location_id, target_location_id]),
         )
-        inv_map = {
-            (inv.location_id, inv.item_id): inv
-            for inv in (await session.execute(inv_stmt)).scalars().all()
+        source_rows = {
+            inv.item_id: inv for inv in (await session.execute(inv_stmt)).scalars().all()
         }
 
+        takes: list[tuple[Inventory, int, int]] = []
         for ti in tare_items:
-            source_key = (tare.location_id, ti.item_id)
-            target_key = (target_location_id, ti.item_id)
-            from_inv = inv_map.get(source_key)
+            from_inv = source_rows.get(ti.item_id)
             if from_inv is None:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Inventory for item {ti.item_id} not found in source location",
                 )
-            if from_inv.quantity < ti.quantity:
+            if from_inv.quantity - from_inv.reserved_qty < ti.quantity:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Not enough quantity for item {ti.item_id} in source location",
                 )
+            takes.append((from_inv, ti.quantity, 0))
 
-            from_inv.quantity -= ti.quantity
-            if from_inv.quantity <= 0:
-                await session.delete(from_inv)
-                inv_map.pop(source_key, None)
-
-            to_inv = inv_map.get(target_key)
-            if to_inv is None:
-                to_inv = Inventory(
+        # version-checked on flush; a concurrent writer makes the whole move retry
+        await decrement_inventory_rows(session, takes)
+        for ti in tare_items:
+            # atomic upsert: two tares landing on the same row add up instead of colliding
+            await increment_inventory(
+                session,
+                warehouse_id=tare.warehouse_id,
+                location_id=target_location_id,
+                item_id=ti.item_id,
+                qty=ti.quantity,
+                tare_id=tare.id,
+            )
+            session.add(
+                Movement(
                     warehouse_id=tare.warehouse_id,
-                    location_id=target_location_id,
                     item_id=ti.item_id,
-                    tare_id=tare.id,
+                    from_location_id=tare.location_id,
+                    to_location_id=target_location_id,
                     quantity=ti.quantity,
                 )
-                session.add(to_inv)
-                inv_map[target_key] = to_inv
-            else:
-                to_inv.quantity += ti.quantity
-                to_inv.tare_id = tare.id
+            )
 
     tare.location_id = target_location_id
     return tare
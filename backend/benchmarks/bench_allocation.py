@@ -0,0 +1,161 @@
+"""
+Allocation latency vs. outbound order size.
+
+Compares the old per-line allocation (one SELECT per order line) with
+app.services.allocation (one SELECT per order) on the same data, checks that
+both produce the same picking lines and prints timings and statement counts.
+
+    python -m benchmarks.bench_allocation [--database-url URL] [--lines 10 100 500]
+
+The default database is in-memory SQLite. A PostgreSQL URL must point at a
+scratch database: the schema is created there and filled with test data.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models import (
+    Inventory,
+    Item,
+    Location,
+    OutboundOrder,
+    OutboundOrderLine,
+    Warehouse,
+)
+from app.services.allocation import Allocation, allocate_order_lines
+
+LOCATIONS_PER_ITEM = 3
+
+
+async def legacy_allocate(
+    session: AsyncSession, warehouse_id: int, lines: list[OutboundOrderLine]
+) -> list[Allocation]:
+    """The per-line loop generate_picking_task used before set-based allocation."""
+    allocations: list[Allocation] = []
+    for line in lines:
+        qty_needed = line.ordered_qty - line.picked_qty
+        if qty_needed <= 0:
+            continue
+        rows = (
+            await session.execute(
+                select(Inventory)
+                .where(
+                    Inventory.warehouse_id == warehouse_id,
+                    Inventory.item_id == line.item_id,
+                    Inventory.quantity > 0,
+                )
+                .order_by(Inventory.location_id)
+            )
+        ).scalars().all()
+        for inv in rows:
+            take = min(qty_needed, inv.quantity)
+            allocations.append(Allocation(line.item_id, inv.location_id, take))
+            qty_needed -= take
+            if qty_needed <= 0:
+                break
+    return allocations
+
+
+async def _seed(session: AsyncSession, max_lines: int) -> tuple[int, list[int]]:
+    await session.execute(insert(Warehouse), [{"id": 1, "name": "Bench", "code": "BENCH"}])
+    location_count = max_lines * LOCATIONS_PER_ITEM
+    await session.execute(
+        insert(Location),
+        [{"id": n, "warehouse_id": 1, "code": f"B-{n:06d}"} for n in range(1, location_count + 1)],
+    )
+    await session.execute(
+        insert(Item),
+        [{"id": n, "sku": f"BENCH-{n:06d}", "name": "Item"} for n in range(1, max_lines + 1)],
+    )
+    await session.execute(
+        insert(Inventory),
+        [
+            {
+                "warehouse_id": 1,
+                "location_id": (item_id - 1) * LOCATIONS_PER_ITEM + k + 1,
+                "item_id": item_id,
+                "quantity": 4,
+            }
+            for item_id in range(1, max_lines + 1)
+            for k in range(LOCATIONS_PER_ITEM)
+        ],
+    )
+    await session.commit()
+    return 1, list(range(1, max_lines + 1))
+
+
+async def _order_lines(session: AsyncSession, size: int) -> list[OutboundOrderLine]:
+    order = OutboundOrder(external_number=f"BENCH-{size}", warehouse_id=1)
+    # 10 per line: each line drains two locations and dips into a third
+    order.lines = [OutboundOrderLine(item_id=n, ordered_qty=10) for n in range(1, size + 1)]
+    session.add(order)
+    await session.commit()
+    return order.lines
+
+
+async def _measure(engine, session, allocate, lines, repeats: int):
+    statements = 0
+
+    def count(*_args):
+        nonlocal statements
+        statements += 1
+
+    timings = []
+    result = None
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            result = await allocate(session, 1, lines)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    return statistics.median(timings), statements // repeats, result
+
+
+async def run(database_url: str, sizes: list[int], repeats: int) -> None:
+    if database_url.startswith("sqlite"):
+        engine = create_async_engine(database_url, poolclass=StaticPool)
+    else:
+        engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with sessions() as session:
+        await _seed(session, max(sizes))
+        print(f"{'lines':>6} {'legacy ms':>10} {'stmts':>6} {'set-based ms':>13} {'stmts':>6}")
+        for size in sizes:
+            lines = await _order_lines(session, size)
+            legacy_ms, legacy_stmts, legacy = await _measure(
+                engine, session, legacy_allocate, lines, repeats
+            )
+            new_ms, new_stmts, allocations = await _measure(
+                engine, session, allocate_order_lines, lines, repeats
+            )
+            assert allocations == legacy, f"allocation differs for {size} lines"
+            print(f"{size:>6} {legacy_ms:>10.2f} {legacy_stmts:>6} {new_ms:>13.2f} {new_stmts:>6}")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_allocation")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 50, 100, 500, 1000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, sorted(args.lines), args.repeats))
+
+
+if __name__ == "__main__":
+    main()
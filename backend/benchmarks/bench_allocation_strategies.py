@@ -0,0 +1,86 @@
+"""
+Allocation strategies: bins visited, bins emptied and time.
+
+    python -m benchmarks.bench_allocation_strategies [--orders 2000] [--items 50]
+
+Every strategy serves the same stream of random orders from the same
+in-memory stock, bins fragmented by earlier picks included. Only the
+in-memory fill is timed, not the stock read.
+"""
+import argparse
+import copy
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.services.allocation import STRATEGIES, Bin, Candidates, InsufficientStock, fill_from_pool
+
+
+def _stock(items: int, bins_per_item: int, rng: random.Random) -> Candidates:
+    start = datetime(2026, 1, 1)
+    pool: Candidates = {}
+    location_id = 0
+    for item_id in range(1, items + 1):
+        bins = []
+        for _ in range(bins_per_item):
+            location_id += 1
+            bins.append(
+                Bin(location_id, rng.randint(1, 60), start + timedelta(hours=rng.randint(0, 5000)))
+            )
+        pool[item_id] = bins
+    return pool
+
+
+def _orders(count: int, items: int, rng: random.Random) -> list[list[SimpleNamespace]]:
+    return [
+        [
+            SimpleNamespace(item_id=item_id, ordered_qty=rng.randint(1, 40), picked_qty=0)
+            for item_id in rng.sample(range(1, items + 1), rng.randint(1, 5))
+        ]
+        for _ in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_allocation_strategies")
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--bins-per-item", type=int, default=40)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    stock = _stock(args.items, args.bins_per_item, rng)
+    orders = _orders(args.orders, args.items, rng)
+
+    print(
+        f"{'strategy':>17} {'served':>7} {'bins/order':>11} {'bins/line':>10} "
+        f"{'emptied':>8} {'us/order':>9}"
+    )
+    for name in STRATEGIES:
+        pool = copy.deepcopy(stock)
+        served = 0
+        visited: list[int] = []
+        per_line: list[float] = []
+        timings: list[float] = []
+        for lines in orders:
+            started = time.perf_counter()
+            try:
+                allocations = fill_from_pool(lines, pool, name)
+            except InsufficientStock:
+                continue
+            finally:
+                timings.append((time.perf_counter() - started) * 1_000_000)
+            served += 1
+            visited.append(len({a.location_id for a in allocations}))
+            per_line.append(len(allocations) / len(lines))
+        emptied = sum(len(bins) for bins in stock.values()) - sum(len(bins) for bins in pool.values())
+        print(
+            f"{name:>17} {served:>7} {statistics.mean(visited):>11.2f} "
+            f"{statistics.mean(per_line):>10.2f} {emptied:>8} {statistics.median(timings):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
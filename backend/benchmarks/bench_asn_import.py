@@ -0,0 +1,92 @@
+"""
+Bulk ASN import (POST /inbound_orders/import) vs. file size.
+
+    python -m benchmarks.bench_asn_import [--database-url URL] [--lines 100000] [--items 5000]
+
+Builds a CSV ASN in memory (about 1% bad lines) and times parsing,
+validation and writing of the lines, fed in 64 KiB chunks as the request
+body would arrive. The default database is in-memory SQLite; a PostgreSQL
+URL must point at a scratch database (lines then go in with COPY).
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models import Item, Location, Warehouse
+from app.services.asn_import import import_asn
+
+CHUNK = 1 << 16
+
+
+def _asn(lines: int, items: int, locations: int, rng: random.Random) -> bytes:
+    rows = ["sku,expected_qty,location_code"]
+    for n in range(lines):
+        if n % 100 == 99:
+            rows.append(f"UNKNOWN-{n},1,")
+        else:
+            location = f"D-{rng.randrange(locations):04d}" if n % 3 == 0 else ""
+            rows.append(f"BENCH-{rng.randrange(items):06d},{rng.randint(1, 50)},{location}")
+    return "\n".join(rows).encode()
+
+
+async def _chunks(data: bytes):
+    for start in range(0, len(data), CHUNK):
+        yield data[start : start + CHUNK]
+
+
+async def run(database_url: str, lines: int, items: int) -> None:
+    if database_url.startswith("sqlite"):
+        engine = create_async_engine(database_url, poolclass=StaticPool)
+    else:
+        engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    locations = 200
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with sessions() as session:
+        await session.execute(insert(Warehouse), [{"id": 1, "name": "Bench", "code": "BENCH"}])
+        await session.execute(
+            insert(Item),
+            [{"id": n + 1, "sku": f"BENCH-{n:06d}", "name": "Item"} for n in range(items)],
+        )
+        await session.execute(
+            insert(Location),
+            [{"warehouse_id": 1, "code": f"D-{n:04d}"} for n in range(locations)],
+        )
+        await session.commit()
+
+        data = _asn(lines, items, locations, random.Random(42))
+        started = time.perf_counter()
+        order, outcome = await import_asn(session, "BENCH-ASN", 1, None, _chunks(data), "csv")
+        await session.commit()
+        elapsed = time.perf_counter() - started
+
+    print(f"file         {len(data) / 1e6:>9.1f} MB")
+    print(f"imported     {outcome.imported:>9} of {outcome.records} lines ({outcome.errors_total} errors)")
+    print(f"total        {elapsed * 1000:>9.1f} ms")
+    print(f"per line     {elapsed / max(outcome.records, 1) * 1e6:>9.2f} us")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_asn_import")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--items", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.lines, args.items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Pick-path sequencing time vs. number of stops.
+
+    python -m benchmarks.bench_pick_path [--stops 100 1000 5000]
+
+Stops are random bins on a 40 aisle x 60 bay x 5 level grid; only the
+in-memory sequencing is timed, not the location lookup.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.pick_path import STRATEGIES, make_stop, sequence_stops
+
+
+def _stops(count: int, rng: random.Random):
+    return [
+        make_stop(n, f"ST-{rng.randint(1, 40)}-{rng.randint(1, 60)}-{rng.randint(1, 5)}")
+        for n in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_pick_path")
+    parser.add_argument("--stops", type=int, nargs="+", default=[10, 60, 100, 1000, 5000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'stops':>6} " + " ".join(f"{name + ' ms':>20}" for name in STRATEGIES))
+    for count in args.stops:
+        stops = _stops(count, rng)
+        timings = []
+        for name in STRATEGIES:
+            runs = []
+            for _ in range(args.repeats):
+                started = time.perf_counter()
+                sequence_stops(stops, name)
+                runs.append((time.perf_counter() - started) * 1000)
+            timings.append(statistics.median(runs))
+        print(f"{count:>6} " + " ".join(f"{ms:>20.3f}" for ms in timings))
+
+
+if __name__ == "__main__":
+    main()
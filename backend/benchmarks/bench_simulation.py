@@ -0,0 +1,116 @@
+"""
+Allocation dry run (POST /picking_tasks/simulate) vs. backlog size.
+
+    python -m benchmarks.bench_simulation [--database-url URL] [--orders 50000] [--items 2000]
+
+Seeds a backlog of draft orders with 1-5 lines over random stock, then
+times the endpoint's phases: loading the backlog, loading stock into
+arrays and the in-memory fill. The default database is in-memory SQLite;
+a PostgreSQL URL must point at a scratch database.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models import Inventory, Item, Location, OutboundOrder, OutboundOrderLine, Warehouse
+from app.models.outbound_order import OutboundStatus
+from app.services.simulation import load_backlog, load_stock, simulate
+
+LOCATIONS_PER_ITEM = 4
+CHUNK = 5000
+
+
+async def _seed(session, orders: int, items: int, rng: random.Random) -> None:
+    await session.execute(insert(Warehouse), [{"id": 1, "name": "Bench", "code": "BENCH"}])
+    await session.execute(
+        insert(Location),
+        [
+            {"id": n, "warehouse_id": 1, "code": f"B-{n:06d}"}
+            for n in range(1, items * LOCATIONS_PER_ITEM + 1)
+        ],
+    )
+    await session.execute(
+        insert(Item), [{"id": n, "sku": f"BENCH-{n:06d}", "name": "Item"} for n in range(1, items + 1)]
+    )
+    await session.execute(
+        insert(Inventory),
+        [
+            {
+                "warehouse_id": 1,
+                "location_id": (item_id - 1) * LOCATIONS_PER_ITEM + k + 1,
+                "item_id": item_id,
+                "quantity": rng.randint(0, 200) + 1,
+            }
+            for item_id in range(1, items + 1)
+            for k in range(LOCATIONS_PER_ITEM)
+        ],
+    )
+    for start in range(1, orders + 1, CHUNK):
+        ids = range(start, min(start + CHUNK, orders + 1))
+        await session.execute(
+            insert(OutboundOrder),
+            [
+                {"id": n, "external_number": f"SIM-{n}", "warehouse_id": 1, "status": "draft"}
+                for n in ids
+            ],
+        )
+        await session.execute(
+            insert(OutboundOrderLine),
+            [
+                {"outbound_order_id": n, "item_id": item_id, "ordered_qty": rng.randint(1, 10)}
+                for n in ids
+                for item_id in rng.sample(range(1, items + 1), rng.randint(1, 5))
+            ],
+        )
+    await session.commit()
+
+
+async def run(database_url: str, orders: int, items: int) -> None:
+    if database_url.startswith("sqlite"):
+        engine = create_async_engine(database_url, poolclass=StaticPool)
+    else:
+        engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with sessions() as session:
+        await _seed(session, orders, items, random.Random(42))
+
+        started = time.perf_counter()
+        backlog = await load_backlog(session, 1, OutboundStatus.draft, None, orders)
+        loaded = time.perf_counter()
+        stock = await load_stock(session, {(wh, i) for _, wh, lines in backlog for i, _ in lines})
+        stocked = time.perf_counter()
+        outcome = simulate(stock, backlog, {1: "first_found"})
+        done = time.perf_counter()
+
+    print(f"orders {outcome.orders_total}, allocatable {outcome.orders_allocatable}")
+    print(f"load backlog {(loaded - started) * 1000:>9.1f} ms")
+    print(f"load stock   {(stocked - loaded) * 1000:>9.1f} ms")
+    print(f"simulate     {(done - stocked) * 1000:>9.1f} ms")
+    print(f"total        {(done - started) * 1000:>9.1f} ms")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_simulation")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.orders, args.items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Add priority and claim columns to picking tasks
+
+Revision ID: a2b3c4d5e6f7
+Revises: f1a2b3c4d5e6
+Create Date: 2026-10-16 23:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "a2b3c4d5e6f7"
+down_revision = "f1a2b3c4d5e6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "picking_tasks",
+        sa.Column("priority", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("picking_tasks", sa.Column("assignee", sa.String(length=100), nullable=True))
+    op.add_column(
+        "picking_tasks", sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_picking_tasks_claim_queue",
+            "picking_tasks",
+            ["warehouse_id", sa.text("priority DESC"), "created_at", "id"],
+            postgresql_where=sa.text("status = 'new'"),
+            sqlite_where=sa.text("status = 'new'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_picking_tasks_claim_queue",
+            table_name="picking_tasks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("picking_tasks", "claimed_at")
+    op.drop_column("picking_tasks", "assignee")
+    op.drop_column("picking_tasks", "priority")
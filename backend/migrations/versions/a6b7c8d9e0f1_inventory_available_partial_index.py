@@ -0,0 +1,53 @@
+"""Partial index on available inventory
+
+Revision ID: a6b7c8d9e0f1
+Revises: f5a6b7c8d9e0
+Create Date: 2026-10-16 15:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "a6b7c8d9e0f1"
+down_revision = "f5a6b7c8d9e0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the partial index replaces the full (warehouse_id, item_id, location_id) one:
+    # allocation only ever reads rows with quantity > 0
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_inventory_wh_item_available",
+            "inventory",
+            ["warehouse_id", "item_id", "location_id"],
+            postgresql_where=sa.text("quantity > 0"),
+            sqlite_where=sa.text("quantity > 0"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_inventory_wh_item_loc",
+            table_name="inventory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_inventory_wh_item_loc",
+            "inventory",
+            ["warehouse_id", "item_id", "location_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_inventory_wh_item_available",
+            table_name="inventory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,55 @@
+"""Add inventory availability counters
+
+Revision ID: b7c8d9e0f1a2
+Revises: a6b7c8d9e0f1
+Create Date: 2026-10-16 17:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b7c8d9e0f1a2"
+down_revision = "a6b7c8d9e0f1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "inventory_availability",
+        sa.Column(
+            "warehouse_id",
+            sa.Integer(),
+            sa.ForeignKey("warehouses.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "item_id",
+            sa.Integer(),
+            sa.ForeignKey("items.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("zone_type", sa.String(length=20), primary_key=True),
+        sa.Column("quantity", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()")
+        ),
+    )
+    op.execute(
+        """
+        INSERT INTO inventory_availability (warehouse_id, item_id, zone_type, quantity)
+        SELECT i.warehouse_id,
+               i.item_id,
+               COALESCE(CAST(z.zone_type AS VARCHAR), 'unassigned'),
+               SUM(i.quantity)
+        FROM inventory i
+        JOIN locations l ON l.id = i.location_id
+        LEFT JOIN zones z ON z.id = l.zone_id
+        GROUP BY i.warehouse_id, i.item_id, COALESCE(CAST(z.zone_type AS VARCHAR), 'unassigned')
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("inventory_availability")
@@ -0,0 +1,50 @@
+"""Add unique key on inventory (warehouse, location, item)
+
+Revision ID: c2d3e4f5a6b7
+Revises: b1c2d3e4f5a6
+Create Date: 2026-10-16 09:00:00.000000
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c2d3e4f5a6b7"
+down_revision = "b1c2d3e4f5a6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # fold duplicate rows into the oldest one before adding the constraint
+    op.execute(
+        """
+        UPDATE inventory AS keep
+        SET quantity = dup.total
+        FROM (
+            SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+            FROM inventory
+            GROUP BY warehouse_id, location_id, item_id
+            HAVING COUNT(*) > 1
+        ) AS dup
+        WHERE keep.id = dup.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM inventory AS inv
+        USING inventory AS keep
+        WHERE inv.warehouse_id = keep.warehouse_id
+          AND inv.location_id = keep.location_id
+          AND inv.item_id = keep.item_id
+          AND inv.id > keep.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_inventory_wh_loc_item",
+        "inventory",
+        ["warehouse_id", "location_id", "item_id"],
+    )
+
+
+def downgrade():
+    op.drop_constraint("uq_inventory_wh_loc_item", "inventory", type_="unique")
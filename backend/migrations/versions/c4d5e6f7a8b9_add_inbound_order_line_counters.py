@@ -0,0 +1,52 @@
+"""Add line counters to inbound orders
+
+Revision ID: c4d5e6f7a8b9
+Revises: b3c4d5e6f7a8
+Create Date: 2026-10-17 00:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c4d5e6f7a8b9"
+down_revision = "b3c4d5e6f7a8"
+branch_labels = None
+depends_on = None
+
+COUNTERS = ["lines_total", "lines_matched", "lines_over", "lines_mis_sort"]
+
+
+def upgrade():
+    for name in COUNTERS:
+        op.add_column(
+            "inbound_orders",
+            sa.Column(name, sa.Integer(), nullable=False, server_default="0"),
+        )
+    # same rules as app.services.inbound_counters.line_flags
+    op.execute(
+        """
+        UPDATE inbound_orders
+        SET lines_total = counts.total,
+            lines_matched = counts.matched,
+            lines_over = counts.over_received,
+            lines_mis_sort = counts.mis_sort
+        FROM (
+            SELECT inbound_order_id,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE received_qty = expected_qty) AS matched,
+                   COUNT(*) FILTER (WHERE received_qty > expected_qty) AS over_received,
+                   COUNT(*) FILTER (
+                       WHERE line_status = 'mis_sort' OR expected_qty = 0
+                   ) AS mis_sort
+            FROM inbound_order_lines
+            GROUP BY inbound_order_id
+        ) AS counts
+        WHERE inbound_orders.id = counts.inbound_order_id
+        """
+    )
+
+
+def downgrade():
+    for name in reversed(COUNTERS):
+        op.drop_column("inbound_orders", name)
@@ -0,0 +1,27 @@
+"""Add pick-path coordinates to locations
+
+Revision ID: c8d9e0f1a2b3
+Revises: b7c8d9e0f1a2
+Create Date: 2026-10-16 19:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c8d9e0f1a2b3"
+down_revision = "b7c8d9e0f1a2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("locations", sa.Column("aisle", sa.Integer(), nullable=True))
+    op.add_column("locations", sa.Column("bay", sa.Integer(), nullable=True))
+    op.add_column("locations", sa.Column("level", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("locations", "level")
+    op.drop_column("locations", "bay")
+    op.drop_column("locations", "aisle")
@@ -0,0 +1,30 @@
+"""Add optimistic locking version columns
+
+Revision ID: d3e4f5a6b7c8
+Revises: c2d3e4f5a6b7
+Create Date: 2026-10-16 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d3e4f5a6b7c8"
+down_revision = "c2d3e4f5a6b7"
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ("inventory", "tare_items", "outbound_order_lines")
+
+
+def upgrade():
+    for table in VERSIONED_TABLES:
+        op.add_column(
+            table,
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        )
+
+
+def downgrade():
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, "version")
@@ -0,0 +1,86 @@
+"""Add inventory reservations
+
+Revision ID: d9e0f1a2b3c4
+Revises: c8d9e0f1a2b3
+Create Date: 2026-10-16 20:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d9e0f1a2b3c4"
+down_revision = "c8d9e0f1a2b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "inventory",
+        sa.Column("reserved_qty", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # open tasks generated before reservations existed still hold their stock
+    op.execute(
+        """
+        UPDATE inventory
+        SET reserved_qty = LEAST(held.qty, inventory.quantity)
+        FROM (
+            SELECT t.warehouse_id, l.from_location_id, l.item_id,
+                   SUM(l.qty_to_pick - l.qty_picked) AS qty
+            FROM picking_task_lines l
+            JOIN picking_tasks t ON t.id = l.picking_task_id
+            WHERE t.status IN ('new', 'in_progress') AND l.qty_to_pick > l.qty_picked
+            GROUP BY t.warehouse_id, l.from_location_id, l.item_id
+        ) AS held
+        WHERE inventory.warehouse_id = held.warehouse_id
+          AND inventory.location_id = held.from_location_id
+          AND inventory.item_id = held.item_id
+        """
+    )
+    op.create_check_constraint(
+        "ck_inventory_reserved_qty",
+        "inventory",
+        "reserved_qty >= 0 AND reserved_qty <= quantity",
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE pickingstatus ADD VALUE IF NOT EXISTS 'cancelled'")
+        op.create_index(
+            "ix_inventory_wh_item_unreserved",
+            "inventory",
+            ["warehouse_id", "item_id", "location_id"],
+            postgresql_where=sa.text("quantity > reserved_qty"),
+            sqlite_where=sa.text("quantity > reserved_qty"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_inventory_wh_item_available",
+            table_name="inventory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_inventory_wh_item_available",
+            "inventory",
+            ["warehouse_id", "item_id", "location_id"],
+            postgresql_where=sa.text("quantity > 0"),
+            sqlite_where=sa.text("quantity > 0"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_inventory_wh_item_unreserved",
+            table_name="inventory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    # enum values cannot be dropped; cancelled tasks become done
+    op.execute("UPDATE picking_tasks SET status = 'done' WHERE status = 'cancelled'")
+    op.drop_constraint("ck_inventory_reserved_qty", "inventory", type_="check")
+    op.drop_column("inventory", "reserved_qty")
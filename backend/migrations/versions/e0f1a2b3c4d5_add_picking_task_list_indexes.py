@@ -0,0 +1,43 @@
+"""Add indexes for filtered picking task lists
+
+Revision ID: e0f1a2b3c4d5
+Revises: d9e0f1a2b3c4
+Create Date: 2026-10-16 21:00:00.000000
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e0f1a2b3c4d5"
+down_revision = "d9e0f1a2b3c4"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_picking_tasks_wh_status_id", "picking_tasks", ["warehouse_id", "status", "id"]),
+    ("ix_picking_tasks_outbound_order_id", "picking_tasks", ["outbound_order_id"]),
+]
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
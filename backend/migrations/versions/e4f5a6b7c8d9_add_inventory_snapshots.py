@@ -0,0 +1,54 @@
+"""Add inventory snapshots
+
+Revision ID: e4f5a6b7c8d9
+Revises: d3e4f5a6b7c8
+Create Date: 2026-10-16 11:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e4f5a6b7c8d9"
+down_revision = "d3e4f5a6b7c8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "inventory_snapshots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "taken_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.Column("last_movement_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rows_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_inventory_snapshots_id", "inventory_snapshots", ["id"])
+    op.create_index("ix_inventory_snapshots_taken_at", "inventory_snapshots", ["taken_at"])
+
+    op.create_table(
+        "inventory_snapshot_rows",
+        sa.Column(
+            "snapshot_id",
+            sa.Integer(),
+            sa.ForeignKey("inventory_snapshots.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("location_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("snapshot_id", "warehouse_id", "location_id", "item_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("inventory_snapshot_rows")
+    op.drop_index("ix_inventory_snapshots_taken_at", table_name="inventory_snapshots")
+    op.drop_index("ix_inventory_snapshots_id", table_name="inventory_snapshots")
+    op.drop_table("inventory_snapshots")
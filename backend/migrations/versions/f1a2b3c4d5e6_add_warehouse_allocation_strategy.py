@@ -0,0 +1,25 @@
+"""Add allocation strategy to warehouses
+
+Revision ID: f1a2b3c4d5e6
+Revises: e0f1a2b3c4d5
+Create Date: 2026-10-16 22:00:00.000000
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "f1a2b3c4d5e6"
+down_revision = "e0f1a2b3c4d5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "warehouses", sa.Column("allocation_strategy", sa.String(length=30), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("warehouses", "allocation_strategy")
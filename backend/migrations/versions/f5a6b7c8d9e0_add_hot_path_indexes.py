@@ -0,0 +1,51 @@
+"""Add composite indexes for hot query paths
+
+Revision ID: f5a6b7c8d9e0
+Revises: e4f5a6b7c8d9
+Create Date: 2026-10-16 12:00:00.000000
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "f5a6b7c8d9e0"
+down_revision = "e4f5a6b7c8d9"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_inventory_wh_item_loc", "inventory", ["warehouse_id", "item_id", "location_id"]),
+    ("ix_inventory_wh_id", "inventory", ["warehouse_id", "id"]),
+    ("ix_movements_wh_created_at", "movements", ["warehouse_id", "created_at"]),
+    ("ix_tare_items_tare_item", "tare_items", ["tare_id", "item_id"]),
+    ("ix_tares_location_id", "tares", ["location_id"]),
+    ("ix_locations_warehouse_id", "locations", ["warehouse_id"]),
+    ("ix_inbound_receipts_inbound_order_id", "inbound_receipts", ["inbound_order_id"]),
+    ("ix_inbound_order_lines_inbound_order_id", "inbound_order_lines", ["inbound_order_id"]),
+    ("ix_outbound_order_lines_outbound_order_id", "outbound_order_lines", ["outbound_order_id"]),
+    ("ix_picking_task_lines_picking_task_id", "picking_task_lines", ["picking_task_id"]),
+]
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
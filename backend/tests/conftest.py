@@ -7,6 +7,7 @@ from app.db.base import Base
 from app.db.session import get_session
 from app.main import get_application
 import app.models  # ensure models are registered on Base metadata
+from app.services.ref_cache import reference_cache
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -37,6 +38,7 @@ def app():
 
 @pytest.fixture(autouse=True)
 async def prepare_database():
+    reference_cache.clear()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,97 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.allocation import Bin, InsufficientStock, fill_from_pool
+
+
+def _pool():
+    return {
+        1: [
+            Bin(10, 4, datetime(2026, 3, 1)),
+            Bin(11, 9, datetime(2026, 1, 1)),
+            Bin(12, 2, datetime(2026, 2, 1)),
+            Bin(13, 6, datetime(2026, 4, 1)),
+        ]
+    }
+
+
+def _picks(qty: int, strategy: str) -> list[tuple[int, int]]:
+    line = SimpleNamespace(item_id=1, ordered_qty=qty, picked_qty=0)
+    return [(a.location_id, a.qty) for a in fill_from_pool([line], _pool(), strategy)]
+
+
+def test_strategies_choose_bins():
+    assert _picks(7, "first_found") == [(10, 4), (11, 3)]
+    assert _picks(7, "fewest_locations") == [(11, 7)]
+    # largest bin first, then the smallest one that covers the rest
+    assert _picks(14, "fewest_locations") == [(11, 9), (13, 5)]
+    assert _picks(7, "fifo") == [(11, 7)]
+    assert _picks(7, "drain_smallest") == [(12, 2), (10, 4), (13, 1)]
+
+
+def test_fill_consumes_pool_across_lines():
+    pool = _pool()
+    lines = [
+        SimpleNamespace(item_id=1, ordered_qty=5, picked_qty=0),
+        SimpleNamespace(item_id=1, ordered_qty=5, picked_qty=0),
+    ]
+    allocations = fill_from_pool(lines, pool, "fewest_locations")
+    assert [(a.location_id, a.qty) for a in allocations] == [(13, 5), (11, 5)]
+    assert [(b.location_id, b.quantity) for b in pool[1]] == [(10, 4), (11, 4), (12, 2), (13, 1)]
+
+    with pytest.raises(InsufficientStock):
+        fill_from_pool([SimpleNamespace(item_id=1, ordered_qty=12, picked_qty=0)], pool)
+    assert sum(b.quantity for b in pool[1]) == 11
+
+
+@pytest.mark.asyncio
+async def test_strategy_per_warehouse_and_per_request(client: AsyncClient):
+    wh = (
+        await client.post(
+            "/warehouses",
+            json={"name": "WH", "code": "WH_STRAT", "allocation_strategy": "fewest_locations"},
+        )
+    ).json()
+    assert wh["allocation_strategy"] == "fewest_locations"
+    item = (
+        await client.post("/items", json={"sku": "SKU_STRAT", "name": "Item", "unit": "pcs"})
+    ).json()
+    locations = []
+    for code, qty in (("STRAT-A", 2), ("STRAT-B", 8)):
+        loc = (await client.post("/locations", json={"warehouse_id": wh["id"], "code": code})).json()
+        locations.append(loc["id"])
+        await client.post(
+            "/inventory/inbound",
+            json={"warehouse_id": wh["id"], "location_id": loc["id"], "item_id": item["id"], "qty": qty},
+        )
+
+    async def generate(**params):
+        order = await client.post(
+            "/outbound_orders",
+            json={
+                "external_number": f"OUT-STRAT-{len(params)}",
+                "warehouse_id": wh["id"],
+                "partner_id": None,
+                "status": "draft",
+                "lines": [{"item_id": item["id"], "ordered_qty": 3}],
+            },
+        )
+        task = await client.post(
+            "/picking_tasks/generate", params={"outbound_order_id": order.json()["id"], **params}
+        )
+        assert task.status_code == 201, task.text
+        return [(ln["from_location_id"], ln["qty_to_pick"]) for ln in task.json()["lines"]]
+
+    assert await generate() == [(locations[1], 3)]
+    assert await generate(allocation_strategy="first_found") == [
+        (locations[0], 2),
+        (locations[1], 1),
+    ]
+
+    reset = await client.patch(f"/warehouses/{wh['id']}", json={"allocation_strategy": None})
+    assert reset.json()["allocation_strategy"] is None
+    bad = await client.patch(f"/warehouses/{wh['id']}", json={"allocation_strategy": "random"})
+    assert bad.status_code == 422
@@ -0,0 +1,177 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.cli import build_parser
+
+
+async def _references(client: AsyncClient) -> tuple[int, list[dict], dict, dict]:
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_ASN"})).json()
+    other = (await client.post("/warehouses", json={"name": "WH 2", "code": "WH_ASN2"})).json()
+    items = [
+        (await client.post("/items", json={"sku": f"ASN-{n}", "name": f"Item {n}", "unit": "pcs"})).json()
+        for n in range(3)
+    ]
+    loc = (await client.post("/locations", json={"warehouse_id": wh["id"], "code": "DOCK-1"})).json()
+    foreign = (await client.post("/locations", json={"warehouse_id": other["id"], "code": "DOCK-9"})).json()
+    return wh["id"], items, loc, foreign
+
+
+@pytest.mark.asyncio
+async def test_import_csv_reports_bad_lines(client: AsyncClient):
+    warehouse_id, items, loc, foreign = await _references(client)
+    body = "\r\n".join(
+        [
+            "sku,expected_qty,location_code",
+            f"{items[0]['sku']},10,DOCK-1",
+            f"{items[1]['sku']},5,",
+            "NO-SUCH-SKU,1,",
+            f"{items[2]['sku']},zero,",
+            f"{items[2]['sku']},-1,",
+            "",
+            f"{items[2]['sku']},7,DOCK-9",
+            f"{items[2]['sku']},2",
+        ]
+    )
+    resp = await client.post(
+        "/inbound_orders/import",
+        params={"external_number": "ASN-1", "warehouse_id": warehouse_id},
+        content=body.encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+    assert resp.status_code == 201, resp.text
+    result = resp.json()
+    assert result["records"] == 7
+    assert result["lines_imported"] == 3
+    assert result["errors_total"] == 4
+    assert [e["line"] for e in result["errors"]] == [4, 5, 6, 8]
+    assert "NO-SUCH-SKU" in result["errors"][0]["detail"]
+
+    order = (await client.get(f"/inbound_orders/{result['order_id']}")).json()
+    assert order["status"] == "created"
+    assert order["lines_total"] == 3
+    lines = {ln["item_id"]: ln for ln in order["lines"]}
+    assert lines[items[0]["id"]]["expected_qty"] == 10
+    assert lines[items[0]["id"]]["location_id"] == loc["id"]
+    assert lines[items[1]["id"]]["location_id"] is None
+    assert lines[items[2]["id"]]["expected_qty"] == 2
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson(client: AsyncClient):
+    warehouse_id, items, loc, foreign = await _references(client)
+    body = "\n".join(
+        [
+            f'{{"item_id": {items[0]["id"]}, "expected_qty": 4, "location_id": {loc["id"]}}}',
+            f'{{"item_id": {items[1]["id"]}, "expected_qty": 1, "location_id": {foreign["id"]}}}',
+            "not json",
+            f'{{"sku": "{items[2]["sku"]}", "expected_qty": 3}}',
+            "",
+        ]
+    )
+    resp = await client.post(
+        "/inbound_orders/import",
+        params={"external_number": "ASN-2", "warehouse_id": warehouse_id, "format": "ndjson"},
+        content=body.encode(),
+    )
+    assert resp.status_code == 201, resp.text
+    result = resp.json()
+    assert (result["lines_imported"], result["errors_total"]) == (2, 2)
+    assert [e["line"] for e in result["errors"]] == [2, 3]
+
+    unknown = await client.post(
+        "/inbound_orders/import",
+        params={"external_number": "ASN-3", "warehouse_id": warehouse_id},
+        content=body.encode(),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert unknown.status_code == 400
+    missing = await client.post(
+        "/inbound_orders/import",
+        params={"external_number": "ASN-3", "warehouse_id": 999999, "format": "csv"},
+        content=b"sku,expected_qty\n",
+    )
+    assert missing.status_code == 404
+
+
+def test_import_asn_cli_arguments():
+    args = build_parser().parse_args(
+        ["import-asn", "asn.csv", "--warehouse-id", "2", "--external-number", "ASN-9"]
+    )
+    assert (args.file, args.warehouse_id, args.external_number, args.format) == (
+        "asn.csv",
+        2,
+        "ASN-9",
+        None,
+    )
+    assert args.handler.__name__ == "_import_asn"
+
+
+@pytest.mark.asyncio
+async def test_import_csv_quoted_field_spans_lines(client: AsyncClient):
+    warehouse_id, items, _, _ = await _references(client)
+    body = "\n".join(
+        [
+            "sku,expected_qty,comment",
+            f'{items[0]["sku"]},3,"first line',
+            'second ""quoted"" line"',
+            "NO-SUCH-SKU,1,plain",
+            f"{items[1]['sku']},4,",
+        ]
+    )
+    resp = await client.post(
+        "/inbound_orders/import",
+        params={"external_number": "ASN-MULTI", "warehouse_id": warehouse_id, "format": "csv"},
+        content=body.encode(),
+    )
+    assert resp.status_code == 201, resp.text
+    result = resp.json()
+    assert result["records"] == 3
+    assert result["lines_imported"] == 2
+    assert [e["line"] for e in result["errors"]] == [4]
+
+
+@pytest.mark.asyncio
+async def test_import_json_array(client: AsyncClient):
+    warehouse_id, items, loc, _ = await _references(client)
+    body = json.dumps(
+        [
+            {"sku": items[0]["sku"], "expected_qty": 2, "location_code": "DOCK-1"},
+            {"sku": "NO-SUCH-SKU", "expected_qty": 1},
+            ["not", "an", "object"],
+            {"item_id": items[1]["id"], "expected_qty": 6},
+        ],
+        indent=1,
+    ).encode()
+
+    async def chunks():
+        # elements split across chunk borders
+        for start in range(0, len(body), 7):
+            yield body[start : start + 7]
+
+    resp = await client.post(
+        "/inbound_orders/import",
+        params={"external_number": "ASN-JSON", "warehouse_id": warehouse_id},
+        content=chunks(),
+        headers={"Content-Type": "application/json"},
+    )
+    assert resp.status_code == 201, resp.text
+    result = resp.json()
+    assert (result["records"], result["lines_imported"], result["errors_total"]) == (3, 2, 2)
+    # indent=1 puts each element's opening line at 2, 7, 11 and 16
+    assert [e["line"] for e in result["errors"]] == [7, 11]
+    order = (await client.get(f"/inbound_orders/{result['order_id']}")).json()
+    assert {(ln["item_id"], ln["expected_qty"], ln["location_id"]) for ln in order["lines"]} == {
+        (items[0]["id"], 2, loc["id"]),
+        (items[1]["id"], 6, None),
+    }
+
+    broken = await client.post(
+        "/inbound_orders/import",
+        params={"external_number": "ASN-JSON-2", "warehouse_id": warehouse_id},
+        content=f'[{{"sku": "{items[0]["sku"]}", "expected_qty": 1}}, {{"sku": ',
+        headers={"Content-Type": "application/json"},
+    )
+    assert broken.json()["lines_imported"] == 1
+    assert broken.json()["errors"] == [{"line": 1, "detail": "invalid JSON"}]
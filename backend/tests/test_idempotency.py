@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert, select
+
+from app.cli import build_parser
+from app.core.config import settings
+from app.models import IdempotencyKey
+from app.services.idempotency import ClaimLost, claim_key, complete_key, purge_idempotency_keys
+from tests.conftest import TestSessionLocal
+
+
+async def _inbound_payload(client: AsyncClient) -> dict:
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_IDEM"})).json()
+    loc = (await client.post("/locations", json={"warehouse_id": wh["id"], "code": "IDEM-1"})).json()
+    item = (await client.post("/items", json={"sku": "SKU_IDEM", "name": "Item", "unit": "pcs"})).json()
+    return {"warehouse_id": wh["id"], "location_id": loc["id"], "item_id": item["id"], "qty": 5}
+
+
+async def _stock(client: AsyncClient, payload: dict) -> int:
+    rows = (await client.get("/inventory", params={"warehouse_id": payload["warehouse_id"]})).json()
+    return sum(row["quantity"] for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_retry_with_same_key_is_replayed(client: AsyncClient):
+    payload = await _inbound_payload(client)
+    headers = {"Idempotency-Key": "scan-1"}
+
+    first = await client.post("/inventory/inbound", json=payload, headers=headers)
+    assert first.status_code < 300, first.text
+    retry = await client.post("/inventory/inbound", json=payload, headers=headers)
+    assert retry.status_code == first.status_code
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert await _stock(client, payload) == 5
+
+    # a new key is a new request; no key keeps the old behaviour
+    await client.post("/inventory/inbound", json=payload, headers={"Idempotency-Key": "scan-2"})
+    await client.post("/inventory/inbound", json=payload)
+    assert await _stock(client, payload) == 15
+
+    reused = await client.post(
+        "/inventory/inbound", json={**payload, "qty": 7}, headers=headers
+    )
+    assert reused.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_failed_request_releases_key(client: AsyncClient):
+    headers = {"Idempotency-Key": "scan-err"}
+
+    missing = await client.post(
+        "/picking_tasks/999/complete_line", json={"line_id": 1, "qty_picked": 1}, headers=headers
+    )
+    assert missing.status_code == 404
+    again = await client.post(
+        "/picking_tasks/999/complete_line", json={"line_id": 1, "qty_picked": 1}, headers=headers
+    )
+    assert again.status_code == 404
+    assert "Idempotent-Replayed" not in again.headers
+
+    async with TestSessionLocal() as session:
+        assert await session.get(IdempotencyKey, "scan-err") is None
+
+
+@pytest.mark.asyncio
+async def test_key_in_progress_and_abandoned(client: AsyncClient):
+    payload = await _inbound_payload(client)
+    first = await client.post("/inventory/inbound", json=payload, headers={"Idempotency-Key": "probe"})
+    async with TestSessionLocal() as session:
+        fingerprint = (await session.get(IdempotencyKey, "probe")).fingerprint
+        now = datetime.now(timezone.utc)
+        await session.execute(
+            insert(IdempotencyKey),
+            [
+                {"key": "busy", "fingerprint": fingerprint, "created_at": now},
+                {"key": "stale", "fingerprint": fingerprint, "created_at": now - timedelta(minutes=5)},
+            ],
+        )
+        await session.commit()
+    assert first.status_code < 300
+
+    # same request as "probe", so the fingerprints of the seeded keys match
+    busy = await client.post("/inventory/inbound", json=payload, headers={"Idempotency-Key": "busy"})
+    assert busy.status_code == 409
+    stale = await client.post("/inventory/inbound", json=payload, headers={"Idempotency-Key": "stale"})
+    assert stale.status_code < 300
+    assert "Idempotent-Replayed" not in stale.headers
+    assert await _stock(client, payload) == 10
+
+
+@pytest.mark.asyncio
+async def test_purge_idempotency_keys(client: AsyncClient):
+    now = datetime.now(timezone.utc)
+    async with TestSessionLocal() as session:
+        await session.execute(
+            insert(IdempotencyKey),
+            [
+                {
+                    "key": f"k{n}",
+                    "fingerprint": "f",
+                    "status_code": 200,
+                    "body": b"{}",
+                    "created_at": now - timedelta(hours=n),
+                }
+                for n in range(5)
+            ],
+        )
+        await session.commit()
+        deleted = await purge_idempotency_keys(session, ttl_seconds=2 * 3600 + 60, batch_size=1, now=now)
+        assert deleted == 2
+        left = (await session.execute(select(IdempotencyKey.key).order_by(IdempotencyKey.key))).scalars().all()
+    assert left == ["k0", "k1", "k2"]
+
+    args = build_parser().parse_args(["purge-idempotency-keys", "--ttl-seconds", "60"])
+    assert args.ttl_seconds == 60
+    assert args.handler.__name__ == "_purge_idempotency_keys"
+
+
+@pytest.mark.asyncio
+async def test_committed_request_is_not_run_again(client: AsyncClient, monkeypatch):
+    payload = await _inbound_payload(client)
+    headers = {"Idempotency-Key": "crash"}
+
+    async def crash(*args, **kwargs):
+        raise RuntimeError("worker died")
+
+    # the handler has committed; the process dies before the response is saved
+    monkeypatch.setattr("app.api.idempotency.save_response", crash)
+    with pytest.raises(RuntimeError):
+        await client.post("/inventory/inbound", json=payload, headers=headers)
+    monkeypatch.undo()
+    # even once the lease is over, the committed write is not applied again
+    monkeypatch.setattr(settings, "idempotency_lease_seconds", 0)
+
+    retry = await client.post("/inventory/inbound", json=payload, headers=headers)
+    assert retry.status_code == 409
+    assert await _stock(client, payload) == 5
+
+
+@pytest.mark.asyncio
+async def test_claim_taken_over_cannot_complete():
+    claimed_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    async with TestSessionLocal() as session:
+        await session.execute(
+            insert(IdempotencyKey),
+            [{"key": "slow", "fingerprint": "f", "created_at": claimed_at}],
+        )
+        await session.commit()
+
+        # a retry took the key over after the lease ran out
+        assert await claim_key(session, "slow", "f", 3600, 60, now=datetime.now(timezone.utc)) is None
+        with pytest.raises(ClaimLost):
+            await session.run_sync(complete_key, "slow", claimed_at, 201)
@@ -1,5 +1,16 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event, insert, update
+
+from app.cli import build_parser
+from app.models import InboundOrder, InboundReceipt, InboundStatus, Tare, TareType
+from app.services.inbound_counters import (
+    CounterDelta,
+    apply_counter_delta,
+    derive_status,
+    rebuild_inbound_counters,
+)
+from tests.conftest import TestSessionLocal, engine
 
 
 async def _create_base_entities(client: AsyncClient):
@@ -129,3 +140,167 @@ async def test_receive_inbound_line_updates_inventory(client: AsyncClient):
     data = inv.json()
     assert len(data) == 1
     assert data[0]["quantity"] == 3
+
+
+@pytest.mark.asyncio
+async def test_list_inbound_orders_pages_and_locations(client: AsyncClient):
+    warehouse_id, location_id, item_id, partner_id = await _create_base_entities(client)
+    orders = []
+    for n in range(5):
+        resp = await client.post(
+            "/inbound_orders",
+            json={
+                "external_number": f"INB-L{n}",
+                "warehouse_id": warehouse_id,
+                "partner_id": partner_id,
+                "lines": [{"item_id": item_id, "expected_qty": 4}],
+            },
+        )
+        orders.append(resp.json())
+
+    async with TestSessionLocal() as session:
+        await session.execute(
+            insert(TareType), [{"id": 1, "code": "PAL", "name": "Pallet", "prefix": "PAL"}]
+        )
+        await session.execute(
+            insert(Tare),
+            [{"id": 1, "warehouse_id": warehouse_id, "location_id": location_id, "type_id": 1, "tare_code": "PAL1"}],
+        )
+        await session.execute(
+            insert(InboundReceipt),
+            [
+                {
+                    "inbound_order_id": order["id"],
+                    "line_id": order["lines"][0]["id"],
+                    "tare_id": 1,
+                    "item_id": item_id,
+                    "quantity": 1,
+                }
+                for order in orders
+            ],
+        )
+        await session.commit()
+
+    statements: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        first = await client.get("/inbound_orders", params={"warehouse_id": warehouse_id, "limit": 3})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    assert first.status_code == 200
+    page = first.json()
+    assert [o["id"] for o in page] == [o["id"] for o in orders[:3]]
+    assert all(o["lines"][0]["location_id"] == location_id for o in page)
+    # orders, their lines, one back-fill query for the whole page
+    assert len(statements) == 3
+
+    second = await client.get(
+        "/inbound_orders",
+        params={"warehouse_id": warehouse_id, "limit": 3, "cursor": first.headers["X-Next-Cursor"]},
+    )
+    assert [o["id"] for o in second.json()] == [o["id"] for o in orders[3:]]
+    assert "X-Next-Cursor" not in second.headers
+
+    lean = await client.get(
+        "/inbound_orders", params={"warehouse_id": warehouse_id, "include_lines": "false"}
+    )
+    assert lean.status_code == 200
+    summary = lean.json()[0]
+    assert "lines" not in summary
+    assert (summary["lines_count"], summary["expected_qty"], summary["received_qty"]) == (1, 4, 0)
+
+
+@pytest.mark.asyncio
+async def test_inbound_line_counters_follow_receipts(client: AsyncClient):
+    warehouse_id, location_id, item_id, partner_id = await _create_base_entities(client)
+    other = (await client.post("/items", json={"sku": "SKU_INB2", "name": "Item 2", "unit": "pcs"})).json()
+    order = (
+        await client.post(
+            "/inbound_orders",
+            json={
+                "external_number": "INB-C",
+                "warehouse_id": warehouse_id,
+                "partner_id": partner_id,
+                "lines": [
+                    {"item_id": item_id, "expected_qty": 2},
+                    {"item_id": other["id"], "expected_qty": 3},
+                ],
+            },
+        )
+    ).json()
+    assert (order["lines_total"], order["lines_matched"], order["lines_over"]) == (2, 0, 0)
+    for next_status in ("ready_for_receiving", "receiving"):
+        await client.patch(f"/inbound_orders/{order['id']}/status", json={"status": next_status})
+    async with TestSessionLocal() as session:
+        await session.execute(
+            insert(TareType), [{"id": 1, "code": "PAL", "name": "Pallet", "prefix": "PAL"}]
+        )
+        await session.execute(
+            insert(Tare), [{"id": 1, "warehouse_id": warehouse_id, "type_id": 1, "tare_code": "PAL1"}]
+        )
+        await session.commit()
+    line_a, line_b = order["lines"]
+
+    resp = await client.post(
+        f"/inbound_orders/{order['id']}/receive_batch",
+        json=[
+            {"line_id": line_a["id"], "qty": 2, "tare_id": 1},
+            {"line_id": line_b["id"], "qty": 2, "tare_id": 1},
+        ],
+    )
+    assert resp.json()["status"] == "receiving"
+    resp = await client.post(
+        f"/inbound_orders/{order['id']}/receive_batch",
+        json=[{"line_id": line_b["id"], "qty": 2, "tare_id": 1}],
+    )
+    assert resp.json()["status"] == "problem"
+
+    detail = (await client.get(f"/inbound_orders/{order['id']}")).json()
+    counters = (detail["lines_total"], detail["lines_matched"], detail["lines_over"], detail["lines_mis_sort"])
+    assert counters == (2, 1, 1, 0)
+
+    # the repair recounts from the lines
+    async with TestSessionLocal() as session:
+        await session.execute(
+            update(InboundOrder)
+            .where(InboundOrder.id == order["id"])
+            .values(lines_total=0, lines_matched=0, lines_over=0)
+        )
+        assert await rebuild_inbound_counters(session, [order["id"]]) == 1
+        await session.commit()
+    detail = (await client.get(f"/inbound_orders/{order['id']}")).json()
+    assert (detail["lines_total"], detail["lines_matched"], detail["lines_over"]) == (2, 1, 1)
+
+    args = build_parser().parse_args(["rebuild-inbound-counters", "--order-id", str(order["id"])])
+    assert args.order_id == [order["id"]]
+    assert args.handler.__name__ == "_rebuild_inbound_counters"
+
+
+@pytest.mark.asyncio
+async def test_counter_deltas_from_stale_orders_add_up(client: AsyncClient):
+    warehouse_id, _, item_id, _ = await _create_base_entities(client)
+    order = (
+        await client.post(
+            "/inbound_orders",
+            json={
+                "external_number": "INB-RACE",
+                "warehouse_id": warehouse_id,
+                "lines": [{"item_id": item_id, "expected_qty": 1}] * 2,
+            },
+        )
+    ).json()
+
+    # two scans that loaded the order before either of them wrote
+    async with TestSessionLocal() as first, TestSessionLocal() as second:
+        first_order = await first.get(InboundOrder, order["id"])
+        second_order = await second.get(InboundOrder, order["id"])
+        await apply_counter_delta(first, first_order, CounterDelta(matched=1))
+        await first.commit()
+        await apply_counter_delta(second, second_order, CounterDelta(matched=1))
+        await second.commit()
+        assert second_order.lines_matched == 2
+        assert derive_status(second_order) == InboundStatus.received
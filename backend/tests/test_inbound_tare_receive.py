@@ -232,3 +232,90 @@ async def test_inbound_receive_requires_inbound_zone(client):
     )
     assert resp.status_code == 400
     assert "зоны приёмки" in resp.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_inbound_receive_batch(client):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH4"})).json()
+    items = [
+        (await client.post("/items", json={"sku": f"SKU-B{n}", "name": f"Item {n}", "unit": "pcs"})).json()
+        for n in range(3)
+    ]
+    tare_type = (
+        await client.post(
+            "/tares/types",
+            json={"code": "PAL4", "name": "Pallet", "prefix": "PB", "level": 1},
+        )
+    ).json()
+    tare = (
+        await client.post(
+            "/tares",
+            json={"warehouse_id": wh["id"], "type_id": tare_type["id"], "location_id": None, "parent_tare_id": None},
+        )
+    ).json()
+    order = (
+        await client.post(
+            "/inbound_orders",
+            json={
+                "external_number": "EXT-B",
+                "warehouse_id": wh["id"],
+                "lines": [
+                    {"item_id": items[0]["id"], "expected_qty": 5},
+                    {"item_id": items[1]["id"], "expected_qty": 4},
+                ],
+            },
+        )
+    ).json()
+    for next_status in ("ready_for_receiving", "receiving"):
+        resp = await client.patch(f"/inbound_orders/{order['id']}/status", json={"status": next_status})
+        assert resp.status_code == 200, resp.text
+    line_a, line_b = order["lines"]
+
+    # a missing tare rejects the whole batch
+    resp = await client.post(
+        f"/inbound_orders/{order['id']}/receive_batch",
+        json=[
+            {"line_id": line_a["id"], "qty": 1, "tare_id": tare["id"]},
+            {"line_id": line_a["id"], "qty": 1, "tare_id": 999999},
+        ],
+    )
+    assert resp.status_code == 404
+
+    resp = await client.post(
+        f"/inbound_orders/{order['id']}/receive_batch",
+        json=[
+            {"line_id": line_a["id"], "qty": 2, "tare_id": tare["id"]},
+            {"item_id": items[1]["id"], "qty": 1, "tare_id": tare["id"]},
+            {"line_id": line_a["id"], "qty": 3, "tare_id": tare["id"]},
+            {"item_id": items[2]["id"], "qty": 1, "tare_id": tare["id"]},
+            {"item_id": items[2]["id"], "qty": 2, "tare_id": tare["id"]},
+        ],
+    )
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["status"] == "mis_sort"
+    by_item = {ln["item_id"]: ln for ln in data["lines"]}
+    assert by_item[items[0]["id"]]["qty_received"] == 5
+    assert by_item[items[0]["id"]]["line_status"] == "fully_received"
+    assert by_item[items[1]["id"]]["line_status"] == "partially_received"
+    # the unexpected item becomes one mis-sort line
+    assert by_item[items[2]["id"]]["received_qty"] == 3
+    assert by_item[items[2]["id"]]["expected_qty"] == 0
+
+    ti = (await client.get(f"/tares/{tare['id']}/items")).json()
+    assert {row["item_id"]: row["quantity"] for row in ti} == {
+        items[0]["id"]: 5,
+        items[1]["id"]: 1,
+        items[2]["id"]: 3,
+    }
+    lines = (await client.get(f"/inbound_orders/{order['id']}")).json()["lines"]
+    assert len(lines) == 3
+
+    # existing tare items are topped up
+    resp = await client.post(
+        f"/inbound_orders/{order['id']}/receive_batch",
+        json=[{"line_id": line_b["id"], "qty": 3, "tare_id": tare["id"]}],
+    )
+    assert resp.status_code == 200, resp.text
+    ti = (await client.get(f"/tares/{tare['id']}/items")).json()
+    assert {row["item_id"]: row["quantity"] for row in ti}[items[1]["id"]] == 4
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from httpx import AsyncClient
 
@@ -288,3 +290,241 @@ async def test_inventory_move(client: AsyncClient):
     assert loc2_inv is not None
     assert loc2_inv["quantity"] == 10
 
+
+
+@pytest.mark.asyncio
+async def test_inventory_inbound_location_other_warehouse(client: AsyncClient):
+    """Тест прихода в ячейку чужого склада."""
+    wh1 = (await client.post("/warehouses", json={"name": "WH", "code": "WH_OWN"})).json()
+    wh2 = (await client.post("/warehouses", json={"name": "WH", "code": "WH_FOREIGN"})).json()
+    location = (
+        await client.post("/locations", json={"warehouse_id": wh2["id"], "code": "LOC_FOREIGN"})
+    ).json()
+    item = (
+        await client.post("/items", json={"sku": "SKU_FOREIGN", "name": "Item", "unit": "pcs"})
+    ).json()
+
+    response = await client.post(
+        "/inventory/inbound",
+        json={
+            "warehouse_id": wh1["id"],
+            "location_id": location["id"],
+            "item_id": item["id"],
+            "qty": 5,
+        },
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Location not in warehouse"
+
+
+@pytest.mark.asyncio
+async def test_inventory_inbound_batch(client: AsyncClient):
+    """Тест пакетного прихода: строки с одинаковым ключом суммируются."""
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_BATCH"})).json()
+    loc1 = (
+        await client.post("/locations", json={"warehouse_id": wh["id"], "code": "LOC_B1"})
+    ).json()
+    loc2 = (
+        await client.post("/locations", json={"warehouse_id": wh["id"], "code": "LOC_B2"})
+    ).json()
+    item = (
+        await client.post("/items", json={"sku": "SKU_BATCH", "name": "Item", "unit": "pcs"})
+    ).json()
+
+    await client.post(
+        "/inventory/inbound",
+        json={"warehouse_id": wh["id"], "location_id": loc1["id"], "item_id": item["id"], "qty": 5},
+    )
+
+    payload = [
+        {"warehouse_id": wh["id"], "location_id": loc1["id"], "item_id": item["id"], "qty": 3},
+        {"warehouse_id": wh["id"], "location_id": loc2["id"], "item_id": item["id"], "qty": 7},
+        {"warehouse_id": wh["id"], "location_id": loc1["id"], "item_id": item["id"], "qty": 2},
+    ]
+    response = await client.post("/inventory/inbound/batch", json=payload)
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert data["total_qty"] == 12
+    assert [row["index"] for row in data["rows"]] == [0, 1, 2]
+    assert data["rows"][0]["quantity"] == 10
+    assert data["rows"][1]["quantity"] == 7
+    assert data["rows"][0]["inventory_id"] == data["rows"][2]["inventory_id"]
+
+    inventory = (await client.get("/inventory", params={"item_id": item["id"]})).json()
+    by_location = {row["location_id"]: row["quantity"] for row in inventory}
+    assert by_location == {loc1["id"]: 10, loc2["id"]: 7}
+
+    turnover = (await client.get("/reports/inbound_outbound_turnover")).json()
+    assert turnover[0]["inbound_qty"] == 17
+
+
+@pytest.mark.asyncio
+async def test_inventory_inbound_batch_rejects_unknown_item(client: AsyncClient):
+    """Тест пакетного прихода: неизвестный товар отклоняет весь пакет."""
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_BATCH_NF"})).json()
+    loc = (
+        await client.post("/locations", json={"warehouse_id": wh["id"], "code": "LOC_BNF"})
+    ).json()
+    item = (
+        await client.post("/items", json={"sku": "SKU_BATCH_NF", "name": "Item", "unit": "pcs"})
+    ).json()
+
+    payload = [
+        {"warehouse_id": wh["id"], "location_id": loc["id"], "item_id": item["id"], "qty": 3},
+        {"warehouse_id": wh["id"], "location_id": loc["id"], "item_id": 99999, "qty": 1},
+    ]
+    response = await client.post("/inventory/inbound/batch", json=payload)
+    assert response.status_code == 404
+    assert "99999" in response.json()["detail"]
+
+    inventory = (await client.get("/inventory", params={"item_id": item["id"]})).json()
+    assert inventory == []
+
+
+async def _prepare_move_batch(client: AsyncClient, code: str):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": code})).json()
+    locs = []
+    for suffix in ("A", "B", "C"):
+        loc = await client.post(
+            "/locations", json={"warehouse_id": wh["id"], "code": f"{code}-{suffix}"}
+        )
+        locs.append(loc.json()["id"])
+    item = (
+        await client.post("/items", json={"sku": f"SKU_{code}", "name": "Item", "unit": "pcs"})
+    ).json()
+    await client.post(
+        "/inventory/inbound",
+        json={"warehouse_id": wh["id"], "location_id": locs[0], "item_id": item["id"], "qty": 10},
+    )
+    return wh["id"], locs, item["id"]
+
+
+@pytest.mark.asyncio
+async def test_inventory_move_batch(client: AsyncClient):
+    """Тест пакетного перемещения с неттингом движений."""
+    warehouse_id, (loc_a, loc_b, loc_c), item_id = await _prepare_move_batch(client, "WH_MB")
+
+    payload = [
+        {"warehouse_id": warehouse_id, "from_location_id": loc_a, "to_location_id": loc_b, "item_id": item_id, "qty": 6},
+        {"warehouse_id": warehouse_id, "from_location_id": loc_b, "to_location_id": loc_c, "item_id": item_id, "qty": 4},
+        {"warehouse_id": warehouse_id, "from_location_id": loc_a, "to_location_id": loc_c, "item_id": item_id, "qty": 1},
+    ]
+    response = await client.post("/inventory/move/batch", json=payload)
+    assert response.status_code == 200, response.text
+    assert response.json()["moves"] == 3
+    assert response.json()["total_qty"] == 11
+
+    inventory = (await client.get("/inventory", params={"item_id": item_id})).json()
+    by_location = {row["location_id"]: row["quantity"] for row in inventory}
+    assert by_location == {loc_a: 3, loc_b: 2, loc_c: 5}
+
+
+@pytest.mark.asyncio
+async def test_inventory_move_batch_not_enough(client: AsyncClient):
+    """Тест пакетного перемещения: нехватка отклоняет весь пакет."""
+    warehouse_id, (loc_a, loc_b, loc_c), item_id = await _prepare_move_batch(client, "WH_MB_NE")
+
+    payload = [
+        {"warehouse_id": warehouse_id, "from_location_id": loc_a, "to_location_id": loc_b, "item_id": item_id, "qty": 4},
+        {"warehouse_id": warehouse_id, "from_location_id": loc_a, "to_location_id": loc_c, "item_id": item_id, "qty": 7},
+    ]
+    response = await client.post("/inventory/move/batch", json=payload)
+    assert response.status_code == 400
+
+    inventory = (await client.get("/inventory", params={"item_id": item_id})).json()
+    assert [(row["location_id"], row["quantity"]) for row in inventory] == [(loc_a, 10)]
+
+
+@pytest.mark.asyncio
+async def test_inventory_move_deletes_emptied_row(client: AsyncClient):
+    """Тест: перемещение всего остатка удаляет строку источника."""
+    warehouse_id, (loc_a, loc_b, _), item_id = await _prepare_move_batch(client, "WH_MV_ZERO")
+
+    response = await client.post(
+        "/inventory/move",
+        json={
+            "warehouse_id": warehouse_id,
+            "from_location_id": loc_a,
+            "to_location_id": loc_b,
+            "item_id": item_id,
+            "qty": 10,
+        },
+    )
+    assert response.status_code == 200
+
+    inventory = (await client.get("/inventory", params={"item_id": item_id})).json()
+    assert [(row["location_id"], row["quantity"]) for row in inventory] == [(loc_b, 10)]
+
+
+@pytest.mark.asyncio
+async def test_inventory_move_batch_deletes_emptied_rows(client: AsyncClient):
+    """Тест: пакетное перемещение не оставляет нулевых строк."""
+    warehouse_id, (loc_a, loc_b, loc_c), item_id = await _prepare_move_batch(client, "WH_MB_ZERO")
+
+    payload = [
+        {"warehouse_id": warehouse_id, "from_location_id": loc_a, "to_location_id": loc_b, "item_id": item_id, "qty": 10},
+        {"warehouse_id": warehouse_id, "from_location_id": loc_b, "to_location_id": loc_c, "item_id": item_id, "qty": 10},
+    ]
+    response = await client.post("/inventory/move/batch", json=payload)
+    assert response.status_code == 200, response.text
+
+    inventory = (await client.get("/inventory", params={"item_id": item_id})).json()
+    assert [(row["location_id"], row["quantity"]) for row in inventory] == [(loc_c, 10)]
+
+
+async def _prepare_inventory_rows(client: AsyncClient, count: int):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_PAGE"})).json()
+    item = (
+        await client.post("/items", json={"sku": "SKU_PAGE", "name": "Item", "unit": "pcs"})
+    ).json()
+    payload = []
+    for idx in range(count):
+        loc = await client.post(
+            "/locations", json={"warehouse_id": wh["id"], "code": f"LOC_PAGE_{idx}"}
+        )
+        payload.append(
+            {"warehouse_id": wh["id"], "location_id": loc.json()["id"], "item_id": item["id"], "qty": idx + 1}
+        )
+    await client.post("/inventory/inbound/batch", json=payload)
+    return wh["id"]
+
+
+@pytest.mark.asyncio
+async def test_list_inventory_keyset_pagination(client: AsyncClient):
+    """Тест постраничного получения остатков по курсору."""
+    await _prepare_inventory_rows(client, 5)
+
+    seen = []
+    params = {"limit": 2}
+    pages = 0
+    while True:
+        response = await client.get("/inventory", params=params)
+        assert response.status_code == 200
+        seen.extend(row["id"] for row in response.json())
+        pages += 1
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        params = {"limit": 2, "cursor": next_cursor}
+
+    assert pages == 3
+    assert seen == sorted(seen)
+    assert len(set(seen)) == 5
+
+    bad = await client.get("/inventory", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_inventory_ndjson_stream(client: AsyncClient):
+    """Тест потоковой выдачи остатков в NDJSON."""
+    warehouse_id = await _prepare_inventory_rows(client, 3)
+
+    response = await client.get(
+        "/inventory", params={"warehouse_id": warehouse_id, "stream": "true"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["quantity"] for row in lines] == [1, 2, 3]
+    assert set(lines[0]) == {"id", "warehouse_id", "location_id", "tare_id", "item_id", "quantity"}
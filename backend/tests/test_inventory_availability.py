@@ -0,0 +1,157 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+
+from app.models import InventoryAvailability, Zone
+from app.services.inventory import rebuild_availability
+from tests.conftest import TestSessionLocal
+
+
+async def _prepare(client: AsyncClient):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_AVAIL"})).json()
+    zones = {}
+    for zone_type in ("inbound", "storage"):
+        zone = await client.post(
+            "/zones",
+            json={
+                "warehouse_id": wh["id"],
+                "name": zone_type,
+                "code": f"AV-{zone_type}",
+                "zone_type": zone_type,
+            },
+        )
+        zones[zone_type] = zone.json()["id"]
+    locations = {}
+    for name, zone_id in (("inbound", zones["inbound"]), ("storage", zones["storage"]), ("none", None)):
+        loc = await client.post(
+            "/locations",
+            json={"warehouse_id": wh["id"], "zone_id": zone_id, "code": f"AV-{name}"},
+        )
+        locations[name] = loc.json()["id"]
+    item = (
+        await client.post("/items", json={"sku": "SKU_AVAIL", "name": "Item", "unit": "pcs"})
+    ).json()
+    return wh["id"], zones, locations, item["id"]
+
+
+async def _availability(client: AsyncClient, warehouse_id: int) -> list[dict]:
+    response = await client.get("/inventory/availability", params={"warehouse_id": warehouse_id})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def _counters() -> dict[tuple[int, int, str], int]:
+    async with TestSessionLocal() as session:
+        rows = (await session.execute(select(InventoryAvailability))).scalars().all()
+        return {(r.warehouse_id, r.item_id, r.zone_type): r.quantity for r in rows if r.quantity}
+
+
+@pytest.mark.asyncio
+async def test_availability_follows_inventory_writes(client: AsyncClient):
+    """Тест: счётчики по типам зон обновляются вместе с остатками."""
+    warehouse_id, _, locations, item_id = await _prepare(client)
+
+    await client.post(
+        "/inventory/inbound",
+        json={"warehouse_id": warehouse_id, "location_id": locations["inbound"], "item_id": item_id, "qty": 10},
+    )
+    await client.post(
+        "/inventory/move",
+        json={
+            "warehouse_id": warehouse_id,
+            "from_location_id": locations["inbound"],
+            "to_location_id": locations["storage"],
+            "item_id": item_id,
+            "qty": 6,
+        },
+    )
+    await client.post(
+        "/inventory/move/batch",
+        json=[
+            {
+                "warehouse_id": warehouse_id,
+                "from_location_id": locations["storage"],
+                "to_location_id": locations["none"],
+                "item_id": item_id,
+                "qty": 1,
+            }
+        ],
+    )
+
+    assert await _availability(client, warehouse_id) == [
+        {
+            "warehouse_id": warehouse_id,
+            "item_id": item_id,
+            "zones": {"inbound": 4, "storage": 5, "unassigned": 1},
+            "pickable_qty": 5,
+            "not_put_away_qty": 4,
+            "total_qty": 10,
+        }
+    ]
+
+    counters = await _counters()
+    async with TestSessionLocal() as session:
+        await rebuild_availability(session)
+        await session.commit()
+    assert await _counters() == counters
+
+
+@pytest.mark.asyncio
+async def test_availability_follows_zone_changes(client: AsyncClient):
+    """Тест: смена зоны у ячейки, типа зоны и удаление зоны переносят только её остаток."""
+    warehouse_id, zones, locations, item_id = await _prepare(client)
+    for name, qty in (("inbound", 3), ("storage", 5), ("none", 1)):
+        await client.post(
+            "/inventory/inbound",
+            json={"warehouse_id": warehouse_id, "location_id": locations[name], "item_id": item_id, "qty": qty},
+        )
+
+    response = await client.patch(f"/zones/{zones['inbound']}", json={"zone_type": "storage"})
+    assert response.status_code == 200
+    (row,) = await _availability(client, warehouse_id)
+    assert row["zones"] == {"storage": 8, "unassigned": 1}
+    assert row["pickable_qty"] == 8
+
+    response = await client.patch(f"/locations/{locations['inbound']}", json={"zone_id": 0})
+    assert response.status_code == 200
+    (row,) = await _availability(client, warehouse_id)
+    assert row["zones"] == {"storage": 5, "unassigned": 4}
+
+    response = await client.patch(
+        f"/locations/{locations['none']}", json={"zone_id": zones["inbound"]}
+    )
+    assert response.status_code == 200
+    assert (await client.delete(f"/zones/{zones['storage']}")).status_code == 200
+    (row,) = await _availability(client, warehouse_id)
+    assert row["zones"] == {"storage": 1, "unassigned": 8}
+
+    # the deltas agree with a full rebuild
+    counters = await _counters()
+    async with TestSessionLocal() as session:
+        await rebuild_availability(session)
+        await session.commit()
+    assert await _counters() == counters
+
+
+@pytest.mark.asyncio
+async def test_availability_ignores_stale_reference_cache(client: AsyncClient):
+    """Тест: тип зоны для счётчиков берётся из БД, а не из кэша другого процесса."""
+    warehouse_id, zones, locations, item_id = await _prepare(client)
+    payload = {
+        "warehouse_id": warehouse_id,
+        "location_id": locations["inbound"],
+        "item_id": item_id,
+        "qty": 2,
+    }
+    await client.post("/inventory/inbound", json=payload)
+
+    # another worker retypes the zone: this process's cache is not invalidated
+    async with TestSessionLocal() as session:
+        await session.execute(
+            update(Zone).where(Zone.id == zones["inbound"]).values(zone_type="storage")
+        )
+        await rebuild_availability(session, [warehouse_id])
+        await session.commit()
+
+    await client.post("/inventory/inbound", json=payload)
+    assert await _counters() == {(warehouse_id, item_id, "storage"): 4}
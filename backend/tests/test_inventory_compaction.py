@@ -0,0 +1,58 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert, select
+
+from app.cli import build_parser
+from app.models import Inventory
+from app.services.inventory import compact_zero_inventory
+from tests.conftest import TestSessionLocal
+
+
+async def _prepare(client: AsyncClient) -> tuple[int, list[int], int]:
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_COMPACT"})).json()
+    locations = []
+    for n in range(5):
+        loc = await client.post(
+            "/locations", json={"warehouse_id": wh["id"], "code": f"COMPACT-{n}"}
+        )
+        locations.append(loc.json()["id"])
+    item = (
+        await client.post("/items", json={"sku": "SKU_COMPACT", "name": "Item", "unit": "pcs"})
+    ).json()
+    return wh["id"], locations, item["id"]
+
+
+@pytest.mark.asyncio
+async def test_compact_zero_inventory_in_batches(client: AsyncClient):
+    """Тест: компактация удаляет только нулевые строки, порциями."""
+    warehouse_id, locations, item_id = await _prepare(client)
+    async with TestSessionLocal() as session:
+        await session.execute(
+            insert(Inventory),
+            [
+                {
+                    "warehouse_id": warehouse_id,
+                    "location_id": location_id,
+                    "item_id": item_id,
+                    "quantity": 0 if n < 4 else 7,
+                }
+                for n, location_id in enumerate(locations)
+            ],
+        )
+        await session.commit()
+
+        deleted = await compact_zero_inventory(session, batch_size=3)
+        assert deleted == 4
+
+        remaining = (
+            await session.execute(select(Inventory.location_id, Inventory.quantity))
+        ).all()
+        assert remaining == [(locations[4], 7)]
+
+        assert await compact_zero_inventory(session, batch_size=3) == 0
+
+
+def test_cli_compact_inventory_arguments():
+    args = build_parser().parse_args(["compact-inventory", "--batch-size", "500"])
+    assert args.batch_size == 500
+    assert args.handler.__name__ == "_compact_inventory"
@@ -0,0 +1,85 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.models import Inventory, Item, Location, Warehouse
+from app.services.retry import retry_on_conflict
+from tests.conftest import TestSessionLocal
+
+
+async def _seed_inventory(qty: int = 10) -> int:
+    async with TestSessionLocal() as session:
+        warehouse = Warehouse(name="WH", code="WH_OCC")
+        item = Item(sku="SKU_OCC", name="Item", unit="pcs")
+        session.add_all([warehouse, item])
+        await session.flush()
+        location = Location(warehouse_id=warehouse.id, code="LOC_OCC")
+        session.add(location)
+        await session.flush()
+        inv = Inventory(
+            warehouse_id=warehouse.id, location_id=location.id, item_id=item.id, quantity=qty
+        )
+        session.add(inv)
+        await session.commit()
+        return inv.id
+
+
+@pytest.mark.asyncio
+async def test_stale_inventory_write_is_rejected():
+    inv_id = await _seed_inventory()
+
+    async with TestSessionLocal() as first, TestSessionLocal() as second:
+        inv_first = await first.get(Inventory, inv_id)
+        inv_second = await second.get(Inventory, inv_id)
+
+        inv_first.quantity -= 3
+        await first.commit()
+
+        inv_second.quantity -= 4
+        with pytest.raises(StaleDataError):
+            await second.commit()
+
+    async with TestSessionLocal() as session:
+        inv = await session.get(Inventory, inv_id)
+        assert inv.quantity == 7
+        assert inv.version == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_on_conflict_reruns_unit_of_work():
+    inv_id = await _seed_inventory()
+    attempts = []
+
+    @retry_on_conflict(attempts=3, base_delay=0)
+    async def take(session, qty: int) -> int:
+        inv = await session.get(Inventory, inv_id)
+        attempts.append(inv.quantity)
+        if len(attempts) == 1:
+            # a concurrent writer commits between our read and our flush
+            async with TestSessionLocal() as other:
+                concurrent = await other.get(Inventory, inv_id)
+                concurrent.quantity -= 2
+                await other.commit()
+        inv.quantity -= qty
+        await session.commit()
+        return inv.quantity
+
+    async with TestSessionLocal() as session:
+        assert await take(session, 5) == 3
+    assert attempts == [10, 8]
+
+
+@pytest.mark.asyncio
+async def test_retry_on_conflict_gives_up_with_409():
+    calls = []
+
+    @retry_on_conflict(attempts=2, base_delay=0)
+    async def always_stale(session):
+        calls.append(1)
+        raise StaleDataError("conflict")
+
+    async with TestSessionLocal() as session:
+        with pytest.raises(HTTPException) as exc_info:
+            await always_stale(session)
+    assert exc_info.value.status_code == 409
+    assert len(calls) == 2
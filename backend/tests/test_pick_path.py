@@ -0,0 +1,117 @@
+import pytest
+from httpx import AsyncClient
+
+from app.schemas import PATH_STRATEGY_DESCRIPTION
+from app.services.pick_path import (
+    NEAREST_NEIGHBOR_MAX_STOPS,
+    largest_gap,
+    make_stop,
+    nearest_neighbor,
+    parse_location_code,
+    s_shape,
+    sequence_stops,
+)
+
+
+def _stops(*coords: tuple[int, int]):
+    return [make_stop(n, f"ST-{aisle}-{bay}-1") for n, (aisle, bay) in enumerate(coords, start=1)]
+
+
+def _walk(route) -> list[tuple[int, int]]:
+    return [(stop.aisle, stop.bay) for stop in route]
+
+
+def test_parse_location_code():
+    assert parse_location_code("ST-3-12-2") == ("ST", 3, 12, 2)
+    assert parse_location_code("A01-07") == ("A", 1, 7, 0)
+    assert parse_location_code("LOC-5") == ("LOC", 0, 5, 0)
+    assert parse_location_code("DOCK") is None
+    # explicit coordinates win over the code
+    stop = make_stop(1, "DOCK", aisle=4, bay=2)
+    assert (stop.area, stop.aisle, stop.bay, stop.level) == ("", 4, 2, 0)
+
+
+def test_s_shape_alternates_aisle_direction():
+    stops = _stops((2, 1), (1, 5), (3, 4), (1, 2), (2, 8), (3, 1))
+    assert _walk(s_shape(stops)) == [(1, 2), (1, 5), (2, 8), (2, 1), (3, 1), (3, 4)]
+
+
+def test_largest_gap_skips_the_widest_gap_in_middle_aisles():
+    # aisle 2: picks at bays 1 and 9 with depth 11 -> the 1..9 gap is skipped
+    stops = _stops((1, 3), (2, 1), (2, 9), (3, 10), (3, 2))
+    assert _walk(largest_gap(stops)) == [(1, 3), (2, 9), (3, 10), (3, 2), (2, 1)]
+
+
+def test_nearest_neighbor_is_not_worse_than_s_shape():
+    stops = _stops((1, 1), (1, 20), (2, 19), (2, 2), (3, 1), (3, 20), (4, 18))
+    route = nearest_neighbor(stops)
+    assert sorted(_walk(route)) == sorted(_walk(stops))
+    assert _walk(route)[0] == (1, 1)
+
+
+def test_nearest_neighbor_falls_back_to_s_shape_above_the_cap():
+    # scattered picks, so the two strategies give different walks
+    stops = _stops(*[(n % 8 + 1, n * 7 % 29 + 1) for n in range(NEAREST_NEIGHBOR_MAX_STOPS + 1)])
+    at_cap = stops[:NEAREST_NEIGHBOR_MAX_STOPS]
+    assert nearest_neighbor(at_cap) != s_shape(at_cap)
+    assert nearest_neighbor(stops) == s_shape(stops)
+    # the API docs state the cap
+    assert f"up to {NEAREST_NEIGHBOR_MAX_STOPS} locations" in PATH_STRATEGY_DESCRIPTION
+
+
+def test_sequence_stops_walks_areas_in_code_order():
+    stops = [make_stop(1, "ST-1-4-1"), make_stop(2, "BUF-1-9-1"), make_stop(3, "ST-1-2-1")]
+    assert [s.location_id for s in sequence_stops(stops, "s_shape")] == [2, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_generate_picking_task_lines_follow_pick_path(client: AsyncClient):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_PATH"})).json()
+    item = (
+        await client.post("/items", json={"sku": "SKU_PATH", "name": "Item", "unit": "pcs"})
+    ).json()
+    codes = ["ST-2-3-1", "ST-1-8-1", "ST-2-9-1", "ST-1-1-1"]
+    locations = {}
+    for code in codes:
+        loc = await client.post("/locations", json={"warehouse_id": wh["id"], "code": code})
+        locations[loc.json()["id"]] = code
+        await client.post(
+            "/inventory/inbound",
+            json={"warehouse_id": wh["id"], "location_id": loc.json()["id"], "item_id": item["id"], "qty": 1},
+        )
+    # explicit coordinates put this bin at the very end of the walk
+    odd = (
+        await client.post(
+            "/locations",
+            json={"warehouse_id": wh["id"], "code": "ST-0-0-1", "aisle": 3, "bay": 1},
+        )
+    ).json()
+    assert odd["aisle"] == 3
+    locations[odd["id"]] = "ST-0-0-1"
+    await client.post(
+        "/inventory/inbound",
+        json={"warehouse_id": wh["id"], "location_id": odd["id"], "item_id": item["id"], "qty": 1},
+    )
+
+    order = (
+        await client.post(
+            "/outbound_orders",
+            json={
+                "external_number": "OUT-PATH",
+                "warehouse_id": wh["id"],
+                "partner_id": None,
+                "status": "draft",
+                "lines": [{"item_id": item["id"], "ordered_qty": 5}],
+            },
+        )
+    ).json()
+    task = await client.post(
+        "/picking_tasks/generate",
+        params={"outbound_order_id": order["id"], "path_strategy": "s_shape"},
+    )
+    assert task.status_code == 201
+    walk = [locations[line["from_location_id"]] for line in task.json()["lines"]]
+    assert walk == ["ST-1-1-1", "ST-1-8-1", "ST-2-9-1", "ST-2-3-1", "ST-0-0-1"]
+
+    fetched = (await client.get(f"/picking_tasks/{task.json()['id']}")).json()
+    assert [line["id"] for line in fetched["lines"]] == [line["id"] for line in task.json()["lines"]]
@@ -1,5 +1,12 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.models import Inventory, Movement, OutboundOrderLine, PickingTask
+from tests.conftest import TestSessionLocal
 
 
 async def _prepare_inventory(client: AsyncClient, qty: int = 5):
@@ -64,3 +71,470 @@ async def test_generate_and_complete_picking_task(client: AsyncClient):
     )
     remaining = inv.json()[0]["quantity"]
     assert remaining == 4 - line["qty_to_pick"]
+
+
+@pytest.mark.asyncio
+async def test_complete_picking_line_deletes_emptied_inventory(client: AsyncClient):
+    warehouse_id, location_id, item_id = await _prepare_inventory(client, qty=2)
+
+    order = (
+        await client.post(
+            "/outbound_orders",
+            json={
+                "external_number": "OUT-PICK-ZERO",
+                "warehouse_id": warehouse_id,
+                "partner_id": None,
+                "status": "draft",
+                "lines": [{"item_id": item_id, "ordered_qty": 2}],
+            },
+        )
+    ).json()
+    task = (await client.post(f"/picking_tasks/generate?outbound_order_id={order['id']}")).json()
+    line = task["lines"][0]
+
+    complete_resp = await client.post(
+        f"/picking_tasks/{task['id']}/complete_line",
+        json={"line_id": line["id"], "qty_picked": 2},
+    )
+    assert complete_resp.status_code == 200
+    assert complete_resp.json()["status"] == "done"
+
+    inv = await client.get(
+        "/inventory", params={"warehouse_id": warehouse_id, "location_id": location_id}
+    )
+    assert inv.json() == []
+
+
+@pytest.mark.asyncio
+async def test_generate_picking_task_allocates_across_locations(client: AsyncClient):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_ALLOC"})).json()
+    locations = []
+    for code in ("ALLOC-A", "ALLOC-B", "ALLOC-C"):
+        loc = await client.post("/locations", json={"warehouse_id": wh["id"], "code": code})
+        locations.append(loc.json()["id"])
+    items = []
+    for sku in ("SKU_ALLOC_1", "SKU_ALLOC_2"):
+        item = await client.post("/items", json={"sku": sku, "name": "Item", "unit": "pcs"})
+        items.append(item.json()["id"])
+
+    stock = [(locations[2], items[0], 3), (locations[0], items[0], 2), (locations[1], items[1], 10)]
+    for location_id, item_id, qty in stock:
+        await client.post(
+            "/inventory/inbound",
+            json={"warehouse_id": wh["id"], "location_id": location_id, "item_id": item_id, "qty": qty},
+        )
+
+    order = (
+        await client.post(
+            "/outbound_orders",
+            json={
+                "external_number": "OUT-ALLOC",
+                "warehouse_id": wh["id"],
+                "partner_id": None,
+                "status": "draft",
+                "lines": [
+                    {"item_id": items[0], "ordered_qty": 4},
+                    {"item_id": items[1], "ordered_qty": 6},
+                ],
+            },
+        )
+    ).json()
+
+    task_resp = await client.post(f"/picking_tasks/generate?outbound_order_id={order['id']}")
+    assert task_resp.status_code == 201
+    lines = sorted(
+        (ln["item_id"], ln["from_location_id"], ln["qty_to_pick"]) for ln in task_resp.json()["lines"]
+    )
+    assert lines == [
+        (items[0], locations[0], 2),
+        (items[0], locations[2], 2),
+        (items[1], locations[1], 6),
+    ]
+
+    short = (
+        await client.post(
+            "/outbound_orders",
+            json={
+                "external_number": "OUT-ALLOC-SHORT",
+                "warehouse_id": wh["id"],
+                "partner_id": None,
+                "status": "draft",
+                "lines": [{"item_id": items[0], "ordered_qty": 6}],
+            },
+        )
+    ).json()
+    short_resp = await client.post(f"/picking_tasks/generate?outbound_order_id={short['id']}")
+    assert short_resp.status_code == 400
+    assert short_resp.json()["detail"] == f"Not enough inventory to pick item {items[0]}"
+
+
+async def _prepare_wave(client: AsyncClient):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_WAVE"})).json()
+    locations = []
+    for code in ("WAVE-A", "WAVE-B"):
+        loc = await client.post("/locations", json={"warehouse_id": wh["id"], "code": code})
+        locations.append(loc.json()["id"])
+    item = (
+        await client.post("/items", json={"sku": "SKU_WAVE", "name": "Item", "unit": "pcs"})
+    ).json()
+    for location_id in locations:
+        await client.post(
+            "/inventory/inbound",
+            json={"warehouse_id": wh["id"], "location_id": location_id, "item_id": item["id"], "qty": 3},
+        )
+    orders = []
+    for n, qty in enumerate((2, 3, 5, 1)):
+        order = await client.post(
+            "/outbound_orders",
+            json={
+                "external_number": f"OUT-WAVE-{n}",
+                "warehouse_id": wh["id"],
+                "partner_id": None,
+                "status": "draft",
+                "lines": [{"item_id": item["id"], "ordered_qty": qty}],
+            },
+        )
+        orders.append(order.json()["id"])
+    return wh["id"], locations, item["id"], orders
+
+
+@pytest.mark.asyncio
+async def test_generate_wave_allocates_across_orders(client: AsyncClient):
+    warehouse_id, (loc_a, loc_b), item_id, orders = await _prepare_wave(client)
+
+    response = await client.post("/picking_tasks/generate_wave", json={"outbound_order_ids": orders})
+    assert response.status_code == 201, response.text
+    wave = response.json()
+
+    # 6 units in stock: orders of 2 and 3 fit, 5 does not, the last 1 takes the remainder
+    assert [task["outbound_order_id"] for task in wave["tasks"]] == [orders[0], orders[1], orders[3]]
+    assert wave["skipped"] == [{"outbound_order_id": orders[2], "reason": "Not enough inventory"}]
+
+    assert [(loc["location_id"], loc["total_qty"]) for loc in wave["locations"]] == [
+        (loc_a, 3),
+        (loc_b, 3),
+    ]
+    picks_a = [(p["outbound_order_id"], p["qty_to_pick"]) for p in wave["locations"][0]["picks"]]
+    assert picks_a == [(orders[0], 2), (orders[1], 1)]
+
+    statuses = {
+        order_id: (await client.get(f"/outbound_orders/{order_id}")).json()["status"]
+        for order_id in orders
+    }
+    assert statuses == {
+        orders[0]: "picking",
+        orders[1]: "picking",
+        orders[2]: "draft",
+        orders[3]: "picking",
+    }
+
+    released = [orders[0], orders[1], orders[3]]
+    again = await client.post("/picking_tasks/generate_wave", json={"outbound_order_ids": released})
+    assert again.status_code == 201
+    assert again.json()["tasks"] == []
+    assert again.json()["skipped"] == [
+        {"outbound_order_id": order_id, "reason": "Order status is picking"} for order_id in released
+    ]
+
+
+@pytest.mark.asyncio
+async def test_generate_wave_by_filter(client: AsyncClient):
+    warehouse_id, _, _, orders = await _prepare_wave(client)
+
+    response = await client.post(
+        "/picking_tasks/generate_wave", json={"warehouse_id": warehouse_id, "limit": 2}
+    )
+    assert response.status_code == 201
+    assert [task["outbound_order_id"] for task in response.json()["tasks"]] == orders[:2]
+
+    assert (await client.post("/picking_tasks/generate_wave", json={})).status_code == 422
+    missing = await client.post("/picking_tasks/generate_wave", json={"outbound_order_ids": [999]})
+    assert missing.status_code == 404
+
+
+async def _stock(location_id: int, item_id: int) -> tuple[int, int] | None:
+    async with TestSessionLocal() as session:
+        row = (
+            await session.execute(
+                select(Inventory.quantity, Inventory.reserved_qty).where(
+                    Inventory.location_id == location_id, Inventory.item_id == item_id
+                )
+            )
+        ).one_or_none()
+    return tuple(row) if row is not None else None
+
+
+async def _draft_order(client: AsyncClient, number: str, warehouse_id: int, item_id: int, qty: int):
+    response = await client.post(
+        "/outbound_orders",
+        json={
+            "external_number": number,
+            "warehouse_id": warehouse_id,
+            "partner_id": None,
+            "status": "draft",
+            "lines": [{"item_id": item_id, "ordered_qty": qty}],
+        },
+    )
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_generate_reserves_stock_until_picked_or_cancelled(client: AsyncClient):
+    warehouse_id, location_id, item_id = await _prepare_inventory(client, qty=5)
+    first = await _draft_order(client, "OUT-RES-1", warehouse_id, item_id, 3)
+    second = await _draft_order(client, "OUT-RES-2", warehouse_id, item_id, 3)
+
+    task = (await client.post(f"/picking_tasks/generate?outbound_order_id={first}")).json()
+    assert await _stock(location_id, item_id) == (5, 3)
+
+    # only 2 units are unreserved
+    short = await client.post(f"/picking_tasks/generate?outbound_order_id={second}")
+    assert short.status_code == 400
+    other = await client.post("/locations", json={"warehouse_id": warehouse_id, "code": "LOC_RES"})
+    move = await client.post(
+        "/inventory/move",
+        json={
+            "warehouse_id": warehouse_id,
+            "from_location_id": location_id,
+            "to_location_id": other.json()["id"],
+            "item_id": item_id,
+            "qty": 3,
+        },
+    )
+    assert move.status_code == 400
+
+    picked = await client.post(
+        f"/picking_tasks/{task['id']}/complete_line",
+        json={"line_id": task["lines"][0]["id"], "qty_picked": 1},
+    )
+    assert picked.status_code == 200
+    assert await _stock(location_id, item_id) == (4, 2)
+
+    cancel = await client.patch(f"/outbound_orders/{first}/status", json={"status": "cancelled"})
+    assert cancel.status_code == 200
+    assert await _stock(location_id, item_id) == (4, 0)
+    cancelled = (await client.get(f"/picking_tasks/{task['id']}")).json()
+    assert cancelled["status"] == "cancelled"
+    late = await client.post(
+        f"/picking_tasks/{task['id']}/complete_line",
+        json={"line_id": task["lines"][0]["id"], "qty_picked": 1},
+    )
+    assert late.status_code == 400
+
+    retry = await client.post(f"/picking_tasks/generate?outbound_order_id={second}")
+    assert retry.status_code == 201
+    assert await _stock(location_id, item_id) == (4, 3)
+
+
+@pytest.mark.asyncio
+async def test_generate_wave_reserves_stock(client: AsyncClient):
+    warehouse_id, (loc_a, loc_b), item_id, orders = await _prepare_wave(client)
+
+    response = await client.post("/picking_tasks/generate_wave", json={"outbound_order_ids": orders})
+    assert response.status_code == 201
+    assert await _stock(loc_a, item_id) == (3, 3)
+    assert await _stock(loc_b, item_id) == (3, 3)
+
+    late = await _draft_order(client, "OUT-WAVE-LATE", warehouse_id, item_id, 1)
+    again = await client.post("/picking_tasks/generate_wave", json={"outbound_order_ids": [late]})
+    assert again.json()["skipped"] == [
+        {"outbound_order_id": late, "reason": "Not enough inventory"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_complete_lines_applies_buffered_confirmations(client: AsyncClient):
+    warehouse_id, (loc_a, loc_b), item_id, orders = await _prepare_wave(client)
+    task = (await client.post(f"/picking_tasks/generate?outbound_order_id={orders[2]}")).json()
+    line_a, line_b = task["lines"]
+    assert (line_a["from_location_id"], line_a["qty_to_pick"]) == (loc_a, 3)
+    assert (line_b["from_location_id"], line_b["qty_to_pick"]) == (loc_b, 2)
+
+    too_much = await client.post(
+        f"/picking_tasks/{task['id']}/complete_lines",
+        json=[{"line_id": line_b["id"], "qty_picked": 2}, {"line_id": line_b["id"], "qty_picked": 1}],
+    )
+    assert too_much.status_code == 400
+    assert await _stock(loc_b, item_id) == (3, 2)
+
+    response = await client.post(
+        f"/picking_tasks/{task['id']}/complete_lines",
+        json=[
+            {"line_id": line_a["id"], "qty_picked": 1},
+            {"line_id": line_b["id"], "qty_picked": 2},
+            {"line_id": line_a["id"], "qty_picked": 2},
+        ],
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["status"] == "done"
+    assert [(ln["line_id"], ln["qty_picked"], ln["qty_remaining"]) for ln in result["lines"]] == [
+        (line_a["id"], 3, 0),
+        (line_b["id"], 2, 0),
+    ]
+    assert await _stock(loc_a, item_id) is None
+    assert await _stock(loc_b, item_id) == (1, 0)
+
+    order = (await client.get(f"/outbound_orders/{orders[2]}")).json()
+    assert order["lines"][0]["picked_qty"] == 5
+    async with TestSessionLocal() as session:
+        movements = (
+            await session.execute(
+                select(Movement.quantity).where(Movement.to_location_id.is_(None)).order_by(Movement.id)
+            )
+        ).scalars().all()
+    assert movements == [1, 2, 2]
+
+
+@pytest.mark.asyncio
+async def test_list_picking_tasks_filters_and_pages(client: AsyncClient):
+    warehouse_id, _, item_id, orders = await _prepare_wave(client)
+    wave = (
+        await client.post("/picking_tasks/generate_wave", json={"outbound_order_ids": orders})
+    ).json()
+    first, second, third = wave["tasks"]
+    line = first["lines"][0]
+    await client.post(
+        f"/picking_tasks/{first['id']}/complete_line",
+        json={"line_id": line["id"], "qty_picked": 1},
+    )
+
+    page = await client.get(
+        "/picking_tasks", params={"warehouse_id": warehouse_id, "status": "new", "limit": 1}
+    )
+    assert [task["id"] for task in page.json()] == [second["id"]]
+    rest = await client.get(
+        "/picking_tasks",
+        params={"warehouse_id": warehouse_id, "status": "new", "limit": 1, "cursor": page.headers["X-Next-Cursor"]},
+    )
+    assert [task["id"] for task in rest.json()] == [third["id"]]
+    assert "X-Next-Cursor" not in rest.headers
+
+    lean = await client.get(
+        "/picking_tasks",
+        params={
+            "status": ["new", "in_progress"],
+            "outbound_order_id": orders[0],
+            "include_lines": "false",
+        },
+    )
+    assert lean.status_code == 200
+    [summary] = lean.json()
+    assert "lines" not in summary
+    assert summary["id"] == first["id"]
+    assert summary["status"] == "in_progress"
+    assert (summary["lines_count"], summary["qty_to_pick"], summary["qty_picked"], summary["qty_remaining"]) == (
+        1,
+        2,
+        1,
+        1,
+    )
+
+    bad = await client.get("/picking_tasks", params={"cursor": "???"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_claim_assigns_each_task_once(client: AsyncClient):
+    warehouse_id, _, _, orders = await _prepare_wave(client)
+    wave = (
+        await client.post("/picking_tasks/generate_wave", json={"outbound_order_ids": orders})
+    ).json()
+    task_ids = [task["id"] for task in wave["tasks"]]
+    async with TestSessionLocal() as session:
+        await session.execute(
+            update(PickingTask).where(PickingTask.id == task_ids[2]).values(priority=5)
+        )
+        await session.commit()
+
+    claims = await asyncio.gather(
+        *(
+            client.post(
+                "/picking_tasks/claim", json={"warehouse_id": warehouse_id, "assignee": f"picker-{n}"}
+            )
+            for n in range(5)
+        )
+    )
+    claimed = [response.json() for response in claims if response.status_code == 200]
+    assert [response.status_code for response in claims].count(204) == 2
+    # highest priority first, then by creation
+    assert [task["id"] for task in claimed] == [task_ids[2], task_ids[0], task_ids[1]]
+    assert len({task["assignee"] for task in claimed}) == 3
+    assert all(task["status"] == "in_progress" and task["claimed_at"] for task in claimed)
+
+    mine = await client.get("/picking_tasks", params={"assignee": claimed[0]["assignee"]})
+    assert [task["id"] for task in mine.json()] == [task_ids[2]]
+
+
+@pytest.mark.asyncio
+async def test_complete_line_returns_changed_line_and_guards_overpick(client: AsyncClient):
+    warehouse_id, location_id, item_id = await _prepare_inventory(client, qty=6)
+    order_id = await _draft_order(client, "OUT-NARROW", warehouse_id, item_id, 2)
+    first = (await client.post(f"/picking_tasks/generate?outbound_order_id={order_id}")).json()
+    # a second task for the same open quantity: only one of them can be picked
+    second = (await client.post(f"/picking_tasks/generate?outbound_order_id={order_id}")).json()
+
+    line = first["lines"][0]
+    response = await client.post(
+        f"/picking_tasks/{first['id']}/complete_line",
+        json={"line_id": line["id"], "qty_picked": 1},
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "task_id": first["id"],
+        "status": "in_progress",
+        "line": {**line, "qty_picked": 1},
+    }
+
+    over = await client.post(
+        f"/picking_tasks/{first['id']}/complete_line",
+        json={"line_id": line["id"], "qty_picked": 2},
+    )
+    assert over.status_code == 400
+    missing = await client.post(
+        f"/picking_tasks/{first['id']}/complete_line",
+        json={"line_id": second["lines"][0]["id"], "qty_picked": 1},
+    )
+    assert missing.status_code == 404
+
+    full = await client.post(
+        f"/picking_tasks/{first['id']}/complete_line",
+        params={"full": "true"},
+        json={"line_id": line["id"], "qty_picked": 1},
+    )
+    assert full.json()["status"] == "done"
+    assert full.json()["lines"][0]["qty_picked"] == 2
+
+    overpicked = await client.post(
+        f"/picking_tasks/{second['id']}/complete_line",
+        json={"line_id": second["lines"][0]["id"], "qty_picked": 1},
+    )
+    assert overpicked.status_code == 400
+    assert overpicked.json()["detail"] == "Picked quantity exceeds ordered"
+    # nothing of the rejected pick was kept
+    assert await _stock(location_id, item_id) == (4, 2)
+    assert (await client.get(f"/outbound_orders/{order_id}")).json()["lines"][0]["picked_qty"] == 2
+
+
+@pytest.mark.asyncio
+async def test_complete_line_bumps_order_line_version(client: AsyncClient):
+    warehouse_id, location_id, item_id = await _prepare_inventory(client, qty=4)
+    order_id = await _draft_order(client, "OUT-VERSION", warehouse_id, item_id, 2)
+    task = (await client.post(f"/picking_tasks/generate?outbound_order_id={order_id}")).json()
+
+    async with TestSessionLocal() as session:
+        stale = await session.scalar(
+            select(OutboundOrderLine).where(OutboundOrderLine.outbound_order_id == order_id)
+        )
+        response = await client.post(
+            f"/picking_tasks/{task['id']}/complete_line",
+            json={"line_id": task["lines"][0]["id"], "qty_picked": 1},
+        )
+        assert response.status_code == 200
+
+        # an ORM write from before the pick must not overwrite it
+        stale.picked_qty += 1
+        with pytest.raises(StaleDataError):
+            await session.commit()
+
+    assert (await client.get(f"/outbound_orders/{order_id}")).json()["lines"][0]["picked_qty"] == 1
@@ -0,0 +1,342 @@
+"""
+Регрессионные проверки планов запросов горячих эндпоинтов.
+
+Каждый SELECT, выполненный эндпоинтом, повторно прогоняется через EXPLAIN
+(EXPLAIN QUERY PLAN на SQLite, EXPLAIN на PostgreSQL). Полный проход по
+таблицам из HOT_TABLES считается регрессией: значит, запрос перестал
+попадать в индекс.
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, insert
+
+from app.models import (
+    InboundOrder,
+    InboundOrderLine,
+    InboundReceipt,
+    Inventory,
+    Item,
+    Location,
+    Movement,
+    OutboundOrder,
+    OutboundOrderLine,
+    Partner,
+    PickingTask,
+    PickingTaskLine,
+    Tare,
+    TareItem,
+    TareType,
+    Warehouse,
+)
+from tests.conftest import TestSessionLocal, engine
+
+HOT_TABLES = (
+    "inventory",
+    "movements",
+    "tare_items",
+    "tares",
+    "locations",
+    "inbound_orders",
+    "inbound_receipts",
+    "inbound_order_lines",
+    "outbound_order_lines",
+    "picking_task_lines",
+    "picking_tasks",
+)
+
+WAREHOUSES = 2
+LOCATIONS = 200
+ITEMS = 100
+ORDERS = 40
+LINES_PER_ORDER = 4
+
+
+async def _seed() -> None:
+    """
+    Наполняет базу объёмом, при котором у планировщика есть выбор между
+    индексом и полным сканированием.
+    """
+    now = datetime.now(timezone.utc)
+    async with TestSessionLocal() as session:
+        await session.execute(
+            insert(Warehouse),
+            [{"id": w, "name": f"WH {w}", "code": f"WH{w}"} for w in range(1, WAREHOUSES + 1)],
+        )
+        locations = [
+            {
+                "id": (w - 1) * LOCATIONS + n,
+                "warehouse_id": w,
+                "code": f"W{w}-{n:04d}",
+            }
+            for w in range(1, WAREHOUSES + 1)
+            for n in range(1, LOCATIONS + 1)
+        ]
+        await session.execute(insert(Location), locations)
+        await session.execute(
+            insert(Item),
+            [{"id": i, "sku": f"SKU{i:05d}", "name": f"Item {i}"} for i in range(1, ITEMS + 1)],
+        )
+        await session.execute(
+            insert(Partner), [{"id": 1, "name": "Partner", "code": "P1", "type": "customer"}]
+        )
+
+        inventory = []
+        movements = []
+        for loc in locations:
+            for k in range(10):
+                item_id = (loc["id"] * 7 + k) % ITEMS + 1
+                inventory.append(
+                    {
+                        "warehouse_id": loc["warehouse_id"],
+                        "location_id": loc["id"],
+                        "item_id": item_id,
+                        "quantity": k + 1,
+                    }
+                )
+                movements.append(
+                    {
+                        "warehouse_id": loc["warehouse_id"],
+                        "item_id": item_id,
+                        "to_location_id": loc["id"],
+                        "quantity": k + 1,
+                        "created_at": now - timedelta(minutes=len(movements)),
+                    }
+                )
+        await session.execute(insert(Inventory).prefix_with("OR IGNORE"), inventory)
+        await session.execute(insert(Movement), movements)
+
+        await session.execute(
+            insert(TareType), [{"id": 1, "code": "PAL", "name": "Pallet", "prefix": "PAL"}]
+        )
+        await session.execute(
+            insert(Tare),
+            [
+                {
+                    "id": loc["id"],
+                    "warehouse_id": loc["warehouse_id"],
+                    "location_id": loc["id"],
+                    "type_id": 1,
+                    "tare_code": f"PAL{loc['id']:06d}",
+                    "status": "storage",
+                }
+                for loc in locations
+            ],
+        )
+        await session.execute(
+            insert(TareItem),
+            [
+                {"tare_id": loc["id"], "item_id": (loc["id"] + k) % ITEMS + 1, "quantity": 5}
+                for loc in locations
+                for k in range(3)
+            ],
+        )
+
+        for order_id in range(1, ORDERS + 1):
+            warehouse_id = order_id % WAREHOUSES + 1
+            await session.execute(
+                insert(OutboundOrder),
+                [
+                    {
+                        "id": order_id,
+                        "external_number": f"OUT-{order_id}",
+                        "warehouse_id": warehouse_id,
+                        "partner_id": 1,
+                        "status": "draft",
+                    }
+                ],
+            )
+            await session.execute(
+                insert(OutboundOrderLine),
+                [
+                    {
+                        "outbound_order_id": order_id,
+                        "item_id": (order_id + k) % ITEMS + 1,
+                        "ordered_qty": 1,
+                    }
+                    for k in range(LINES_PER_ORDER)
+                ],
+            )
+            await session.execute(
+                insert(PickingTask),
+                [
+                    {
+                        "id": order_id,
+                        "warehouse_id": warehouse_id,
+                        "outbound_order_id": order_id,
+                        "status": "new",
+                    }
+                ],
+            )
+            await session.execute(
+                insert(PickingTaskLine),
+                [
+                    {
+                        "picking_task_id": order_id,
+                        "item_id": (order_id + k) % ITEMS + 1,
+                        "from_location_id": (warehouse_id - 1) * LOCATIONS + k + 1,
+                        "qty_to_pick": 1,
+                    }
+                    for k in range(LINES_PER_ORDER)
+                ],
+            )
+            await session.execute(
+                insert(InboundOrder),
+                [
+                    {
+                        "id": order_id,
+                        "external_number": f"IN-{order_id}",
+                        "warehouse_id": warehouse_id,
+                        "partner_id": 1,
+                        "status": "receiving",
+                    }
+                ],
+            )
+            await session.execute(
+                insert(InboundOrderLine),
+                [
+                    {
+                        "id": (order_id - 1) * LINES_PER_ORDER + k + 1,
+                        "inbound_order_id": order_id,
+                        "item_id": (order_id + k) % ITEMS + 1,
+                        "expected_qty": 5,
+                        "received_qty": 5,
+                    }
+                    for k in range(LINES_PER_ORDER)
+                ],
+            )
+            await session.execute(
+                insert(InboundReceipt),
+                [
+                    {
+                        "inbound_order_id": order_id,
+                        "line_id": (order_id - 1) * LINES_PER_ORDER + k + 1,
+                        "tare_id": (warehouse_id - 1) * LOCATIONS + k + 1,
+                        "item_id": (order_id + k) % ITEMS + 1,
+                        "quantity": 5,
+                    }
+                    for k in range(LINES_PER_ORDER)
+                ],
+            )
+        await session.commit()
+
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+        await conn.commit()
+
+
+@contextmanager
+def _capture_selects():
+    statements: list[tuple[str, object]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _full_scans(dialect: str, plan: list[str]) -> list[str]:
+    tables = "|".join(HOT_TABLES)
+    if dialect == "sqlite":
+        # "SCAN inventory" / "SCAN inventory USING COVERING INDEX ..." walk every row;
+        # "SEARCH ..." is an index lookup
+        pattern = re.compile(rf"^SCAN ({tables})\b")
+    else:
+        pattern = re.compile(rf"Seq Scan on ({tables})\b")
+    return [line for line in plan if pattern.search(line.strip())]
+
+
+async def _explain(statement: str, parameters) -> list[str]:
+    async with engine.connect() as conn:
+        dialect = conn.dialect.name
+        prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+        result = await conn.exec_driver_sql(prefix + statement, parameters)
+        rows = result.all()
+    # SQLite: (id, parent, notused, detail); PostgreSQL: (QUERY PLAN,)
+    return [row[-1] for row in rows]
+
+
+async def _assert_no_full_scans(client: AsyncClient, method: str, url: str, **kwargs) -> None:
+    with _capture_selects() as statements:
+        response = await client.request(method, url, **kwargs)
+    assert response.status_code < 400, (url, response.text)
+    assert statements, url
+
+    dialect = engine.dialect.name
+    for statement, parameters in statements:
+        plan = await _explain(statement, parameters)
+        scans = _full_scans(dialect, plan)
+        assert not scans, f"{method} {url}: full scan {scans}\n{statement}\n" + "\n".join(plan)
+
+
+HOT_REQUESTS = [
+    ("GET", "/inventory", {"params": {"warehouse_id": 1, "item_id": 5}}),
+    ("GET", "/inventory", {"params": {"warehouse_id": 2, "limit": 50}}),
+    ("GET", "/tares", {"params": {"location_id": 17}}),
+    ("GET", "/tares/17/items", {}),
+    ("GET", "/picking_tasks/3", {}),
+    ("GET", "/picking_tasks", {"params": {"warehouse_id": 1, "status": "new", "limit": 10}}),
+    (
+        "GET",
+        "/picking_tasks",
+        {"params": {"warehouse_id": 2, "status": "new", "limit": 10, "include_lines": "false"}},
+    ),
+    ("GET", "/inbound_orders/3", {}),
+    ("GET", "/inbound_orders", {"params": {"warehouse_id": 1, "limit": 10}}),
+    (
+        "GET",
+        "/inbound_orders",
+        {"params": {"warehouse_id": 2, "limit": 10, "include_lines": "false"}},
+    ),
+    ("GET", "/outbound_orders/3", {}),
+    ("GET", "/locations", {"params": {"warehouse_id": 1}}),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method,url,kwargs", HOT_REQUESTS)
+async def test_hot_queries_use_indexes(client: AsyncClient, method, url, kwargs):
+    await _seed()
+    await _assert_no_full_scans(client, method, url, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_keyset_next_page_uses_index(client: AsyncClient):
+    await _seed()
+    first = await client.get("/inventory", params={"warehouse_id": 1, "limit": 100})
+    cursor = first.headers["X-Next-Cursor"]
+    await _assert_no_full_scans(
+        client, "GET", "/inventory", params={"warehouse_id": 1, "limit": 100, "cursor": cursor}
+    )
+
+
+@pytest.mark.asyncio
+async def test_as_of_replay_uses_index(client: AsyncClient):
+    await _seed()
+    as_of = (datetime.now(timezone.utc) - timedelta(minutes=30)).isoformat()
+    await _assert_no_full_scans(
+        client, "GET", "/inventory", params={"warehouse_id": 1, "as_of": as_of}
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_picking_task_uses_index(client: AsyncClient):
+    await _seed()
+    await _assert_no_full_scans(
+        client, "POST", "/picking_tasks/generate", params={"outbound_order_id": 5}
+    )
+
+
+@pytest.mark.asyncio
+async def test_full_scan_is_detected(client: AsyncClient):
+    await _seed()
+    plan = await _explain("SELECT * FROM inventory WHERE quantity = ?", (3,))
+    assert _full_scans(engine.dialect.name, plan)
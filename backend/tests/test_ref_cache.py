@@ -0,0 +1,64 @@
+import pytest
+from httpx import AsyncClient
+
+from app.services.ref_cache import TTLCache, reference_cache
+from tests.conftest import TestSessionLocal
+
+
+def test_ttl_cache_lru_and_expiry():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) == "a"  # 1 becomes most recent
+    cache.set(3, "c")  # evicts 2
+    assert cache.get(2) is None
+    assert cache.get(3) == "c"
+
+    now[0] = 11
+    assert cache.get(1) is None
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_location_cache_invalidated_on_zone_update(client: AsyncClient):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_CACHE"})).json()
+    zone = (
+        await client.post(
+            "/zones",
+            json={"name": "In", "code": "IN", "warehouse_id": wh["id"], "zone_type": "inbound"},
+        )
+    ).json()
+    loc = (
+        await client.post(
+            "/locations",
+            json={"warehouse_id": wh["id"], "zone_id": zone["id"], "code": "CACHE-01"},
+        )
+    ).json()
+
+    async with TestSessionLocal() as session:
+        ref = await reference_cache.location(session, loc["id"])
+        assert ref.zone_type == "inbound"
+        assert (await reference_cache.location(session, loc["id"])) is ref
+
+    await client.patch(f"/zones/{zone['id']}", json={"zone_type": "storage"})
+
+    async with TestSessionLocal() as session:
+        ref = await reference_cache.location(session, loc["id"])
+        assert ref.zone_type == "storage"
+
+    stats = (await client.get("/health/cache")).json()
+    assert stats["locations"]["hits"] >= 1
+    assert stats["locations"]["misses"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_warehouse_cache_invalidated_on_delete(client: AsyncClient):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_CACHE_DEL"})).json()
+    loc_payload = {"warehouse_id": wh["id"], "code": "CACHE-DEL"}
+    assert (await client.post("/locations", json=loc_payload)).status_code == 200
+
+    await client.delete(f"/warehouses/{wh['id']}")
+
+    response = await client.post("/locations", json=loc_payload)
+    assert response.status_code == 404
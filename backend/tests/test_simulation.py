@@ -0,0 +1,172 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.models import Inventory, Item, Location, Warehouse
+from app.services.allocation import (
+    STRATEGIES,
+    Bin,
+    InsufficientStock,
+    fill_from_pool,
+    reserve_order_lines,
+)
+from app.services.simulation import StockArrays, load_stock, simulate
+from tests.conftest import TestSessionLocal
+from tests.test_picking import _prepare_wave, _stock
+
+
+def test_simulation_matches_allocation_service():
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1)
+    rows = [
+        (1, item_id, item_id * 100 + n, rng.randint(1, 20), start + timedelta(days=rng.randint(0, 30)))
+        for item_id in range(1, 11)
+        for n in range(rng.randint(0, 6))
+    ]
+    orders = [
+        (order_id, 1, [(rng.randint(1, 12), rng.randint(1, 15)) for _ in range(rng.randint(1, 4))])
+        for order_id in range(300)
+    ]
+
+    for strategy in STRATEGIES:
+        pool = {}
+        for _, item_id, location_id, qty, updated_at in rows:
+            pool.setdefault(item_id, []).append(Bin(location_id, qty, updated_at))
+        expected = 0
+        for _, _, lines in orders:
+            order_lines = [
+                SimpleNamespace(item_id=item_id, ordered_qty=qty, picked_qty=0)
+                for item_id, qty in lines
+            ]
+            try:
+                fill_from_pool(order_lines, pool, strategy)
+            except InsufficientStock:
+                continue
+            expected += 1
+
+        stock = StockArrays(rows)
+        outcome = simulate(stock, orders, {1: strategy})
+        assert outcome.orders_allocatable == expected, strategy
+        left = {
+            (item_id, b.location_id): b.quantity for item_id, bins in pool.items() for b in bins
+        }
+        assert {
+            (row[1], row[2]): int(qty) for row, qty in zip(rows, stock.available) if qty > 0
+        } == left, strategy
+
+
+def test_simulation_rejects_unknown_strategy():
+    with pytest.raises(ValueError, match="closest_first"):
+        simulate(StockArrays([]), [], {1: "closest_first"})
+
+
+@pytest.mark.asyncio
+async def test_simulation_matches_reserve_order_lines():
+    rng = random.Random(11)
+    async with TestSessionLocal() as session:
+        warehouse = Warehouse(name="WH", code="WH_PARITY")
+        items = [Item(sku=f"SKU_PARITY_{n}", name="Item") for n in range(4)]
+        session.add_all([warehouse, *items])
+        await session.flush()
+        locations = [Location(warehouse_id=warehouse.id, code=f"PARITY-{n}") for n in range(8)]
+        session.add_all(locations)
+        await session.flush()
+        start = datetime(2026, 1, 1)
+        session.add_all(
+            Inventory(
+                warehouse_id=warehouse.id,
+                location_id=location.id,
+                item_id=item.id,
+                # repeated quantities and dates exercise the tie-breaks
+                quantity=rng.choice((2, 3, 5, 5, 8)),
+                updated_at=start + timedelta(days=rng.randint(0, 3)),
+            )
+            for item in items
+            for location in rng.sample(locations, rng.randint(2, 6))
+        )
+        await session.commit()
+        warehouse_id = warehouse.id
+        item_ids = [item.id for item in items]
+
+    orders = [
+        (
+            order_id,
+            warehouse_id,
+            [(rng.choice(item_ids), rng.randint(1, 9)) for _ in range(rng.randint(1, 3))],
+        )
+        for order_id in range(40)
+    ]
+
+    async def left(session) -> dict[tuple[int, int], int]:
+        rows = await session.execute(
+            select(
+                Inventory.item_id,
+                Inventory.location_id,
+                Inventory.quantity - Inventory.reserved_qty,
+            )
+        )
+        return {(item_id, location_id): qty for item_id, location_id, qty in rows if qty > 0}
+
+    for strategy in STRATEGIES:
+        async with TestSessionLocal() as session:
+            reserved = 0
+            for _, _, lines in orders:
+                order_lines = [
+                    SimpleNamespace(item_id=item_id, ordered_qty=qty, picked_qty=0)
+                    for item_id, qty in lines
+                ]
+                try:
+                    await reserve_order_lines(session, warehouse_id, order_lines, strategy)
+                except HTTPException:
+                    continue
+                reserved += 1
+            await session.flush()
+            expected = await left(session)
+            await session.rollback()
+
+            stock = await load_stock(session, {(warehouse_id, item_id) for item_id in item_ids})
+            outcome = simulate(stock, orders, {warehouse_id: strategy})
+
+        assert 0 < outcome.orders_allocatable < len(orders), strategy
+        assert outcome.orders_allocatable == reserved, strategy
+        assert {
+            (item_id, int(location_id)): int(qty)
+            for (_, item_id), (begin, end) in stock.slices.items()
+            for location_id, qty in zip(stock.location_ids[begin:end], stock.available[begin:end])
+            if qty > 0
+        } == expected, strategy
+
+
+@pytest.mark.asyncio
+async def test_simulate_reports_shortages_without_writing(client: AsyncClient):
+    warehouse_id, (loc_a, _), item_id, orders = await _prepare_wave(client)
+
+    response = await client.post("/picking_tasks/simulate", json={"warehouse_id": warehouse_id})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    # 6 units: orders of 2, 3 and 1 fit, 5 does not
+    assert (result["orders_total"], result["orders_allocatable"]) == (4, 3)
+    assert (result["units_requested"], result["units_allocatable"]) == (11, 6)
+    assert result["order_fill_rate"] == 0.75
+    [sku] = result["skus"]
+    assert sku == {
+        "item_id": item_id,
+        "sku": "SKU_WAVE",
+        "requested_qty": 11,
+        "allocatable_qty": 6,
+        "short_qty": 5,
+        "orders_short": 1,
+        "fill_rate": 0.5455,
+    }
+
+    assert await _stock(loc_a, item_id) == (3, 0)
+    assert (await client.get(f"/outbound_orders/{orders[0]}")).json()["status"] == "draft"
+    assert (await client.get("/picking_tasks")).json() == []
+
+    wave = await client.post("/picking_tasks/generate_wave", json={"warehouse_id": warehouse_id})
+    assert [s["outbound_order_id"] for s in wave.json()["skipped"]] == [orders[2]]
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+
+from app.models import InventorySnapshot, InventorySnapshotRow, Movement
+from app.services.snapshots import prune_inventory_snapshots, run_snapshot_job
+from tests.conftest import TestSessionLocal
+
+
+async def _prepare(client: AsyncClient):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH_SNAP"})).json()
+    loc_a = (
+        await client.post("/locations", json={"warehouse_id": wh["id"], "code": "SNAP-A"})
+    ).json()
+    loc_b = (
+        await client.post("/locations", json={"warehouse_id": wh["id"], "code": "SNAP-B"})
+    ).json()
+    item = (
+        await client.post("/items", json={"sku": "SKU_SNAP", "name": "Item", "unit": "pcs"})
+    ).json()
+    return wh["id"], loc_a["id"], loc_b["id"], item["id"]
+
+
+def _future() -> str:
+    return (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat()
+
+
+async def _take_snapshot() -> InventorySnapshot:
+    async with TestSessionLocal() as session:
+        return await run_snapshot_job(session, retention_days=30)
+
+
+@pytest.mark.asyncio
+async def test_inventory_as_of_replays_movements_after_snapshot(client: AsyncClient):
+    warehouse_id, loc_a, loc_b, item_id = await _prepare(client)
+    await client.post(
+        "/inventory/inbound",
+        json={"warehouse_id": warehouse_id, "location_id": loc_a, "item_id": item_id, "qty": 10},
+    )
+    snapshot = await _take_snapshot()
+    assert snapshot.rows_count == 1
+    async with TestSessionLocal() as session:
+        stored = await session.get(InventorySnapshot, snapshot.id)
+        assert stored.last_movement_id == await session.scalar(select(func.max(Movement.id)))
+
+    await client.post(
+        "/inventory/move",
+        json={
+            "warehouse_id": warehouse_id,
+            "from_location_id": loc_a,
+            "to_location_id": loc_b,
+            "item_id": item_id,
+            "qty": 4,
+        },
+    )
+    await client.post(
+        "/inventory/inbound",
+        json={"warehouse_id": warehouse_id, "location_id": loc_b, "item_id": item_id, "qty": 5},
+    )
+
+    response = await client.get("/inventory", params={"as_of": _future()})
+    assert response.status_code == 200, response.text
+    stock = {row["location_id"]: row["quantity"] for row in response.json()}
+    assert stock == {loc_a: 6, loc_b: 9}
+
+    # the replay starts from the snapshot rows, not from the movement log start
+    async with TestSessionLocal() as session:
+        await session.execute(
+            update(InventorySnapshotRow)
+            .where(InventorySnapshotRow.snapshot_id == snapshot.id)
+            .values(quantity=100)
+        )
+        await session.commit()
+    response = await client.get(
+        "/inventory", params={"as_of": _future(), "location_id": loc_a}
+    )
+    assert [row["quantity"] for row in response.json()] == [96]
+
+    summary = await client.get("/reports/inventory_summary", params={"as_of": _future()})
+    assert summary.json() == [{"warehouse_id": warehouse_id, "item_id": item_id, "quantity": 105}]
+
+
+@pytest.mark.asyncio
+async def test_inventory_as_of_before_history_is_empty(client: AsyncClient):
+    warehouse_id, loc_a, _, item_id = await _prepare(client)
+    await client.post(
+        "/inventory/inbound",
+        json={"warehouse_id": warehouse_id, "location_id": loc_a, "item_id": item_id, "qty": 3},
+    )
+    response = await client.get("/inventory", params={"as_of": "2000-01-01T00:00:00Z"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+    bad = await client.get("/inventory", params={"as_of": _future(), "stream": "true"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_prune_keeps_newest_snapshot():
+    first = await _take_snapshot()
+    second = await _take_snapshot()
+    old = datetime.now(timezone.utc) - timedelta(days=400)
+    async with TestSessionLocal() as session:
+        await session.execute(update(InventorySnapshot).values(taken_at=old))
+        await session.commit()
+
+    async with TestSessionLocal() as session:
+        assert await prune_inventory_snapshots(session, retention_days=30) == 1
+        await session.commit()
+        remaining = (await session.execute(select(InventorySnapshot.id))).scalars().all()
+    assert remaining == [second.id]
+    assert first.id != second.id
+
+
+@pytest.mark.asyncio
+async def test_inventory_as_of_pages_with_cursor(client: AsyncClient):
+    warehouse_id, loc_a, loc_b, item_id = await _prepare(client)
+    for location_id in (loc_a, loc_b):
+        await client.post(
+            "/inventory/inbound",
+            json={
+                "warehouse_id": warehouse_id,
+                "location_id": location_id,
+                "item_id": item_id,
+                "qty": 2,
+            },
+        )
+
+    first = await client.get("/inventory", params={"as_of": _future(), "limit": 1})
+    assert [row["location_id"] for row in first.json()] == [loc_a]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = await client.get(
+        "/inventory", params={"as_of": _future(), "limit": 1, "cursor": cursor}
+    )
+    assert [row["location_id"] for row in second.json()] == [loc_b]
+    assert "X-Next-Cursor" not in second.headers
@@ -1,5 +1,8 @@
 import pytest
 
+from app.models import TareItem
+from tests.conftest import TestSessionLocal
+
 
 async def _prepare_inbound_tare(client, qty: int = 5):
     wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH-MOV"})).json()
@@ -260,3 +263,77 @@ async def test_move_storage_to_storage_updates_inventory(client):
     ).json()
     assert len(storage_b_inv) == 1
     assert storage_b_inv[0]["quantity"] == ctx["qty"]
+
+
+@pytest.mark.asyncio
+async def test_tares_moved_onto_the_same_row_add_up(client):
+    wh = (await client.post("/warehouses", json={"name": "WH", "code": "WH-UPS"})).json()
+    zone = (
+        await client.post(
+            "/zones",
+            json={
+                "name": "Storage",
+                "code": "ST",
+                "warehouse_id": wh["id"],
+                "zone_type": "storage",
+            },
+        )
+    ).json()
+    locations = [
+        (
+            await client.post(
+                "/locations",
+                json={"warehouse_id": wh["id"], "zone_id": zone["id"], "code": code},
+            )
+        ).json()
+        for code in ("ST-A", "ST-B", "ST-C")
+    ]
+    item = (
+        await client.post("/items", json={"sku": "SKU-UPS", "name": "Item", "unit": "pcs"})
+    ).json()
+    tare_type = (
+        await client.post(
+            "/tares/types", json={"code": "BOX", "name": "Box", "prefix": "BOX", "level": 1}
+        )
+    ).json()
+
+    tare_ids = []
+    for source, qty in zip(locations[:2], (3, 4)):
+        tare = (
+            await client.post(
+                "/tares",
+                json={
+                    "warehouse_id": wh["id"],
+                    "type_id": tare_type["id"],
+                    "location_id": source["id"],
+                    "parent_tare_id": None,
+                },
+            )
+        ).json()
+        await client.post(
+            "/inventory/inbound",
+            json={
+                "warehouse_id": wh["id"],
+                "location_id": source["id"],
+                "item_id": item["id"],
+                "qty": qty,
+            },
+        )
+        async with TestSessionLocal() as session:
+            session.add(TareItem(tare_id=tare["id"], item_id=item["id"], quantity=qty))
+            await session.commit()
+        tare_ids.append(tare["id"])
+
+    target = locations[2]["id"]
+    for tare_id in tare_ids:
+        resp = await client.post(f"/tares/{tare_id}/move", json={"target_location_id": target})
+        assert resp.status_code == 200, resp.text
+
+    inv = (
+        await client.get(
+            "/inventory", params={"warehouse_id": wh["id"], "item_id": item["id"]}
+        )
+    ).json()
+    assert [(row["location_id"], row["quantity"], row["tare_id"]) for row in inv] == [
+        (target, 7, tare_ids[1])
+    ]